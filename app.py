@@ -1,93 +1,831 @@
 ######################## IMPORT Y OPCIONES GLOBALES ########################
-import pandas as pd
-from tabulate import tabulate
-from time import sleep
+#Las anotaciones se guardan como texto para no importar pandas al definir las funciones
+from __future__ import annotations
+
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from functools import lru_cache, wraps
+from time import perf_counter, thread_time
+
+class ModuloPerezoso:
+    """Módulo que se importa hasta que se usa por primera vez.
+
+    Al cargarse, el módulo real reemplaza al objeto perezoso en las variables globales,
+    por lo que los accesos posteriores no tienen costo adicional.
+    """
+
+    def __init__(self, nombre: str, alias: str, al_cargar=None):
+        """Registra el módulo sin importarlo.
+
+        Args:
+            nombre (str): Nombre del módulo a importar.
+            alias (str): Nombre de la variable global que lo contiene.
+            al_cargar (Callable, optional): Función que recibe el módulo recién importado. Defaults to None.
+        """
+
+        self.nombre = nombre
+        self.alias = alias
+        self.al_cargar = al_cargar
+
+    def cargar(self):
+        """Importa el módulo y lo deja en las variables globales.
+
+        Returns:
+            ModuleType: Módulo importado.
+        """
+
+        modulo = importlib.import_module(self.nombre)
+
+        if globals().get(self.alias) is self:
+            globals()[self.alias] = modulo
+
+            if self.al_cargar:
+                self.al_cargar(modulo)
+
+        return modulo
+
+    def __getattr__(self, atributo: str):
+        return getattr(self.cargar(), atributo)
+
+def configurar_pandas(modulo) -> None:
+    """Aplica las opciones globales de pandas al importarlo."""
+
+    #Cambiamos el formato de los tipos de dato float
+    modulo.set_option('display.float_format', lambda x: '%.9f' % x)
+
+#pandas y numpy sólo se importan cuando un cálculo los necesita
+np = ModuloPerezoso('numpy', 'np')
+pd = ModuloPerezoso('pandas', 'pd', al_cargar=configurar_pandas)
+
+#Módulos que se cargan de forma perezosa, usados para medir el arranque
+MODULOS_PEREZOSOS = ['numpy', 'pandas']
+
+######################## INSTRUMENTACIÓN ########################
+#Archivo de la traza cuando la instrumentación se activa sin indicar una ruta
+RUTA_TRAZA = "traza.jsonl"
+
+#Valores de CONTABILIDAD_TRAZA que activan la instrumentación con RUTA_TRAZA;
+#cualquier otro valor no vacío se toma como la ruta de la traza
+VALORES_ACTIVACION = {'1', 'si', 'sí', 'true'}
+VALORES_DESACTIVACION = {'0', 'no', 'false'}
+
+#Trazador de la sesión; mientras sea None, las etapas no miden nada
+TRAZADOR = None
+
+class EtapaNula:
+    """Etapa que no mide nada, usada mientras la instrumentación está desactivada
+    y para las etapas anidadas dentro de otra del mismo nombre."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def __setattr__(self, atributo, valor):
+        #Las filas asignadas a una etapa nula se descartan
+        pass
+
+ETAPA_NULA = EtapaNula()
+
+class Etapa:
+    """Mide una etapa de un cálculo: tiempo de pared, tiempo de CPU del hilo, memoria asignada y filas.
+
+    Los tiempos "propios" no incluyen los de las etapas anidadas, por lo que la suma de los tiempos
+    propios de todas las etapas de una calculadora es su tiempo total.
+    """
+
+    __slots__ = ('trazador', 'nombre', 'funcion', 'filas', 'padre', 'calculadora', 'nivel', 'inicio', 'inicio_cpu',
+                 'memoria_inicio', 'pico', 'hijos_pared', 'hijos_cpu')
+
+    def __init__(self, trazador: Trazador, nombre: str, funcion: str = None, filas: int = None):
+        """Prepara la etapa sin empezar a medir.
+
+        Args:
+            trazador (Trazador): Trazador que recibe la medición.
+            nombre (str): Nombre de la etapa ("captura", "construccion", "calculo", "exportacion", "impresion", ...).
+            funcion (str, optional): Función medida. En la etapa más externa, es el nombre de la calculadora. Defaults to None.
+            filas (int, optional): Filas procesadas, si ya se conocen. Defaults to None.
+        """
+
+        self.trazador = trazador
+        self.nombre = nombre
+        self.funcion = funcion
+        self.filas = filas
+        self.hijos_pared = 0.0
+        self.hijos_cpu = 0.0
+        self.memoria_inicio = self.pico = 0
+
+    def __enter__(self):
+        pila = self.trazador.pila()
+        self.padre = pila[-1] if pila else None
+        self.calculadora = self.padre.calculadora if self.padre else (self.funcion or self.nombre)
+        self.nivel = len(pila)
+        pila.append(self)
+
+        if self.trazador.memoria:
+            import tracemalloc
+
+            #El pico de la etapa anterior se conserva en el padre antes de reiniciarlo
+            actual, pico = tracemalloc.get_traced_memory()
+            if self.padre is not None:
+                self.padre.pico = max(self.padre.pico, pico)
+            tracemalloc.reset_peak()
+            self.memoria_inicio = self.pico = actual
+
+        self.inicio_cpu = thread_time()
+        self.inicio = perf_counter()
+
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        pared = perf_counter() - self.inicio
+        cpu = thread_time() - self.inicio_cpu
+
+        self.trazador.pila().pop()
+
+        memoria_neta = memoria_pico = None
+        if self.trazador.memoria:
+            import tracemalloc
+
+            actual, pico = tracemalloc.get_traced_memory()
+            self.pico = max(self.pico, pico)
+            memoria_neta = actual - self.memoria_inicio
+            memoria_pico = self.pico - self.memoria_inicio
+
+        if self.padre is not None:
+            self.padre.hijos_pared += pared
+            self.padre.hijos_cpu += cpu
+            self.padre.pico = max(self.padre.pico, self.pico)
+
+        self.trazador.registrar({
+            'calculadora': self.calculadora,
+            'etapa': self.nombre,
+            'funcion': self.funcion,
+            'nivel': self.nivel,
+            'inicio_s': self.inicio - self.trazador.origen,
+            'pared_s': pared,
+            'pared_propia_s': pared - self.hijos_pared,
+            'cpu_s': cpu,
+            'cpu_propia_s': cpu - self.hijos_cpu,
+            'memoria_neta': memoria_neta,
+            'memoria_pico': memoria_pico,
+            'filas': self.filas,
+            'hilo': threading.current_thread().name,
+            'error': None if tipo is None else tipo.__name__
+        })
+
+        return False
+
+class Trazador:
+    """Recibe las mediciones de las etapas, las escribe en un archivo JSON Lines y acumula un resumen.
+
+    La memoria se mide con tracemalloc, que es global al proceso: en el servicio HTTP,
+    la memoria de las etapas que corren al mismo tiempo en otros hilos se mezcla.
+    """
+
+    def __init__(self, ruta: str, memoria: bool = True):
+        """Abre el archivo de la traza y, si se pide, empieza a medir la memoria.
+
+        Args:
+            ruta (str): Ruta del archivo JSON Lines; las mediciones se agregan al final.
+            memoria (bool, optional): True si se quiere medir la memoria asignada. Defaults to True.
+        """
+
+        self.ruta = ruta
+        self.archivo = open(ruta, 'a', encoding='utf-8')
+        self.memoria = memoria
+        self.candado = threading.Lock()
+        self.local = threading.local()
+        self.origen = perf_counter()
+
+        #(calculadora, etapa) -> [llamadas, pared propia, CPU propia, pico de memoria, filas (None si no se contaron)]
+        self.totales = {}
+
+        if memoria:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def pila(self) -> list[Etapa]:
+        """Regresa la pila de etapas abiertas del hilo actual."""
+
+        try:
+            return self.local.pila
+        except AttributeError:
+            self.local.pila = []
+            return self.local.pila
+
+    def etapa(self, nombre: str, funcion: str = None, filas: int = None) -> Etapa | EtapaNula:
+        """Crea una etapa, o una etapa nula si ya hay una abierta con el mismo nombre (para no contarla dos veces)."""
+
+        pila = self.pila()
+        if pila and pila[-1].nombre == nombre:
+            return ETAPA_NULA
+
+        return Etapa(self, nombre, funcion, filas)
+
+    def registrar(self, registro: dict) -> None:
+        """Escribe la medición de una etapa y la suma al resumen.
+
+        Args:
+            registro (dict): Medición de la etapa.
+        """
+
+        with self.candado:
+            self.archivo.write(json.dumps(registro) + '\n')
+
+            totales = self.totales.setdefault((registro['calculadora'], registro['etapa']), [0, 0.0, 0.0, 0, None])
+            totales[0] += 1
+            totales[1] += registro['pared_propia_s']
+            totales[2] += registro['cpu_propia_s']
+            totales[3] = max(totales[3], registro['memoria_pico'] or 0)
+            if registro['filas'] is not None:
+                totales[4] = (totales[4] or 0) + registro['filas']
+
+    def resumen(self) -> str:
+        """Compone la tabla de resumen: una fila por calculadora y etapa, con los tiempos propios.
+
+        Returns:
+            str: Texto de la tabla, o un texto vacío si no hubo mediciones.
+        """
+
+        with self.candado:
+            filas = sorted(self.totales.items())
+
+        if not filas:
+            return ""
+
+        columnas = [
+            [calculadora for (calculadora, _), _ in filas],
+            [etapa for (_, etapa), _ in filas],
+            [f"{totales[0]:,}" for _, totales in filas],
+            [f"{totales[1]:,.4f}" for _, totales in filas],
+            [f"{totales[2]:,.4f}" for _, totales in filas],
+            [f"{totales[3] / 1024 ** 2:,.2f}" if self.memoria else "-" for _, totales in filas],
+            ["-" if totales[4] is None else f"{totales[4]:,}" for _, totales in filas]
+        ]
+        encabezados = ['Calculadora', 'Etapa', 'Llamadas', 'Pared (s)', 'CPU (s)', 'Memoria pico (MiB)', 'Filas']
+
+        return f"\nResumen de la traza ({self.ruta}):\n" + renderizar_tabla(encabezados, columnas, [False, False, True, True, True, True, True])
+
+    def cerrar(self) -> None:
+        """Cierra el archivo de la traza y deja de medir la memoria."""
+
+        with self.candado:
+            self.archivo.close()
+
+        if self.memoria:
+            import tracemalloc
+            tracemalloc.stop()
+
+def etapa(nombre: str, funcion: str = None, filas: int = None) -> Etapa | EtapaNula:
+    """Regresa un administrador de contexto que mide una etapa; no mide nada si la instrumentación está desactivada.
+
+    Las filas procesadas se pueden asignar dentro del bloque (with etapa('construccion') as medicion: medicion.filas = ...).
+
+    Args:
+        nombre (str): Nombre de la etapa.
+        funcion (str, optional): Función medida, o el nombre de la calculadora en la etapa más externa. Defaults to None.
+        filas (int, optional): Filas procesadas, si ya se conocen. Defaults to None.
 
-#Cambiamos el formato de los tipos de dato float
-pd.set_option('display.float_format', lambda x: '%.9f' % x)
+    Returns:
+        Etapa | EtapaNula: Etapa a usar en un bloque with.
+    """
+
+    trazador = TRAZADOR
+    if trazador is None:
+        return ETAPA_NULA
+
+    return trazador.etapa(nombre, funcion, filas)
+
+def contar_filas(resultado, argumentos: tuple = ()) -> None | int:
+    """Cuenta las filas de las tablas recibidas por una función o, si no recibió ninguna, de las que regresó.
+
+    Args:
+        resultado (Any): Valor regresado; puede ser una tabla, o una tupla o diccionario de tablas.
+        argumentos (tuple, optional): Argumentos posicionales de la función. Defaults to ().
+
+    Returns:
+        None | int: Total de filas, o None si no hay tablas.
+    """
+
+    if isinstance(resultado, dict):
+        resultado = tuple(resultado.values())
+    elif not isinstance(resultado, tuple):
+        resultado = (resultado,)
+
+    for valores in (argumentos, resultado):
+        formas = [forma for forma in (getattr(valor, 'shape', None) for valor in valores) if forma]
+        if formas:
+            return int(sum(forma[0] for forma in formas))
+
+    return None
+
+def trazar(nombre: str):
+    """Decorador que mide cada llamada de una función como una etapa (ver etapa).
+
+    Con la instrumentación desactivada, el costo es una consulta a TRAZADOR por llamada.
+
+    Args:
+        nombre (str): Nombre de la etapa.
+
+    Returns:
+        Callable: Decorador.
+    """
+
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if TRAZADOR is None:
+                return funcion(*args, **kwargs)
+
+            with etapa(nombre, funcion.__name__) as medicion:
+                resultado = funcion(*args, **kwargs)
+                medicion.filas = contar_filas(resultado, args)
+
+            return resultado
+
+        return envoltura
+
+    return decorador
+
+def ruta_traza_entorno() -> None | str:
+    """Lee la variable de entorno CONTABILIDAD_TRAZA.
+
+    Returns:
+        None | str: Ruta de la traza, o None si la variable no existe o desactiva la instrumentación.
+    """
+
+    valor = os.environ.get('CONTABILIDAD_TRAZA', '').strip()
+
+    if not valor or valor.lower() in VALORES_DESACTIVACION:
+        return None
+
+    return RUTA_TRAZA if valor.lower() in VALORES_ACTIVACION else valor
+
+def activar_traza(ruta: str = RUTA_TRAZA, memoria: bool = True) -> Trazador:
+    """Activa la instrumentación de la sesión. Al salir del programa se cierra la traza y se imprime el resumen.
+
+    Args:
+        ruta (str, optional): Ruta del archivo JSON Lines. Defaults to RUTA_TRAZA.
+        memoria (bool, optional): True si se quiere medir la memoria asignada. Defaults to True.
+
+    Returns:
+        Trazador: Trazador activo.
+    """
+
+    global TRAZADOR
+
+    if TRAZADOR is None:
+        import atexit
+
+        TRAZADOR = Trazador(ruta, memoria)
+        atexit.register(desactivar_traza)
+
+    return TRAZADOR
+
+def desactivar_traza(resumen: bool = True) -> None:
+    """Desactiva la instrumentación, cierra la traza y, si se pide, imprime el resumen en la salida de errores.
+
+    Args:
+        resumen (bool, optional): True si se quiere imprimir la tabla de resumen. Defaults to True.
+    """
+
+    global TRAZADOR
+
+    trazador, TRAZADOR = TRAZADOR, None
+    if trazador is None:
+        return
+
+    trazador.cerrar()
+
+    if resumen:
+        sys.stderr.write(trazador.resumen())
+        sys.stderr.flush()
 
 ######################## UTILIDADES ########################
 class Salir(Exception):
     """Excepción usada para regresar al menú principal."""
     pass
 
-def mostrar_aviso(descripcion: list[str], tipo: str = "Importante") -> None:
-    """Muestra un aviso al usuario.
+def escribir(texto: str) -> None:
+    """Escribe en la terminal un texto ya compuesto, con una sola escritura y un solo vaciado del búfer.
 
     Args:
-        descripcion (list[str]): Lista de strings con el contenido.
-        tipo (str, optional): Tipo de aviso. Puede ser "Importante", "Información" o "Resultado". Defaults to "Importante".
+        texto (str): Texto a escribir.
     """
 
-    match tipo:
-        case "Importante":
-            print("\n")
+    if texto:
+        sys.stdout.write(texto)
+        sys.stdout.flush()
 
-            print("-"*90)
-            print(f"|{'!!':^10}|", f"{negrita('AVISO'):^85}|", sep="")
-            print(f"|{'!!':^10}|", f"{'-'*77:^77}|", sep="")
-            print(f"|{'!!':^10}|", f"{' ':^77}|", sep="")
+@lru_cache(maxsize=256)
+def renderizar_aviso(descripcion: tuple[str, ...], tipo: str) -> str:
+    """Compone el texto de un aviso. Los avisos ya compuestos se guardan en caché.
 
-            for texto in descripcion:
-                print(f"|{'!!':^10}|", f"{texto:^77}|", sep="")
+    Args:
+        descripcion (tuple[str, ...]): Líneas del contenido.
+        tipo (str): Tipo de aviso. Puede ser "Importante", "Información" o "Resultado".
 
-            print(f"|{'':^10}|", f"{'':^77}|", sep="")
-            print(f"|{'**':^10}|", f"{' ':^77}|", sep="")
+    Returns:
+        str: Texto del aviso, o un texto vacío si el tipo no existe.
+    """
 
-            print("-"*90)
+    #La línea "\n" inicial equivale al print("\n") con el que empieza cada aviso
+    match tipo:
+        case "Importante":
+            lineas = [
+                "\n",
+                "-"*90,
+                f"|{'!!':^10}|" f"{negrita('AVISO'):^85}|",
+                f"|{'!!':^10}|" f"{'-'*77:^77}|",
+                f"|{'!!':^10}|" f"{' ':^77}|",
+                *[f"|{'!!':^10}|" f"{texto:^77}|" for texto in descripcion],
+                f"|{'':^10}|" f"{'':^77}|",
+                f"|{'**':^10}|" f"{' ':^77}|",
+                "-"*90
+            ]
 
         case "Información":
-            print("\n")
-
-            print("-"*90)
-            print(f"|{'**':^10}|", f"{negrita('INFORMACIÓN'):^85}|", sep="")
-            print(f"|{'':^10}|", f"{'-'*77:^77}|", sep="")
-            print(f"|{'II':^10}|", f"{' ':^77}|", sep="")
+            lineas = [
+                "\n",
+                "-"*90,
+                f"|{'**':^10}|" f"{negrita('INFORMACIÓN'):^85}|",
+                f"|{'':^10}|" f"{'-'*77:^77}|",
+                f"|{'II':^10}|" f"{' ':^77}|",
+                *[f"|{'II':^10}|" f"{texto:^77}|" for texto in descripcion],
+                f"|{'II':^10}|" f"{' ':^77}|",
+                "-"*90
+            ]
 
-            for texto in descripcion:
-                print(f"|{'II':^10}|", f"{texto:^77}|", sep="")
+        case "Resultado":
+            lineas = [
+                "\n",
+                "-"*90,
+                f"|{'':^10}|" f"{negrita('RESULTADO'):^85}|",
+                f"|{'====':^10}|" f"{'-'*77:^77}|",
+                f"|{'====':^10}|" f"{''*77:^77}|",
+                *[f"|{'':^10}|" f"{texto:^77}|" for texto in descripcion],
+                f"|{'====':^10}|" f"{'':^77}|",
+                f"|{'====':^10}|" f"{'':^77}|",
+                f"|{'':^10}|" f"{' ':^77}|",
+                "-"*90
+            ]
 
-            print(f"|{'II':^10}|", f"{' ':^77}|", sep="")
-            print("-"*90)
+        case _:
+            return ""
 
-        case "Resultado":
-            print("\n")
+    return "\n".join(lineas) + "\n"
 
-            print("-"*90)
-            print(f"|{'':^10}|", f"{negrita('RESULTADO'):^85}|", sep="")
-            print(f"|{'====':^10}|", f"{'-'*77:^77}|", sep="")
-            print(f"|{'====':^10}|", f"{''*77:^77}|", sep="")
+@trazar('impresion')
+def mostrar_aviso(descripcion: list[str], tipo: str = "Importante") -> None:
+    """Muestra un aviso al usuario.
 
-            for texto in descripcion:
-                print(f"|{'':^10}|", f"{texto:^77}|", sep="")
+    Args:
+        descripcion (list[str]): Lista de strings con el contenido.
+        tipo (str, optional): Tipo de aviso. Puede ser "Importante", "Información" o "Resultado". Defaults to "Importante".
+    """
 
-            print(f"|{'====':^10}|", f"{'':^77}|", sep="")
-            print(f"|{'====':^10}|", f"{'':^77}|", sep="")
-            print(f"|{'':^10}|", f"{' ':^77}|", sep="")
-            print("-"*90)
+    escribir(renderizar_aviso(tuple(descripcion), tipo))
 
-def exportar_excel(*dataframes: pd.DataFrame, nombre_archivo: str = "resultado") -> None:
+@trazar('exportacion')
+def exportar_excel(*dataframes: pd.DataFrame, nombre_archivo: str = "resultado", aviso: bool = True, flujo: bool = False) -> bool:
     """Exporta uno o más dataframes a excel.
 
     Args:
         *dataframes (Dataframe): Dataframes a exportar. Puede ser uno o muchos.
         nombre_archivo (str, optional): Nombre del archivo que se guardará. Defaults to "resultado".
+        aviso (bool, optional): True si se quiere mostrar el aviso de exportación exitosa. Defaults to True.
+        flujo (bool, optional): True si se quiere escribir fila por fila con memoria acotada
+            (ver exportar_excel_flujo). Defaults to False.
+
+    Returns:
+        bool: True si el archivo quedó con el resultado, False si estaba abierto en otro programa.
     """
 
-    dataframes = [dataframe for dataframe in dataframes]
+    if flujo:
+        return exportar_excel_flujo(*dataframes, nombre_archivo=nombre_archivo, aviso=aviso)
 
     try:
-        if len(dataframes) == 1:
-            dataframes[0].to_excel(f'{nombre_archivo}.xlsx', sheet_name="Hoja 1")
-        else:
-            with pd.ExcelWriter(f'{nombre_archivo}.xlsx') as writer:
-                for hoja, dataframe in enumerate(dataframes):
-                    dataframe.to_excel(writer, sheet_name=f'Hoja {hoja + 1}')
+        escrito = escribir_excel(dataframes, nombre_archivo)
     except PermissionError:
         print("Error: El archivo ya está abierto. Ciérrelo y vuelva a intentarlo.")
+        return False
+
+    if aviso:
+        if escrito:
+            mostrar_aviso([f'Archivo exportado exitosamente a {nombre_archivo}.xlsx'], tipo = "Información")
+        else:
+            mostrar_aviso([f'El archivo {nombre_archivo}.xlsx ya tiene este resultado, no se volvió a escribir'], tipo = "Información")
+
+    return True
+
+@trazar('exportacion')
+def escribir_excel(dataframes: tuple[pd.DataFrame, ...], nombre_archivo: str) -> bool:
+    """Escribe uno o más dataframes en un libro de Excel, salvo que el archivo ya tenga el mismo resultado.
+
+    Args:
+        dataframes (tuple[pd.DataFrame, ...]): Dataframes a escribir, uno por hoja.
+        nombre_archivo (str): Nombre del archivo, sin extensión.
+
+    Raises:
+        PermissionError: Si el archivo está abierto en otro programa.
+
+    Returns:
+        bool: True si se escribió el archivo, False si ya tenía este resultado.
+    """
+
+    dataframes = list(dataframes)
+
+    rutas = [f'{nombre_archivo}.xlsx']
+    try:
+        clave = clave_contenido('xlsx', dataframes)
+    except NoCacheable:
+        clave = None
+
+    if clave and CACHE_RESULTADOS.exportacion_vigente(rutas, clave):
+        return False
+
+    #Las tablas largas se escriben con un producto por columna mientras quepan en la hoja
+    hojas = [tabla_ancha(dataframe, COLUMNAS_MAXIMAS_EXCEL - 1) for dataframe in dataframes]
+
+    if len(hojas) == 1:
+        hojas[0].to_excel(f'{nombre_archivo}.xlsx', sheet_name="Hoja 1")
     else:
+        with pd.ExcelWriter(f'{nombre_archivo}.xlsx') as writer:
+            for hoja, dataframe in enumerate(hojas):
+                dataframe.to_excel(writer, sheet_name=f'Hoja {hoja + 1}')
+
+    if clave:
+        CACHE_RESULTADOS.registrar_exportacion(rutas, clave)
+
+    return True
+
+#Cantidad máxima de filas de una hoja de Excel, contando el encabezado
+FILAS_MAXIMAS_EXCEL = 1_048_576
+
+def bloques_dataframe(fuente: pd.DataFrame | Iterable[pd.DataFrame], tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    """Recorre un dataframe o un iterador de dataframes en bloques de tamaño acotado.
+
+    Args:
+        fuente (pd.DataFrame | Iterable[pd.DataFrame]): Dataframe completo o iterador de bloques.
+        tamano_bloque (int): Cantidad máxima de filas por bloque.
+
+    Yields:
+        pd.DataFrame: Bloques de a lo más tamano_bloque filas.
+    """
+
+    if isinstance(fuente, pd.DataFrame):
+        #Un dataframe vacío produce un bloque vacío para conservar su encabezado
+        for inicio in range(0, max(len(fuente), 1), tamano_bloque):
+            yield fuente.iloc[inicio:inicio + tamano_bloque]
+    else:
+        for bloque in fuente:
+            yield from bloques_dataframe(bloque, tamano_bloque)
+
+def libro_flujo(ruta: str) -> tuple:
+    """Abre un libro de Excel de sólo escritura que guarda las filas conforme se escriben.
+
+    Se usa XlsxWriter en modo de memoria constante y, si no está instalado, openpyxl en modo de sólo escritura.
+
+    Args:
+        ruta (str): Ruta del archivo.
+
+    Returns:
+        tuple: Función que crea una hoja a partir de su nombre y regresa la función que escribe
+            una fila en ella, y función que cierra el libro.
+    """
+
+    try:
+        import xlsxwriter
+    except ImportError:
+        from openpyxl import Workbook
+
+        libro = Workbook(write_only=True)
+
+        def nueva_hoja(nombre: str):
+            return libro.create_sheet(nombre).append
+
+        return nueva_hoja, lambda: libro.save(ruta)
+
+    libro = xlsxwriter.Workbook(ruta, {'constant_memory': True})
+
+    def nueva_hoja(nombre: str):
+        hoja = libro.add_worksheet(nombre)
+        numero_fila = itertools.count()
+        return lambda fila: hoja.write_row(next(numero_fila), 0, fila)
+
+    return nueva_hoja, libro.close
+
+def escribir_hoja_flujo(nueva_hoja, nombre: str, fuente: pd.DataFrame | Iterable[pd.DataFrame], tamano_bloque: int) -> None:
+    """Escribe un dataframe (o sus bloques) fila por fila en una hoja de un libro de flujo.
+
+    Si los datos no caben en una hoja, continúan en hojas con el mismo nombre y un número de parte.
+
+    Args:
+        nueva_hoja (Callable): Función de libro_flujo que crea una hoja.
+        nombre (str): Nombre de la hoja.
+        fuente (pd.DataFrame | Iterable[pd.DataFrame]): Dataframe completo o iterador de bloques.
+        tamano_bloque (int): Cantidad máxima de filas que se convierten a la vez.
+    """
+
+    escribir = None
+    filas = 0
+    parte = 1
+
+    for bloque in bloques_dataframe(fuente, tamano_bloque):
+        if escribir is None:
+            encabezado = [bloque.index.name or '', *bloque.columns]
+            escribir = nueva_hoja(nombre)
+            escribir(encabezado)
+            filas = 1
+
+        #Los valores faltantes se escriben como celdas vacías
+        valores = bloque.astype(object).where(bloque.notna(), None)
+
+        for fila in valores.itertuples(name=None):
+            if filas == FILAS_MAXIMAS_EXCEL:
+                parte += 1
+                escribir = nueva_hoja(f'{nombre} ({parte})')
+                escribir(encabezado)
+                filas = 1
+
+            escribir(fila)
+            filas += 1
+
+@trazar('exportacion')
+def exportar_excel_flujo(*fuentes: pd.DataFrame | Iterable[pd.DataFrame], nombre_archivo: str = "resultado",
+                         aviso: bool = True, tamano_bloque: int = 10_000) -> bool:
+    """Exporta uno o más dataframes a excel escribiendo fila por fila, con memoria acotada.
+
+    Cada fuente puede ser un dataframe completo o un iterador de dataframes (por ejemplo,
+    el resultado de pd.read_csv con chunksize). Cada fuente se guarda en su propia hoja ("Hoja N").
+
+    Args:
+        *fuentes (pd.DataFrame | Iterable[pd.DataFrame]): Dataframes o iteradores de bloques a exportar.
+        nombre_archivo (str, optional): Nombre del archivo que se guardará. Defaults to "resultado".
+        aviso (bool, optional): True si se quiere mostrar el aviso de exportación exitosa. Defaults to True.
+        tamano_bloque (int, optional): Cantidad máxima de filas que se tienen en memoria a la vez. Defaults to 10_000.
+
+    Returns:
+        bool: True si se escribió el archivo, False si estaba abierto en otro programa.
+    """
+
+    try:
+        nueva_hoja, cerrar = libro_flujo(f'{nombre_archivo}.xlsx')
+
+        for hoja, fuente in enumerate(fuentes):
+            if isinstance(fuente, pd.DataFrame):
+                fuente = tabla_ancha(fuente, COLUMNAS_MAXIMAS_EXCEL - 1)
+
+            escribir_hoja_flujo(nueva_hoja, f'Hoja {hoja + 1}', fuente, tamano_bloque)
+
+        cerrar()
+    except PermissionError:
+        print("Error: El archivo ya está abierto. Ciérrelo y vuelva a intentarlo.")
+        return False
+
+    if aviso:
         mostrar_aviso([f'Archivo exportado exitosamente a {nombre_archivo}.xlsx'], tipo = "Información")
 
+    return True
+
+#Formatos de exportación y la extensión de sus archivos
+FORMATOS_EXPORTACION = {
+    'xlsx': 'xlsx',
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+    'feather': 'arrow',
+    'csv': 'csv'
+}
+
+@trazar('exportacion')
+def exportar(*dataframes: pd.DataFrame, nombre_archivo: str = "resultado", formato: str = None,
+             compresion: str = 'zstd', dataset: bool = False, aviso: bool = True) -> list[str]:
+    """Exporta uno o más dataframes a Excel, Parquet, Arrow IPC o CSV.
+
+    El formato se toma del parámetro o, si no se especifica, de la extensión de nombre_archivo
+    (por defecto, Excel). En Excel todos los dataframes van en un solo libro; en los demás formatos
+    se escribe un archivo por dataframe ("<nombre>_hoja_N") o, si dataset es True, una carpeta
+    "<nombre>" con un archivo "hoja_N" por dataframe.
+
+    Excel y CSV reciben las tablas largas compactas con un producto por columna (ver tabla_ancha);
+    Parquet y Arrow las guardan largas, con el índice categórico y los tipos reducidos (ver reducir_tabla).
+
+    Args:
+        *dataframes (Dataframe): Dataframes a exportar. Puede ser uno o muchos.
+        nombre_archivo (str, optional): Nombre del archivo, con o sin extensión. Defaults to "resultado".
+        formato (str, optional): "xlsx", "parquet", "arrow" (o "feather") o "csv". Defaults to None.
+        compresion (str, optional): Compresión para Parquet y Arrow (por ejemplo, "zstd", "lz4" o None). Defaults to 'zstd'.
+        dataset (bool, optional): True si se quiere escribir una carpeta con un archivo por dataframe. Defaults to False.
+        aviso (bool, optional): True si se quiere mostrar el aviso de exportación exitosa. Defaults to True.
+
+    Raises:
+        ValueError: Si el formato no es soportado.
+
+    Returns:
+        list[str]: Rutas de los archivos escritos, o una lista vacía si no se pudieron escribir.
+    """
+
+    base, extension = os.path.splitext(nombre_archivo)
+
+    if extension.lstrip('.').lower() in FORMATOS_EXPORTACION:
+        formato = formato or extension.lstrip('.').lower()
+        nombre_archivo = base
+
+    formato = (formato or 'xlsx').lower()
+
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+    if formato == 'xlsx':
+        return [f'{nombre_archivo}.xlsx'] if exportar_excel(*dataframes, nombre_archivo=nombre_archivo, aviso=aviso) else []
+
+    extension = FORMATOS_EXPORTACION[formato]
+
+    if dataset:
+        os.makedirs(nombre_archivo, exist_ok=True)
+        rutas = [os.path.join(nombre_archivo, f'hoja_{hoja + 1}.{extension}') for hoja in range(len(dataframes))]
+    elif len(dataframes) == 1:
+        rutas = [f'{nombre_archivo}.{extension}']
+    else:
+        rutas = [f'{nombre_archivo}_hoja_{hoja + 1}.{extension}' for hoja in range(len(dataframes))]
+
+    try:
+        clave = clave_contenido(formato, compresion, list(dataframes))
+    except NoCacheable:
+        clave = None
+
+    if clave and CACHE_RESULTADOS.exportacion_vigente(rutas, clave):
+        if aviso:
+            mostrar_aviso([f'El archivo {ruta} ya tiene este resultado, no se volvió a escribir' for ruta in rutas], tipo = "Información")
+        return rutas
+
+    try:
+        for ruta, dataframe in zip(rutas, dataframes):
+            #Los formatos columnares requieren nombres de columna de tipo texto
+            dataframe = dataframe.rename(columns=str)
+
+            match formato:
+                case 'parquet':
+                    reducir_tabla(dataframe).to_parquet(ruta, compression=compresion)
+                case 'arrow' | 'feather':
+                    reducir_tabla(dataframe).reset_index().to_feather(ruta, compression=compresion or 'uncompressed')
+                case 'csv':
+                    tabla_ancha(dataframe).to_csv(ruta)
+    except PermissionError:
+        print("Error: El archivo ya está abierto. Ciérrelo y vuelva a intentarlo.")
+        return []
+    except ImportError as e:
+        print(f"Error: se requiere pyarrow para exportar a {formato} ({e}).")
+        return []
+
+    if clave:
+        CACHE_RESULTADOS.registrar_exportacion(rutas, clave)
+
+    if aviso:
+        mostrar_aviso([f'Archivo exportado exitosamente a {ruta}' for ruta in rutas], tipo = "Información")
+
+    return rutas
+
+@trazar('captura')
+def leer_tabla(ruta: str) -> pd.DataFrame:
+    """Lee una tabla desde un archivo CSV o de Excel.
+
+    Args:
+        ruta (str): Ruta del archivo. La extensión determina el formato.
+
+    Raises:
+        ValueError: Si la extensión del archivo no es soportada.
+
+    Returns:
+        pd.DataFrame: Tabla leída del archivo.
+    """
+
+    extension = ruta.rsplit('.', 1)[-1].lower()
+
+    match extension:
+        case 'csv':
+            return pd.read_csv(ruta)
+        case 'xlsx' | 'xls':
+            return pd.read_excel(ruta)
+        case _:
+            raise ValueError(f"Formato de archivo no soportado: .{extension}")
+
+@lru_cache(maxsize=256)
 def negrita(texto: str) -> str:
     """Retorna un F-string con un formato de negritas.
 
@@ -128,6 +866,16 @@ def pedir_salida() -> None | Exception:
     if salida == "S":
         raise Salir
 
+def pausar() -> None:
+    """Espera a que el usuario presione Enter antes de regresar al menú.
+
+    Sin una terminal (por ejemplo, con la entrada redirigida) no se espera.
+    """
+
+    if sys.stdin.isatty():
+        input(f"{negrita('Presione Enter para continuar...')}")
+
+@trazar('captura')
 def pedir_campo(mensaje: str) -> str:
     """Pide al usuario que introduzca un campo no vacío.
 
@@ -157,6 +905,7 @@ def pedir_campo(mensaje: str) -> str:
 
             continue
 
+@trazar('captura')
 def pedir_numero(mensaje: str, min: int = None, max: int = None) -> int:
     """Pide que el usuario introduzca un número válido.
 
@@ -196,796 +945,5900 @@ def pedir_numero(mensaje: str, min: int = None, max: int = None) -> int:
             pedir_salida()
             continue
 
-def mostrar_cuadro(contenido: list, titulo:str = None, subtitulo:str = None):
-    """Muestra un cuadro que contiene el texto que se le pase como parámetro.
+@lru_cache(maxsize=256)
+def renderizar_cuadro(contenido: tuple[str, ...], titulo: str = None, subtitulo: str = None) -> str:
+    """Compone el texto de un cuadro. Los cuadros ya compuestos (como los menús) se guardan en caché.
 
     Args:
-        contenido (list): Lista de strings. Cada elemento representa una línea.
+        contenido (tuple[str, ...]): Líneas del cuadro.
         titulo (str, optional): Título del cuadro. Defaults to None.
         subtitulo (str, optional): Subtítulo del cuadro. Defaults to None.
+
+    Returns:
+        str: Texto del cuadro.
     """
 
-    print("\n")
-    print("-"*92)
+    lineas = ["\n", "-"*92]
 
     if titulo:
-        print(f"|{negrita(titulo):^98}|")
-        print(f"|{'-'*90}|")
+        lineas.append(f"|{negrita(titulo):^98}|")
+        lineas.append(f"|{'-'*90}|")
     if subtitulo:
-        print(f"|{negrita(subtitulo):^98}|")
-        print(f"|{" ":^90}|")
+        lineas.append(f"|{negrita(subtitulo):^98}|")
+        lineas.append(f"|{' ':^90}|")
     for linea in contenido:
-        print(f"|{linea:^90}|")
+        lineas.append(f"|{linea:^90}|")
 
-    print("-"*92)
+    lineas.append("-"*92)
 
-######################## PUNTO DE EQUILIBRIO ########################
-def punto_equilibrio_menu() -> None:
-    """Menú que muestra las opciones para el punto de equilibrio."""
+    return "\n".join(lineas) + "\n"
 
-    titulo = 'Usted escogió: Punto de equilibrio'
-    subtitulo = 'Escoja el tipo de cálculo que le gustaría realizar'
-    opciones = [
-        '(1) - Normal',
-        '(2) - Multilínea',
-        '(3) - Regresar al menú principal'
-    ]
+@trazar('impresion')
+def mostrar_cuadro(contenido: list, titulo:str = None, subtitulo:str = None):
+    """Muestra un cuadro que contiene el texto que se le pase como parámetro.
 
-    while True:
+    Args:
+        contenido (list): Lista de strings. Cada elemento representa una línea.
+        titulo (str, optional): Título del cuadro. Defaults to None.
+        subtitulo (str, optional): Subtítulo del cuadro. Defaults to None.
+    """
 
-        mostrar_cuadro(opciones, titulo, subtitulo)
+    escribir(renderizar_cuadro(tuple(contenido), titulo, subtitulo))
 
-        opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 3)
+#Cantidad de filas que se muestran por página en las tablas de resultados
+FILAS_POR_PAGINA = 50
 
-        match opcion:
-            case 1:
-                punto_equilibrio_normal()
-            case 2:
-                punto_equilibrio_multilinea()
-            case 3:
-                return
+def formatear_columna(valores: np.ndarray) -> tuple[list[str], bool]:
+    """Formatea todos los valores de una columna a la vez.
 
-def punto_equilibrio_normal() -> None:
-    """Función que muestra una interfaz para determinar el punto de equilibrio normal."""
+    Los enteros se muestran con separador de miles y los flotantes con dos decimales.
 
-    try:
-        mostrar_cuadro(["1. Ingrese el precio de venta"])
-        precio_venta = pedir_numero("Valor del precio de venta: ", 0)
+    Args:
+        valores (np.ndarray): Valores de la columna.
 
-        mostrar_cuadro(["2. Ingrese el costo variable"])
-        costo_variable = pedir_numero("Valor del costo variable: ", 0)
+    Returns:
+        tuple[list[str], bool]: Textos formateados y True si la columna es numérica.
+    """
 
-        mostrar_cuadro(["3. Ingrese el costo fijo"])
-        costo_fijo = pedir_numero("Valor del costo fijo: ", 0)
+    match valores.dtype.kind:
+        case 'i' | 'u':
+            return list(map('{:,}'.format, valores.tolist())), True
+        case 'f':
+            return list(map('{:,.2f}'.format, valores.tolist())), True
+        case 'b':
+            return list(map(str, valores.tolist())), False
+
+    #Columnas de tipo objeto: se formatea cada valor según su tipo
+    textos = []
+    numerica = True
+
+    for valor in valores.tolist():
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            numerica = False
+            textos.append('' if valor is None else str(valor))
+        elif isinstance(valor, int):
+            textos.append(f'{valor:,}')
+        else:
+            textos.append(f'{valor:,.2f}')
 
-        margen_contribucion_unitario = precio_venta - costo_variable
-        punto_equilibrio_unidades = costo_fijo / margen_contribucion_unitario
-        punto_equilibrio_pesos = punto_equilibrio_unidades * precio_venta
+    return textos, numerica
 
-        contenido = [
-            f'El punto de equilibrio en unidades es: {punto_equilibrio_unidades}',
-            f'El punto de equilibrio en pesos es: ${punto_equilibrio_pesos:,.2f}'
-        ]
+def renderizar_tabla(encabezados: list[str], columnas: list[list[str]], numericas: list[bool], corte: int = None, omitidas: int = 0) -> str:
+    """Compone una tabla con el formato "psql" a partir de columnas ya formateadas.
 
-        mostrar_aviso(contenido, tipo='Resultado')
+    Args:
+        encabezados (list[str]): Encabezado de cada columna (el primero es el del índice).
+        columnas (list[list[str]]): Textos de cada columna.
+        numericas (list[bool]): True para las columnas numéricas, que se centran. Las demás se alinean a la izquierda.
+        corte (int, optional): Posición de la fila antes de la cual se indica que hay filas omitidas. Defaults to None.
+        omitidas (int, optional): Cantidad de filas omitidas en el corte. Defaults to 0.
 
-        sleep(5)
+    Returns:
+        str: Texto de la tabla.
+    """
 
-    except ZeroDivisionError:
-        print(f"{negrita('Error')}: división por cero.")
+    anchos = [max(len(encabezado) + 2, *map(len, textos)) if textos else len(encabezado) + 2
+              for encabezado, textos in zip(encabezados, columnas)]
 
+    def fila(celdas: Iterable[str]) -> str:
+        partes = [f' {celda:^{ancho}} ' if numerica else f' {celda:<{ancho}} '
+                  for celda, ancho, numerica in zip(celdas, anchos, numericas)]
+        return '|' + '|'.join(partes) + '|'
 
+    borde = '+' + '+'.join('-' * (ancho + 2) for ancho in anchos) + '+'
 
+    lineas = [borde, fila(encabezados), '|' + '+'.join('-' * (ancho + 2) for ancho in anchos) + '|']
 
-def punto_equilibrio_multilinea() -> None:
-    """Función que muestra una interfaz para determinar el punto de equilibrio multilínea."""
+    for numero, celdas in enumerate(zip(*columnas)):
+        if numero == corte:
+            lineas.append(f'| ... {omitidas:,} filas omitidas ...')
+        lineas.append(fila(celdas))
 
-    contador_productos = 1
+    lineas.append(borde)
 
-    datos = {} #Usamos primero un diccionario para recolectar los datos
+    return '\n'.join(lineas) + '\n'
 
-    suma_porcentaje = 0 #Utilizado para verificar que no se pase del 100%
+def grupos_columnas(dataframe: pd.DataFrame, ancho_maximo: int) -> list[list[int]]:
+    """Agrupa las columnas de un dataframe para que cada grupo quepa en el ancho de la terminal.
 
-    #Recolección de datos
-    while True:
+    El ancho de cada columna se estima con su encabezado y una muestra de sus primeras filas.
 
-        mostrar_cuadro([f'Producto {contador_productos}'])
+    Args:
+        dataframe (pd.DataFrame): Tabla a mostrar.
+        ancho_maximo (int): Ancho disponible en caracteres.
 
-        nombre_producto = pedir_campo('Escriba el nombre del producto: ')
-        porcentaje_margen_contribucion = pedir_numero('Escriba el porcentaje del margen de contribución (Sin signo): ', 0, 100)
-        suma_porcentaje += porcentaje_margen_contribucion
+    Returns:
+        list[list[int]]: Posiciones de las columnas de cada grupo.
+    """
 
-        if suma_porcentaje > 100:
-            mostrar_aviso(['La suma del porcentaje superó el 100%'])
+    muestra = dataframe.iloc[:FILAS_POR_PAGINA]
+    ancho_indice = max([len(str(dataframe.index.name or '')) + 2, *(len(str(valor)) for valor in muestra.index)]) + 3
 
-            contenido = [
-                '¿Está seguro de querer continuar?',
-                '(S) - Sí',
-                '(N) - No'
-            ]
+    grupos = [[]]
+    ancho_grupo = ancho_indice
 
-            mostrar_cuadro(contenido)
+    for posicion in range(dataframe.shape[1]):
+        textos, _ = formatear_columna(muestra.iloc[:, posicion].to_numpy())
+        ancho = max([len(str(dataframe.columns[posicion])) + 2, *map(len, textos)]) + 3
 
-            print("\n")
-            confirmar = pedir_campo("Respuesta: ").capitalize()
+        if grupos[-1] and ancho_grupo + ancho > ancho_maximo:
+            grupos.append([])
+            ancho_grupo = ancho_indice
 
-            if confirmar == "N":
-                break
+        grupos[-1].append(posicion)
+        ancho_grupo += ancho
 
+    return grupos
 
-        precio_venta = pedir_numero('Escriba el precio de venta: ', 0)
-        costo_variable = pedir_numero('Escriba el costo variable: ', 0)
-        margen_contribucion = pedir_numero('Escriba el margen de contribución: ', 0)
+@trazar('impresion')
+def mostrar_tabla(dataframe: pd.DataFrame, filas_por_pagina: int = FILAS_POR_PAGINA, interactivo: bool = None,
+                  transponer: bool = True) -> None:
+    """Muestra un dataframe como tabla, formateando sólo las filas y columnas visibles.
 
-        datos[nombre_producto] = [porcentaje_margen_contribucion, precio_venta, costo_variable, margen_contribucion]
+    Las tablas que no caben en la terminal se dividen en grupos de columnas. Si la tabla tiene más
+    filas que filas_por_pagina, en modo interactivo se muestra página por página y, si no,
+    se muestran sólo las primeras y las últimas filas. Cada página se escribe por separado,
+    sin construir el texto de la tabla completa.
 
-        contador_productos += 1
+    Las tablas largas compactas con hasta filas_por_pagina productos se muestran con un producto
+    por columna (ver tabla_ancha); las más grandes se muestran con un producto por fila.
 
-        contenido = [
-            '¿Quiere añadir otro producto?',
-            '(S) - Sí',
-            '(N) - No'
-        ]
+    Args:
+        dataframe (pd.DataFrame): Tabla a mostrar.
+        filas_por_pagina (int, optional): Cantidad de filas por página. Defaults to FILAS_POR_PAGINA.
+        interactivo (bool, optional): True para navegar entre páginas. Por defecto, se detecta si hay una terminal. Defaults to None.
+        transponer (bool, optional): False para mostrar las tablas largas con un producto por fila. Defaults to True.
+    """
 
-        mostrar_cuadro(contenido)
+    if interactivo is None:
+        interactivo = sys.stdin.isatty() and sys.stdout.isatty()
 
-        continuar = pedir_campo("Respuesta: ").capitalize()
+    if transponer:
+        dataframe = tabla_ancha(dataframe, filas_por_pagina)
 
-        if continuar == "N":
-            break
+    total_filas = len(dataframe)
+    grupos = grupos_columnas(dataframe, shutil.get_terminal_size((120, 40)).columns)
 
-    #Conversión a Dataframe
-    df_datos = pd.DataFrame(datos)
-    df_datos.index = ['% de Margen de contribución', 'Precio de venta', 'Costo variable', 'Margen de contribución']
+    def renderizar(inicio: int, fin: int, posiciones: list[int], corte: int = None) -> str:
+        if corte is None:
+            pagina = dataframe.iloc[inicio:fin, posiciones]
+        else:
+            #Primeras y últimas filas, con el aviso de las omitidas en medio
+            pagina = dataframe.iloc[np.r_[0:corte, total_filas - (fin - corte):total_filas], posiciones]
 
-    #Pedimos el costo fijo para las operaciones posteriores
-    costo_fijo = pedir_numero('Escriba el costo fijo: ', 0)
+        indice, _ = formatear_columna(pagina.index.to_numpy())
+        columnas, numericas = [indice], [False]
+        for posicion in range(pagina.shape[1]):
+            textos, numerica = formatear_columna(pagina.iloc[:, posicion].to_numpy())
+            columnas.append(textos)
+            numericas.append(numerica)
 
-    #Parte donde se calcula el margen de contribución ponderado y unitario
-    margen_ponderado = {}
-    margen_contribucion_unitario = 0
+        encabezados = [str(pagina.index.name or ''), *map(str, pagina.columns)]
 
-    for nombre, informacion in datos.items():
-        #Obtenemos los datos necesarios para el cálculo
-        margen_contribucion = informacion[3]
-        porcentaje_margen_contribucion = informacion[0]
+        return renderizar_tabla(encabezados, columnas, numericas, corte, total_filas - fin)
 
-        #Cálculos requeridos
-        margen_contribucion_ponderado = margen_contribucion * (porcentaje_margen_contribucion / 100)
-        margen_contribucion_unitario += margen_contribucion_ponderado
+    if total_filas <= filas_por_pagina:
+        for posiciones in grupos:
+            escribir(renderizar(0, total_filas, posiciones))
+        return
 
-        #Lo añadimos al diccionario
-        margen_ponderado[nombre] = [margen_contribucion, porcentaje_margen_contribucion, margen_contribucion_ponderado]
+    if not interactivo:
+        mitad = filas_por_pagina // 2
+        for posiciones in grupos:
+            escribir(renderizar(0, filas_por_pagina, posiciones, corte=mitad))
+        return
 
-    #Lo convertimos a DataFrame para su posterior uso
-    df_margen_ponderado = pd.DataFrame(margen_ponderado)
-    df_margen_ponderado.index = ['Margen de contribución', 'Porcentaje del margen de contribución', 'Margen de contribución ponderado']
+    for inicio in range(0, total_filas, filas_por_pagina):
+        fin = min(inicio + filas_por_pagina, total_filas)
 
-    #Parte donde calculamos el punto de equilibrio en unidades y su ponderación
-    punto_equilibrio_unidades = costo_fijo / margen_contribucion_unitario
+        for posiciones in grupos:
+            escribir(renderizar(inicio, fin, posiciones))
 
-    dict_punto_equilibrio_unidades = {}
-    for producto, informacion in datos.items():
-        porcentaje_margen_contribucion = informacion[0]
-        punto_equilibrio_por_unidad = punto_equilibrio_unidades * (porcentaje_margen_contribucion / 100)
+        if fin == total_filas:
+            return
 
-        dict_punto_equilibrio_unidades[producto] = [porcentaje_margen_contribucion,
-                                                    punto_equilibrio_unidades,
-                                                    punto_equilibrio_por_unidad]
+        print(f"Filas {inicio + 1:,} a {fin:,} de {total_filas:,}. (Enter) - Siguiente página, (T) - Terminar: ", end="")
+        if input().strip().capitalize() == "T":
+            return
 
-    df_punto_equilibrio_unidades = pd.DataFrame(dict_punto_equilibrio_unidades)
-    df_punto_equilibrio_unidades.index = ['Porcentaje del margen de contribución', 'Punto de equilibrio en unidades', 'Punto de equilibrio por unidad']
+######################## TABLAS COMPACTAS ########################
+#Las tablas de resultado con un renglón por producto se guardan en formato largo: un producto por fila,
+#el nombre como índice categórico y los números en int64 o float64, para que cualquier operación sobre
+#ellas sea segura. Los números sólo se reducen al tipo más angosto al exportarlas a Parquet o Arrow y al
+#medir su memoria (ver reducir_tabla). El formato de un producto por columna sólo se arma al dibujarlas (ver tabla_ancha).
 
-    #Parte donde calculamos el punto de equilibrio en pesos
-    dict_punto_equilibrio_pesos = {}
-    total_punto_equilibrio_pesos = 0
+#Cantidad máxima de columnas de una hoja de Excel, contando la del índice
+COLUMNAS_MAXIMAS_EXCEL = 16_384
 
-    for producto, informacion in dict_punto_equilibrio_unidades.items():
-        punto_equilibrio_por_unidad = informacion[2]
-        precio_venta = datos[producto][1]
+def tipo_reducido(valores: pd.Series):
+    """Obtiene el tipo más angosto en el que caben todos los valores de una columna.
 
-        punto_equilibrio_pesos = punto_equilibrio_por_unidad * precio_venta
-        total_punto_equilibrio_pesos += punto_equilibrio_pesos
+    Los enteros se reducen al entero con signo más pequeño que los contiene, los flotantes
+    a float32 sólo si ningún valor cambia al convertirlos y el texto repetido se vuelve categórico.
 
-        dict_punto_equilibrio_pesos[producto] = [punto_equilibrio_por_unidad, precio_venta, punto_equilibrio_pesos]
+    Args:
+        valores (pd.Series): Columna.
 
-    df_punto_equilibrio_pesos = pd.DataFrame(dict_punto_equilibrio_pesos)
-    df_punto_equilibrio_pesos.index = ['Punto de equilibrio por unidad', 'Precio de venta', 'Punto de equilibrio en pesos']
+    Returns:
+        El tipo reducido, o el tipo actual si no se puede reducir.
+    """
 
-    mostrar_aviso(['Su resultado se encuentra listo'], tipo = "Información")
+    match valores.dtype.kind:
+        case 'i' | 'u':
+            if len(valores) == 0:
+                return np.int8
 
-    exportar_excel(df_datos, df_margen_ponderado, df_punto_equilibrio_unidades, df_punto_equilibrio_pesos, nombre_archivo="punto_equilibrio")
+            minimo, maximo = int(valores.min()), int(valores.max())
+            for tipo in (np.int8, np.int16, np.int32, np.int64):
+                if np.iinfo(tipo).min <= minimo and maximo <= np.iinfo(tipo).max:
+                    return tipo
+        case 'f':
+            flotantes = valores.to_numpy(dtype=np.float64)
+            with np.errstate(over='ignore'):
+                reducidos = flotantes.astype(np.float32)
 
-    #Usamos las matrices transpuestas porque intercambiar las filas por las columnas.
-    descripcion = [
-        f'El punto de equilibrio en unidades es: {punto_equilibrio_unidades}',
-        f'El punto de equilibrio en pesos es: ${total_punto_equilibrio_pesos:,.2f}'
-    ]
-    mostrar_aviso(descripcion, tipo = "Resultado")
+            if np.array_equal(reducidos, flotantes, equal_nan=True):
+                return np.float32
+        case 'O':
+            if len(valores) and valores.nunique(dropna=False) <= len(valores) // 2:
+                return 'category'
 
-    mostrar_aviso(['A continuación se mostrarán las tablas'], tipo = "Información")
+    return valores.dtype
 
-    mostrar_cuadro(['Datos'])
-    print(tabulate(df_datos, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+def compactar_tabla(tabla: pd.DataFrame, nombre_indice: str = 'Producto') -> pd.DataFrame:
+    """Convierte una tabla con un producto por fila al formato largo compacto.
 
-    mostrar_cuadro(['Ponderación de margen'])
-    print(tabulate(df_margen_ponderado, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+    Sólo se compactan los nombres: el índice y el texto repetido se vuelven categóricos. Las columnas
+    numéricas quedan en int64 o float64, porque en un tipo reducido la aritmética se desborda sin avisar.
 
-    mostrar_cuadro(['Ponderación de punto de equilibrio (unidades)'])
-    print(tabulate(df_punto_equilibrio_unidades.T, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+    Args:
+        tabla (pd.DataFrame): Tabla con un producto por fila (el índice es el nombre del producto).
+        nombre_indice (str, optional): Nombre del índice. Defaults to 'Producto'.
 
-    mostrar_cuadro(['Ponderación de punto de equilibrio (pesos)'])
-    print(tabulate(df_punto_equilibrio_pesos.T, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+    Returns:
+        pd.DataFrame: Copia de la tabla con el índice categórico.
+    """
 
-    sleep(5)
+    compacta = tabla.astype({columna: tipo_reducido(valores) if valores.dtype.kind == 'O' else tipo_sin_compactar(valores.dtype)
+                             for columna, valores in tabla.items()})
+    compacta.index = pd.CategoricalIndex(tabla.index, name=nombre_indice)
 
-######################## UNIDADES ANTES Y DESPUÉS DE IMPUESTOS ########################
-def unidades_impuestos_menu() -> None:
-    """Función que muestra un menú para la opción de unidades de impuestos."""
+    return compacta
 
-    título = "Unidades antes/después de impuestos"
-    subtítulo = "Escoja el tipo de cálculo que le gustaría realizar"
-    opciones = [
-        '(1) - Unidad antes de impuestos normal',
-        '(2) - Unidad antes de impuestos multilínea',
-        '(3) - Unidad después de impuestos normal',
-        '(4) - Unidad después de impuestos multilínea',
-        '(5) - Regresar'
-    ]
+def reducir_tabla(tabla: pd.DataFrame) -> pd.DataFrame:
+    """Reduce las columnas numéricas de una tabla al tipo más angosto que conserva sus valores (ver tipo_reducido).
 
-    while True:
-        mostrar_cuadro(opciones, título, subtítulo)
+    Es sólo para guardar o medir la tabla: las operaciones sobre una columna reducida se hacen en el tipo
+    reducido y se pueden desbordar.
 
-        opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 5)
+    Args:
+        tabla (pd.DataFrame): Tabla.
 
-        match opcion:
-            case 1:
-                unidad_antes_de_impuestos_normal()
-            case 2:
-                unidad_antes_de_impuestos_multilinea()
-            case 3:
-                unidad_despues_de_impuestos_normal()
-            case 4:
-                unidad_despues_impuestos_multilinea()
-            case 5:
-                return
+    Returns:
+        pd.DataFrame: Copia de la tabla con las columnas numéricas reducidas.
+    """
 
-def unidad_antes_de_impuestos_normal(exportar: bool = False) -> None | float:
-    """Calcula las unidades a vender antes de impuestos normal.
+    return tabla.astype({columna: tipo_reducido(valores) for columna, valores in tabla.items() if valores.dtype.kind in 'iuf'})
 
-        Args:
-            exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
-        Returns:
-            None: Si no se especifica que se va a exportar.
-            float: Unidades a vender antes de impuestos.
-    """
+def tabla_ancha(tabla: pd.DataFrame, maximo_productos: int = None) -> pd.DataFrame:
+    """Transpone una tabla larga compacta al formato de un producto por columna, para mostrarla o exportarla.
 
-    print("\n")
+    Las columnas numéricas se llevan al tipo común más amplio (int64 o float64) antes de transponer,
+    por lo que el resultado es igual al de transponer la tabla sin compactar.
 
-    mostrar_cuadro(["Escriba el costo fijo total"])
-    costo_fijo_total = pedir_numero("Valor del costo fijo total: ", 0)
+    Args:
+        tabla (pd.DataFrame): Tabla a dibujar.
+        maximo_productos (int, optional): Cantidad máxima de productos que se transponen;
+            las tablas más grandes se dejan en formato largo. Defaults to None (sin límite).
 
-    mostrar_cuadro(["Escriba la utilidad deseada"])
-    utilidad_deseada = pedir_numero("Valor de la utilidad deseada: ", 0)
+    Returns:
+        pd.DataFrame: Tabla con un producto por columna, o la misma tabla si no es larga (sin índice categórico)
+            o tiene más de maximo_productos productos.
+    """
 
-    mostrar_cuadro(["Escriba el margen de contribución unitario"])
-    margen_contribucion_unitario = pedir_numero("Valor del margen de contribución unitario: ", 0)
+    if not isinstance(tabla.index, pd.CategoricalIndex) or (maximo_productos is not None and len(tabla) > maximo_productos):
+        return tabla
 
-    unidades_antes_impuestos = (costo_fijo_total + utilidad_deseada) / margen_contribucion_unitario
+    if len(tabla.columns) and all(tipo.kind in 'iuf' for tipo in tabla.dtypes):
+        tabla = tabla.astype(np.float64 if np.result_type(*tabla.dtypes).kind == 'f' else np.int64)
 
-    contenido = [f'Unidades a vender antes de impuestos: {unidades_antes_impuestos}']
-    mostrar_aviso(contenido, tipo = 'Resultado')
+    return tabla.set_axis(pd.Index(tabla.index.astype(object), name=None)).T
 
-    sleep(5)
+#Tablas de resultado que se muestran y exportan con la fila "Total" (ver agregar_total)
+TABLAS_CON_TOTAL = ['presupuesto_produccion', 'produccion', 'inventario_inicial', 'inventario_final']
 
-    if exportar:
-        return unidades_antes_impuestos
+def agregar_total(tabla: pd.DataFrame) -> pd.DataFrame:
+    """Agrega la fila "Total" a una tabla con un producto por fila, para mostrarla o exportarla.
 
-def unidad_despues_de_impuestos_normal(exportar: bool = False) -> None | float:
-    """Calcula las unidades a vender después de impuestos normal.
+    Los totales no se guardan en las tablas de resultado: así un producto puede llamarse "Total"
+    y las tablas se pueden filtrar o sumar sin descontar esa fila. Las columnas se suman en
+    int64 o float64 aunque la tabla esté compacta.
 
-        Args:
-            exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
-        Returns:
-            None: Si no se especifica que se va a exportar.
-            float: Unidades a vender después de impuestos.
+    Args:
+        tabla (pd.DataFrame): Tabla con un producto por fila, larga compacta o no.
+
+    Returns:
+        pd.DataFrame: Copia de la tabla con la fila "Total" al final, en el mismo formato que la original.
     """
 
-    mostrar_cuadro(["Escriba el costo fijo total"])
-    costo_fijo_total = pedir_numero("Valor del costo fijo total: ", 0)
+    total = tabla.astype({columna: tipo_sin_compactar(tipo) for columna, tipo in tabla.dtypes.items()}).sum()
+    con_total = pd.concat([tabla, total.to_frame('Total').T])
 
-    mostrar_cuadro(["Escriba la utilidad deseada"])
-    utilidad_deseada = pedir_numero("Valor de la utilidad deseada: ", 0)
+    if isinstance(tabla.index, pd.CategoricalIndex):
+        return compactar_tabla(con_total, tabla.index.name)
 
-    mostrar_cuadro(["Escriba el margen de contribución unitario"])
-    margen_contribucion_unitario = pedir_numero("Valor del margen de contribución unitario: ", 0)
+    return con_total.rename_axis(tabla.index.name)
 
-    mostrar_cuadro(["Escriba la tasa impositiva"])
-    tasa_impositiva = pedir_numero("Valor de la tasa impositiva (0 - 100): ", 0, 100) / 100
+def tipo_sin_compactar(tipo):
+    """Regresa el tipo con el que se guardaría una columna sin compactar (int64, float64 o el tipo de sus categorías)."""
 
-    unidades_despues_impuestos = (
-        (costo_fijo_total + (utilidad_deseada / (1 - tasa_impositiva)))
-        / margen_contribucion_unitario)
+    if isinstance(tipo, pd.CategoricalDtype):
+        return tipo.categories.dtype
 
-    contenido = [f'Unidades a vender después de impuestos: {unidades_despues_impuestos}']
-    mostrar_aviso(contenido, tipo = 'Resultado')
+    match tipo.kind:
+        case 'i' | 'u':
+            return np.int64
+        case 'f':
+            return np.float64
 
-    if exportar:
-        return unidades_despues_impuestos
+    return tipo
 
-def unidad_antes_de_impuestos_multilinea() -> None:
-    """Calcula las unidades antes de impuestos multilínea."""
+def reporte_memoria(tablas: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Compara la memoria de cada tabla compacta y reducida (ver reducir_tabla) con la de la misma tabla sin compactar.
 
-    mostrar_aviso(['Primero deberá determinar la utilidad antes de impuestos normal'], tipo = "Información")
+    La tabla sin compactar tiene las columnas numéricas en int64 o float64 y los nombres (del índice
+    y de las columnas categóricas) sin categorizar. Ambas medidas incluyen el texto de los nombres.
 
-    unidad_antes_impuestos = unidad_antes_de_impuestos_normal(exportar= True)
+    Args:
+        tablas (dict[str, pd.DataFrame]): Tablas por nombre.
 
-    mostrar_aviso(['A continuación, deberá especificar los datos de los productos que tiene.'], tipo = "Información")
+    Returns:
+        pd.DataFrame: Una fila por tabla con las columnas Filas, Columnas, Memoria (KiB),
+            Sin compactar (KiB) y Ahorro (%).
+    """
 
-    contador_productos = 1
-    suma_porcentaje_participacion = 0
+    reporte = {}
 
-    datos = {}
+    for nombre, tabla in tablas.items():
+        sin_compactar = tabla.astype({columna: tipo_sin_compactar(tipo) for columna, tipo in tabla.dtypes.items()})
+        if isinstance(tabla.index, pd.CategoricalIndex):
+            sin_compactar.index = tabla.index.astype(tabla.index.categories.dtype)
 
-    while True:
-        mostrar_cuadro([f'Producto {contador_productos}'])
-        nombre_producto = pedir_campo('Escriba el nombre del producto: ')
-        porcentaje_participacion = pedir_numero('Escriba el porcentaje de participación (0 - 100) (Sin signo): ', 0, 100)
+        memoria = int(reducir_tabla(tabla).memory_usage(deep=True).sum())
+        memoria_sin_compactar = int(sin_compactar.memory_usage(deep=True).sum())
 
-        suma_porcentaje_participacion += porcentaje_participacion
-        if suma_porcentaje_participacion > 100:
-            mostrar_aviso(['La suma del porcentaje superó el 100%'])
+        reporte[nombre] = {
+            'Filas': len(tabla),
+            'Columnas': len(tabla.columns),
+            'Memoria (KiB)': memoria / 1024,
+            'Sin compactar (KiB)': memoria_sin_compactar / 1024,
+            'Ahorro (%)': (1 - memoria / memoria_sin_compactar) * 100 if memoria_sin_compactar else 0.0
+        }
 
-            contenido = [
-                '¿Está seguro de querer continuar?',
-                '(S) - Sí',
-                '(N) - No'
-            ]
+    return pd.DataFrame.from_dict(reporte, orient='index').rename_axis('Tabla')
 
-            mostrar_cuadro(contenido)
+######################## EXPORTACIÓN EN SEGUNDO PLANO ########################
+class TrabajoExportacion:
+    """Exportación a Excel de la cola de exportaciones.
 
-            continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+    Conserva las tablas ya calculadas, por lo que una exportación bloqueada
+    se puede volver a escribir sin repetir el cálculo. Su estado es "en_cola", "escribiendo",
+    "terminada", "sin_cambios" (el archivo ya tenía el resultado), "bloqueada" (el archivo
+    está abierto en otro programa) o "fallida".
+    """
 
-            if continuar == 'N':
-                break
+    __slots__ = ('dataframes', 'nombre_archivo', 'estado', 'error', 'inicio')
 
-        unidad_antes_impuestos_ponderada = unidad_antes_impuestos * (porcentaje_participacion / 100)
-        datos[nombre_producto] = [porcentaje_participacion, unidad_antes_impuestos, unidad_antes_impuestos_ponderada]
+    def __init__(self, dataframes: tuple[pd.DataFrame, ...], nombre_archivo: str):
+        self.dataframes = dataframes
+        self.nombre_archivo = nombre_archivo
+        self.estado = 'en_cola'
+        self.error = None
+        self.inicio = None
 
-        contador_productos += 1
+class ColaExportaciones:
+    """Cola de exportaciones a Excel que un solo hilo escribe en orden, mientras el usuario sigue trabajando.
 
-        contenido = ['¿Quiere añadir otro producto?',
-                     '(S) - Sí',
-                     '(N) - No']
-        mostrar_cuadro(contenido)
+    Un solo hilo evita que dos exportaciones escriban a la vez el mismo archivo. Los avisos de las
+    exportaciones terminadas se recogen desde el hilo principal (ver atender_exportaciones) para
+    no escribir en la terminal mientras el usuario captura datos.
+    """
 
-        continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+    def __init__(self):
+        self.cola = None
+        self.candado = threading.Lock()
+        self.trabajos = []
+        self.hilo = None
 
-        if continuar == 'N':
-            break
+    def agregar(self, trabajo: TrabajoExportacion) -> None:
+        """Agrega una exportación (nueva o bloqueada) al final de la cola e inicia el hilo si hace falta.
 
-    df_datos = pd.DataFrame(datos)
-    df_datos.index = ['% Participación', 'Total Uds', 'Uds. antes de impuestos']
+        Args:
+            trabajo (TrabajoExportacion): Exportación a escribir.
+        """
 
-    exportar_excel(df_datos.T, nombre_archivo="unidades_antes_de_impuestos")
+        with self.candado:
+            trabajo.estado, trabajo.error = 'en_cola', None
 
-    mostrar_cuadro(['Ponderación'])
-    print(tabulate(df_datos.T, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+            if trabajo not in self.trabajos:
+                self.trabajos.append(trabajo)
 
-    sleep(5)
+            #La cola y el hilo se crean con la primera exportación
+            if self.hilo is None:
+                import queue
 
-def unidad_despues_impuestos_multilinea() -> None:
-    """Calcula las unidades después de impuestos multilínea."""
+                self.cola = queue.Queue()
+                self.hilo = threading.Thread(target=self.trabajar, name='exportaciones', daemon=True)
+                self.hilo.start()
 
-    mostrar_aviso(['Primero deberá determinar la utilidad antes de impuestos normal'], tipo = "Información")
+        self.cola.put(trabajo)
 
-    unidad_despues_impuestos = unidad_despues_de_impuestos_normal(exportar= True)
+    def trabajar(self) -> None:
+        """Escribe las exportaciones de la cola una por una (se ejecuta en el hilo de exportaciones)."""
 
-    mostrar_aviso(['A continuación, deberá especificar los datos de los productos que tiene.'], tipo = "Información")
+        while True:
+            trabajo = self.cola.get()
 
-    contador_productos = 1
-    suma_porcentaje_participacion = 0
+            with self.candado:
+                trabajo.estado, trabajo.inicio = 'escribiendo', perf_counter()
 
-    datos = {}
+            try:
+                escrito = escribir_excel(trabajo.dataframes, trabajo.nombre_archivo)
+            except PermissionError:
+                estado, error = 'bloqueada', None
+            except Exception as e:
+                #Cualquier otro error se reporta al usuario sin detener el hilo
+                estado, error = 'fallida', f"{type(e).__name__}: {e}"
+            else:
+                estado, error = ('terminada' if escrito else 'sin_cambios'), None
 
-    while True:
-        mostrar_cuadro([f'Producto {contador_productos}'])
-        nombre_producto = pedir_campo('Escriba el nombre del producto: ')
-        porcentaje_participacion = pedir_numero('Escriba el porcentaje de participación (0 - 100) (Sin signo): ', 0, 100)
+            with self.candado:
+                trabajo.estado, trabajo.error = estado, error
 
-        suma_porcentaje_participacion += porcentaje_participacion
-        if suma_porcentaje_participacion > 100:
-            mostrar_aviso(['La suma del porcentaje superó el 100%'])
+            self.cola.task_done()
 
-            contenido = [
-                '¿Está seguro de querer continuar?',
-                '(S) - Sí',
-                '(N) - No'
-            ]
+    def recoger(self) -> tuple[list[TrabajoExportacion], list[TrabajoExportacion]]:
+        """Saca de la cola las exportaciones terminadas o fallidas.
 
-            mostrar_cuadro(contenido)
+        Returns:
+            tuple[list[TrabajoExportacion], list[TrabajoExportacion]]: Exportaciones terminadas o fallidas
+                (ya no se conservan) y exportaciones bloqueadas (se conservan hasta reintentarlas o descartarlas).
+        """
 
-            continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+        with self.candado:
+            terminadas = [trabajo for trabajo in self.trabajos if trabajo.estado in ('terminada', 'sin_cambios', 'fallida')]
+            bloqueadas = [trabajo for trabajo in self.trabajos if trabajo.estado == 'bloqueada']
+            self.trabajos = [trabajo for trabajo in self.trabajos if trabajo not in terminadas]
 
-            if continuar == 'S':
-                break
+        return terminadas, bloqueadas
 
-        unidad_despues_impuestos_ponderada = unidad_despues_impuestos * (porcentaje_participacion / 100)
-        datos[nombre_producto] = [porcentaje_participacion, unidad_despues_impuestos, unidad_despues_impuestos_ponderada]
+    def descartar(self, trabajo: TrabajoExportacion) -> None:
+        """Olvida una exportación bloqueada."""
 
-        contador_productos += 1
+        with self.candado:
+            if trabajo in self.trabajos:
+                self.trabajos.remove(trabajo)
 
-        contenido = ['¿Quiere añadir otro producto?',
-                     '(S) - Sí',
-                     '(N) - No']
-        mostrar_cuadro(contenido)
+    def pendientes(self) -> int:
+        """Regresa la cantidad de exportaciones en cola o escribiéndose."""
 
-        continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+        with self.candado:
+            return sum(trabajo.estado in ('en_cola', 'escribiendo') for trabajo in self.trabajos)
 
-        if continuar == 'N':
-            break
+    def estado(self) -> None | str:
+        """Describe las exportaciones pendientes en una línea.
 
-    df_datos = pd.DataFrame(datos)
-    df_datos.index = ['% Participación', 'Total Uds', 'Uds. después de impuestos']
+        Returns:
+            None | str: Línea de estado, o None si no hay exportaciones pendientes ni bloqueadas.
+        """
 
-    exportar_excel(df_datos, nombre_archivo="unidades_despues_de_impuestos")
+        with self.candado:
+            escribiendo = [(trabajo.nombre_archivo, perf_counter() - trabajo.inicio) for trabajo in self.trabajos if trabajo.estado == 'escribiendo']
+            en_cola = sum(trabajo.estado == 'en_cola' for trabajo in self.trabajos)
+            bloqueadas = sum(trabajo.estado == 'bloqueada' for trabajo in self.trabajos)
 
-    mostrar_cuadro(['Ponderación'])
-    print(tabulate(df_datos.T, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+        partes = [f'escribiendo {nombre}.xlsx ({segundos:,.0f} s)' for nombre, segundos in escribiendo]
+        if en_cola:
+            partes.append(f'en cola: {en_cola:,}')
+        if bloqueadas:
+            partes.append(f'bloqueadas: {bloqueadas:,}')
 
-    sleep(5)
+        return f"Exportaciones: {', '.join(partes)}" if partes else None
 
-######################## ANÁLISIS COSTO - VOLUMEN - UTILIDAD ########################
+    def esperar(self) -> None:
+        """Espera a que se escriban todas las exportaciones de la cola."""
 
-def analisis_cvu_menu() -> None:
-    """Muestra al usuario un menú para iniciar el análisis Costo - Volumen - Utilidad."""
+        if self.cola is not None:
+            self.cola.join()
 
-    titulo = 'Análisis Costo - Volumen - Utilidad'
-    subtitulo = '¿Qué quiere hacer?'
-    contenido = ['(1) - Iniciar Análisis Costo - Volumen - Utilidad',
-                 '(2) - Regresar al menú principal']
+#Cola de exportaciones de la sesión interactiva
+COLA_EXPORTACIONES = ColaExportaciones()
 
-    while True:
-        mostrar_cuadro(contenido, titulo, subtitulo)
-        opcion = pedir_numero(f'{negrita("Escriba el número de la opción que vas a escoger: ")}', 1, 2)
+def exportar_segundo_plano(*dataframes: pd.DataFrame, nombre_archivo: str = "resultado") -> None:
+    """Agrega una exportación a Excel a la cola de exportaciones y regresa de inmediato.
 
-        match opcion:
-            case 1:
-                analisis_cvu()
-            case 2:
-                return
+    El aviso de exportación exitosa (o del error) se muestra al volver a dibujar un menú.
 
-def analisis_cvu() -> None:
-    """Se le muestra una interfaz al usuario para realizar el análisis Costo - Volumen - Utilidad."""
+    Args:
+        *dataframes (Dataframe): Dataframes a exportar. Puede ser uno o muchos.
+        nombre_archivo (str, optional): Nombre del archivo que se guardará. Defaults to "resultado".
+    """
+
+    COLA_EXPORTACIONES.agregar(TrabajoExportacion(dataframes, nombre_archivo))
+
+def atender_exportaciones() -> bool:
+    """Muestra los avisos de las exportaciones terminadas, ofrece reintentar las bloqueadas
+    y muestra el estado de las pendientes. Se llama antes de dibujar cada menú.
+
+    Returns:
+        bool: True si se volvió a encolar alguna exportación bloqueada.
+    """
+
+    terminadas, bloqueadas = COLA_EXPORTACIONES.recoger()
+
+    for trabajo in terminadas:
+        match trabajo.estado:
+            case 'terminada':
+                mostrar_aviso([f'Archivo exportado exitosamente a {trabajo.nombre_archivo}.xlsx'], tipo = "Información")
+            case 'sin_cambios':
+                mostrar_aviso([f'El archivo {trabajo.nombre_archivo}.xlsx ya tiene este resultado, no se volvió a escribir'], tipo = "Información")
+            case 'fallida':
+                mostrar_aviso([f'No se pudo exportar {trabajo.nombre_archivo}.xlsx', trabajo.error])
+
+    reintentadas = False
+
+    for trabajo in bloqueadas:
+        titulo = f'El archivo {trabajo.nombre_archivo}.xlsx está abierto'
+        contenido = [
+            'Ciérrelo y escoja reintentar; no se repite el cálculo',
+            '(R) - Reintentar',
+            '(D) - Descartar la exportación',
+            '(Enter) - Decidir después'
+        ]
+        mostrar_cuadro(contenido, titulo)
+
+        match input(f"{negrita('Respuesta: ')}").strip().capitalize():
+            case 'R':
+                COLA_EXPORTACIONES.agregar(trabajo)
+                reintentadas = True
+            case 'D':
+                COLA_EXPORTACIONES.descartar(trabajo)
+
+    estado = COLA_EXPORTACIONES.estado()
+    if estado:
+        print(estado)
+
+    return reintentadas
+
+def terminar_exportaciones() -> None:
+    """Espera las exportaciones pendientes antes de cerrar el programa, ofreciendo reintentar las bloqueadas."""
+
+    while True:
+        pendientes = COLA_EXPORTACIONES.pendientes()
+        if pendientes:
+            print(f"Esperando a que terminen las exportaciones pendientes ({pendientes:,})...")
+            COLA_EXPORTACIONES.esperar()
+
+        if not atender_exportaciones():
+            return
+
+######################## CACHÉ DE RESULTADOS ########################
+class NoCacheable(TypeError):
+    """Excepción usada cuando una entrada no se puede convertir en huella."""
+    pass
+
+def agregar_huella(huella, valor) -> None:
+    """Agrega un valor normalizado a una huella sha256.
+
+    Los números enteros y decimales con el mismo valor dan la misma huella; los enteros que un decimal
+    no representa exactamente (como 2**53 + 1) se agregan con todas sus cifras. Las tablas de pandas
+    se resumen con hash_pandas_object en lugar de convertirse a texto.
+
+    Args:
+        huella (hashlib._Hash): Huella a la que se agrega el valor.
+        valor: Valor a agregar.
+
+    Raises:
+        NoCacheable: Si el tipo del valor no se puede convertir en huella.
+    """
+
+    match valor:
+        case None | bool() | str() | bytes():
+            huella.update(f"{type(valor).__name__}:{valor!r};".encode())
+        case int() | float():
+            try:
+                decimal = float(valor)
+            except OverflowError:
+                decimal = None
+
+            if decimal == valor:
+                huella.update(f"numero:{decimal!r};".encode())
+            else:
+                huella.update(f"entero:{valor};".encode())
+        case dict():
+            huella.update(b"{")
+            for llave, contenido in valor.items():
+                agregar_huella(huella, llave)
+                agregar_huella(huella, contenido)
+            huella.update(b"}")
+        case list() | tuple():
+            huella.update(b"[")
+            for contenido in valor:
+                agregar_huella(huella, contenido)
+            huella.update(b"]")
+        case _ if isinstance(valor, pd.DataFrame):
+            huella.update(b"tabla")
+            agregar_huella(huella, [str(columna) for columna in valor.columns])
+            agregar_huella(huella, [str(tipo) for tipo in valor.dtypes])
+            huella.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        case _ if isinstance(valor, pd.Series):
+            huella.update(b"serie")
+            agregar_huella(huella, [str(valor.name), str(valor.dtype)])
+            huella.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        case _ if isinstance(valor, np.ndarray):
+            huella.update(f"arreglo:{valor.dtype.str}:{valor.shape};".encode())
+            huella.update(np.ascontiguousarray(valor).tobytes())
+        case _ if isinstance(valor, np.generic):
+            agregar_huella(huella, valor.item())
+        case _:
+            raise NoCacheable(f"No se puede usar {type(valor).__name__} como entrada de la caché")
+
+def tamano_estimado(valor) -> int:
+    """Estima, sin serializarlo, cuántos bytes ocupan los datos de un resultado.
+
+    Sólo cuenta los datos de las tablas y arreglos (sin el texto de las columnas de objetos),
+    por lo que nunca es mayor que el resultado serializado.
+
+    Args:
+        valor: Resultado.
+
+    Returns:
+        int: Tamaño estimado, en bytes.
+    """
+
+    match valor:
+        case dict():
+            return sum(tamano_estimado(contenido) for contenido in valor.values())
+        case list() | tuple():
+            return sum(tamano_estimado(contenido) for contenido in valor)
+        case _ if isinstance(valor, pd.DataFrame):
+            return int(valor.memory_usage(index=True, deep=False).sum())
+        case _ if isinstance(valor, pd.Series):
+            return int(valor.memory_usage(index=True, deep=False))
+        case _ if isinstance(valor, np.ndarray):
+            return valor.nbytes
+
+    return 0
+
+def clave_contenido(*partes) -> str:
+    """Calcula la clave sha256 de un conjunto de valores.
+
+    Args:
+        *partes: Valores que forman la clave.
+
+    Raises:
+        NoCacheable: Si algún valor no se puede convertir en huella.
+
+    Returns:
+        str: Clave en hexadecimal.
+    """
+
+    import hashlib
+
+    huella = hashlib.sha256()
+    agregar_huella(huella, list(partes))
+
+    return huella.hexdigest()
+
+class CacheResultados:
+    """Caché de resultados por contenido, con un nivel en memoria y uno opcional en disco.
+
+    Los resultados se guardan serializados con pickle, por lo que cada acierto regresa una copia
+    que se puede modificar sin alterar la caché. Ambos niveles desalojan primero lo usado hace más tiempo
+    cuando se pasan de su límite de tamaño. También registra las exportaciones para no volver a escribir
+    un archivo que ya tiene el mismo contenido.
+    """
+
+    def __init__(self, limite_memoria: int = 256 * 1024 ** 2, carpeta: str = None, limite_disco: int = 1024 ** 3):
+        """Crea la caché.
+
+        Args:
+            limite_memoria (int, optional): Tamaño máximo del nivel en memoria, en bytes. Defaults to 256 MiB.
+            carpeta (str, optional): Carpeta del nivel en disco, o None para no usarlo. Defaults to None.
+            limite_disco (int, optional): Tamaño máximo del nivel en disco, en bytes. Defaults to 1 GiB.
+        """
+
+        self.limite_memoria = limite_memoria
+        self.memoria = OrderedDict()
+        self.tamano_memoria = 0
+        #El servicio HTTP calcula en varios hilos, que comparten el nivel en memoria
+        self.candado = threading.Lock()
+        self.carpeta = None
+        self.limite_disco = limite_disco
+        self.exportaciones = {}
+
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.exportaciones_reutilizadas = 0
+
+        if carpeta:
+            self.usar_disco(carpeta, limite_disco)
+
+    def usar_disco(self, carpeta: str, limite_disco: int = None) -> None:
+        """Activa el nivel en disco.
+
+        Args:
+            carpeta (str): Carpeta donde se guardan los resultados.
+            limite_disco (int, optional): Tamaño máximo, en bytes. Defaults to None (no cambia).
+        """
+
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+
+        if limite_disco is not None:
+            self.limite_disco = limite_disco
+
+        ruta_exportaciones = os.path.join(carpeta, 'exportaciones.json')
+        if os.path.exists(ruta_exportaciones):
+            with open(ruta_exportaciones, encoding='utf-8') as archivo:
+                registros = {ruta: tuple(datos) for ruta, datos in json.load(archivo).items()}
+
+            with self.candado:
+                self.exportaciones.update(registros)
+
+    def obtener(self, clave: str) -> tuple[bool, object]:
+        """Busca un resultado en memoria y después en disco.
+
+        Args:
+            clave (str): Clave del resultado.
+
+        Returns:
+            tuple[bool, object]: True y el resultado si se encontró; False y None si no.
+        """
+
+        import pickle
+
+        with self.candado:
+            datos = self.memoria.get(clave)
+            if datos is not None:
+                self.memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+
+        if datos is not None:
+            return True, pickle.loads(datos)
+
+        if self.carpeta:
+            ruta = os.path.join(self.carpeta, f'{clave}.pkl')
+
+            try:
+                with open(ruta, 'rb') as archivo:
+                    datos = archivo.read()
+            except FileNotFoundError:
+                pass
+            else:
+                #La fecha de modificación marca el último uso para el desalojo; otro hilo pudo haberlo desalojado ya
+                try:
+                    os.utime(ruta)
+                except FileNotFoundError:
+                    pass
+
+                with self.candado:
+                    self.aciertos_disco += 1
+
+                self.guardar_memoria(clave, datos)
+                return True, pickle.loads(datos)
+
+        with self.candado:
+            self.fallos += 1
+
+        return False, None
+
+    def guardar_memoria(self, clave: str, datos: bytes) -> None:
+        """Guarda un resultado serializado en memoria y desaloja hasta quedar dentro del límite."""
+
+        if len(datos) > self.limite_memoria:
+            return
+
+        with self.candado:
+            self.tamano_memoria += len(datos) - len(self.memoria.pop(clave, b''))
+            self.memoria[clave] = datos
+
+            while self.tamano_memoria > self.limite_memoria:
+                _, desalojado = self.memoria.popitem(last=False)
+                self.tamano_memoria -= len(desalojado)
+                self.desalojos += 1
+
+    def guardar(self, clave: str, resultado) -> None:
+        """Guarda un resultado en ambos niveles.
+
+        Args:
+            clave (str): Clave del resultado.
+            resultado: Resultado a guardar; debe poder serializarse con pickle.
+        """
+
+        import pickle
+        import tempfile
+
+        #Los resultados que no caben en ningún nivel se descartan antes de serializarlos
+        limite = max(self.limite_memoria, self.limite_disco if self.carpeta else 0)
+        if tamano_estimado(resultado) > limite:
+            return
+
+        datos = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        self.guardar_memoria(clave, datos)
+
+        if self.carpeta and len(datos) <= self.limite_disco:
+            #Se escribe a un archivo temporal propio de esta escritura para que otro hilo o proceso
+            #nunca lea un resultado a medias ni reemplace el temporal de otro
+            descriptor, temporal = tempfile.mkstemp(prefix=f'{clave}.', suffix='.tmp', dir=self.carpeta)
+
+            try:
+                with os.fdopen(descriptor, 'wb') as archivo:
+                    archivo.write(datos)
+                os.replace(temporal, os.path.join(self.carpeta, f'{clave}.pkl'))
+            except BaseException:
+                os.remove(temporal)
+                raise
+
+            self.limpiar_disco()
+
+    def limpiar_disco(self) -> None:
+        """Desaloja los resultados del disco usados hace más tiempo hasta quedar dentro del límite.
+
+        Otros hilos o procesos pueden desalojar los mismos archivos al mismo tiempo, así que
+        los archivos que desaparecen a medio camino simplemente se omiten.
+        """
+
+        archivos = []
+        for entrada in os.scandir(self.carpeta):
+            if not entrada.name.endswith('.pkl'):
+                continue
+
+            try:
+                estado = entrada.stat()
+            except FileNotFoundError:
+                continue
+
+            archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+
+        tamano = sum(tamano_archivo for _, tamano_archivo, _ in archivos)
+
+        for _, tamano_archivo, ruta in sorted(archivos):
+            if tamano <= self.limite_disco:
+                break
+
+            tamano -= tamano_archivo
+
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                continue
+
+            with self.candado:
+                self.desalojos += 1
+
+    def exportacion_vigente(self, rutas: list[str], clave: str) -> bool:
+        """Indica si los archivos ya se exportaron con el mismo contenido y no se han modificado desde entonces.
+
+        Args:
+            rutas (list[str]): Rutas de los archivos.
+            clave (str): Clave del contenido a exportar.
+
+        Returns:
+            bool: True si se pueden reutilizar todos los archivos.
+        """
+
+        for ruta in rutas:
+            with self.candado:
+                registro = self.exportaciones.get(os.path.abspath(ruta))
+
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                return False
+
+            if registro != (clave, estado.st_mtime_ns, estado.st_size):
+                return False
+
+        with self.candado:
+            self.exportaciones_reutilizadas += 1
+
+        return True
+
+    def registrar_exportacion(self, rutas: list[str], clave: str) -> None:
+        """Registra el contenido de los archivos recién exportados.
+
+        Args:
+            rutas (list[str]): Rutas de los archivos.
+            clave (str): Clave del contenido exportado.
+        """
+
+        registros = {}
+        for ruta in rutas:
+            estado = os.stat(ruta)
+            registros[os.path.abspath(ruta)] = (clave, estado.st_mtime_ns, estado.st_size)
+
+        #El registro se escribe con el candado tomado para que otro hilo no lo modifique mientras se recorre
+        with self.candado:
+            self.exportaciones.update(registros)
+
+            if self.carpeta:
+                with open(os.path.join(self.carpeta, 'exportaciones.json'), 'w', encoding='utf-8') as archivo:
+                    json.dump(self.exportaciones, archivo)
+
+    def estadisticas(self) -> dict:
+        """Regresa los contadores de la caché.
+
+        Returns:
+            dict: Aciertos en memoria y en disco, fallos, tasa de aciertos (0 - 100), desalojos,
+                exportaciones reutilizadas y tamaño del nivel en memoria (en bytes).
+        """
+
+        with self.candado:
+            aciertos = self.aciertos_memoria + self.aciertos_disco
+            consultas = aciertos + self.fallos
+
+            return {
+                'aciertos_memoria': self.aciertos_memoria,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'tasa_aciertos': aciertos / consultas * 100 if consultas else 0.0,
+                'desalojos': self.desalojos,
+                'exportaciones_reutilizadas': self.exportaciones_reutilizadas,
+                'tamano_memoria': self.tamano_memoria
+            }
+
+#Caché de la sesión; el nivel en disco se activa con --cache-disco
+CACHE_RESULTADOS = CacheResultados()
+
+def memoizar(funcion):
+    """Decorador que guarda en CACHE_RESULTADOS el resultado de un cálculo según el contenido de sus entradas.
+
+    La clave incluye el nombre de la función y sus argumentos ya asociados a los parámetros
+    (con los valores por defecto), por lo que pasar un mismo valor por posición o por nombre da la misma clave.
+    Si alguna entrada no se puede convertir en huella, el cálculo se hace sin caché.
+
+    Args:
+        funcion (Callable): Cálculo a memoizar; debe ser determinista.
+
+    Returns:
+        Callable: Función con caché.
+    """
+
+    firma = None
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        nonlocal firma
+
+        if firma is None:
+            import inspect
+            firma = inspect.signature(funcion)
+
+        argumentos = firma.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+
+        try:
+            clave = clave_contenido(funcion.__qualname__, dict(argumentos.arguments))
+        except NoCacheable:
+            return funcion(*args, **kwargs)
+
+        encontrado, resultado = CACHE_RESULTADOS.obtener(clave)
+        if encontrado:
+            return resultado
+
+        resultado = funcion(*args, **kwargs)
+        CACHE_RESULTADOS.guardar(clave, resultado)
+
+        return resultado
+
+    return envoltura
+
+def estadisticas_cache() -> dict:
+    """Regresa los contadores de la caché de resultados de la sesión (ver CacheResultados.estadisticas)."""
+
+    return CACHE_RESULTADOS.estadisticas()
+
+######################## DINERO EN PUNTO FIJO ########################
+#Unidades mínimas por peso de la aritmética exacta (100 = centavos)
+ESCALA_DINERO = 100
+
+#Reglas de redondeo de la aritmética exacta:
+#mitad_arriba (la mitad se aleja del cero), mitad_par (la mitad va al par), truncar (hacia el cero), piso y techo
+REDONDEOS = ('mitad_arriba', 'mitad_par', 'truncar', 'piso', 'techo')
+REDONDEO_DINERO = 'mitad_arriba'
+
+#Las cantidades que no son dinero (unidades, porcentajes) se toman como racionales con este denominador,
+#es decir, con hasta 6 decimales
+PRECISION_CANTIDAD = 10 ** 6
+
+#Decimales con los que se toman los flotantes antes de redondearlos; eliminan el error de representación
+#binaria (1.005 se guarda como 1.00499999999999989...) sin cambiar los valores que se escribieron
+DECIMALES_CAPTURA = 6
+
+#Máximo de un int64; por encima, los cálculos exactos usan enteros de Python
+LIMITE_INT64 = 2 ** 63 - 1
+
+#El cociente estimado en flotante sólo se usa si es menor a LIMITE_ESTIMADO (así su error es menor a 1)
+#y si el divisor deja el residuo corregido dentro de un int64
+LIMITE_ESTIMADO = 2 ** 50
+LIMITE_DIVISOR = 2 ** 60
+
+#Aritmética de las calculadoras en la sesión; con "escala" en None se usan flotantes
+ARITMETICA_DINERO = {'escala': None, 'redondeo': REDONDEO_DINERO}
+
+def validar_aritmetica(escala: int, redondeo: str) -> None:
+    """Valida la escala y la regla de redondeo de la aritmética exacta.
+
+    Args:
+        escala (int): Unidades mínimas por peso; debe ser una potencia de 10.
+        redondeo (str): Regla de REDONDEOS.
+
+    Raises:
+        ValueError: Si la escala no es una potencia de 10 o la regla no existe.
+    """
+
+    if not isinstance(escala, int) or escala < 1 or 10 ** (len(str(escala)) - 1) != escala:
+        raise ValueError(f"La escala del dinero debe ser una potencia de 10, no {escala}")
+
+    if redondeo not in REDONDEOS:
+        raise ValueError(f"Regla de redondeo desconocida: {redondeo} (opciones: {', '.join(REDONDEOS)})")
+
+def aplicar_redondeo(cociente: np.ndarray, residuo: np.ndarray, divisor: np.ndarray, negativo: np.ndarray, redondeo: str) -> np.ndarray:
+    """Redondea el cociente entero por abajo de una división según una regla, a partir de su residuo.
+
+    Args:
+        cociente (np.ndarray): Piso del cociente.
+        residuo (np.ndarray): Residuo del piso, entre 0 y divisor - 1.
+        divisor (np.ndarray): Divisor, positivo.
+        negativo (np.ndarray): True donde el cociente exacto es negativo.
+        redondeo (str): Regla de REDONDEOS.
+
+    Raises:
+        ValueError: Si la regla no existe.
+
+    Returns:
+        np.ndarray: Cociente redondeado.
+    """
+
+    #Comparar residuo con divisor - residuo evita calcular 2 * residuo, que podría desbordarse
+    faltante = divisor - residuo
+
+    match redondeo:
+        case 'piso':
+            return cociente
+        case 'techo':
+            return cociente + (residuo > 0)
+        case 'truncar':
+            return cociente + ((residuo > 0) & negativo)
+        case 'mitad_arriba':
+            #En los negativos, el piso de una mitad exacta ya se aleja del cero
+            return cociente + ((residuo > faltante) | ((residuo == faltante) & ~negativo))
+        case 'mitad_par':
+            return cociente + ((residuo > faltante) | ((residuo == faltante) & (cociente % 2 == 1)))
+        case _:
+            raise ValueError(f"Regla de redondeo desconocida: {redondeo} (opciones: {', '.join(REDONDEOS)})")
+
+def multiplicar_dividir(a, b, divisor, redondeo: str = REDONDEO_DINERO) -> np.ndarray:
+    """Calcula a * b / divisor con enteros, redondeando una sola vez al final con una regla explícita.
+
+    El cociente se estima en flotante; sólo los elementos cuyo estimado queda tan cerca de un punto
+    de redondeo que el error del flotante podría cambiar el resultado se recalculan con el residuo
+    exacto (ver dividir_exacto).
+
+    Args:
+        a (int | np.ndarray): Enteros.
+        b (int | np.ndarray): Enteros.
+        divisor (int | np.ndarray): Enteros distintos de cero.
+        redondeo (str, optional): Regla de REDONDEOS. Defaults to REDONDEO_DINERO.
+
+    Raises:
+        ZeroDivisionError: Si algún divisor es cero.
+        OverflowError: Si algún resultado no cabe en un int64.
+
+    Returns:
+        np.ndarray: Resultados int64, con la forma de las entradas combinadas.
+    """
+
+    a, b, divisor = np.asarray(a), np.asarray(b), np.asarray(divisor)
+    forma = np.broadcast_shapes(a.shape, b.shape, divisor.shape)
+
+    if (divisor == 0).any():
+        raise ZeroDivisionError("División entre cero en un cálculo exacto")
+
+    if 0 in forma:
+        return np.zeros(forma, dtype=np.int64)
+
+    #atleast_1d evita las advertencias de desbordamiento de los escalares de numpy
+    a, b, divisor = (np.atleast_1d(valores) for valores in (a, b, divisor))
+
+    if a.dtype.kind == b.dtype.kind == divisor.dtype.kind == 'i':
+        a, b, divisor = (valores.astype(np.int64, copy=False) for valores in (a, b, divisor))
+
+        estimado = np.multiply(a, b, dtype=np.float64)
+        if estimado.shape == forma:
+            estimado /= divisor
+        else:
+            estimado = estimado / divisor
+        maximo = max(estimado.max(), -estimado.min())
+
+        if maximo < LIMITE_ESTIMADO:
+            #El error relativo del estimado es menor a 2 ** -51; con el doble de margen,
+            #sólo los estimados a esa distancia de un punto de redondeo son dudosos
+            tolerancia = maximo * 2.0 ** -50
+            cercano = np.rint(estimado)
+
+            if redondeo.startswith('mitad'):
+                #Lejos de la mitad, ambas reglas coinciden con el entero más cercano
+                cociente = cercano.astype(np.int64)
+                desviacion = np.abs(np.subtract(estimado, cercano, out=cercano), out=cercano)
+                dudosos = desviacion >= 0.5 - tolerancia
+            else:
+                desviacion = np.abs(estimado - cercano, out=cercano)
+                dudosos = desviacion <= tolerancia
+                cociente = redondear_flotante(estimado, redondeo).astype(np.int64)
+
+            if dudosos.any():
+                cociente[dudosos] = dividir_exacto(*(np.broadcast_to(valores, cociente.shape)[dudosos] for valores in (a, b, divisor)),
+                                                   redondeo)
+
+            return cociente.reshape(forma)
+
+    return dividir_exacto(a, b, divisor, redondeo).reshape(forma)
+
+def dividir_exacto(a: np.ndarray, b: np.ndarray, divisor: np.ndarray, redondeo: str) -> np.ndarray:
+    """Calcula a * b / divisor redondeado, a partir del residuo exacto de la división.
+
+    El residuo se calcula con aritmética de 64 bits: el producto a * b puede desbordarse, pero el residuo
+    es pequeño y la aritmética modular lo recupera sin error. Si el cociente no cabe en LIMITE_ESTIMADO
+    o alguna entrada no cabe en un int64, el cálculo se hace con enteros de Python (exacto, pero más lento).
+
+    Args:
+        a (np.ndarray): Enteros, con al menos una dimensión.
+        b (np.ndarray): Enteros, con al menos una dimensión.
+        divisor (np.ndarray): Enteros distintos de cero, con al menos una dimensión.
+        redondeo (str): Regla de REDONDEOS.
+
+    Raises:
+        OverflowError: Si algún resultado no cabe en un int64.
+
+    Returns:
+        np.ndarray: Resultados int64.
+    """
+
+    if a.dtype.kind == b.dtype.kind == divisor.dtype.kind == 'i':
+        #Con el divisor positivo, el residuo del piso queda entre 0 y divisor - 1
+        if (divisor < 0).any():
+            a = np.where(divisor < 0, -a, a)
+            divisor = np.abs(divisor)
+
+        estimado = np.multiply(a, b, dtype=np.float64) / divisor
+        negativo = estimado < 0
+        np.floor(estimado, out=estimado)
+
+        if max(estimado.max(), -estimado.min()) < LIMITE_ESTIMADO and divisor.max() < LIMITE_DIVISOR:
+            #Con el cociente dentro de LIMITE_ESTIMADO, el estimado difiere a lo más en 1
+            cociente = estimado.astype(np.int64)
+            residuo = a * b - cociente * divisor
+
+            correccion = (residuo >= divisor).view(np.int8) - (residuo < 0)
+            cociente += correccion
+            residuo -= correccion * divisor
+
+            return aplicar_redondeo(cociente, residuo, divisor, negativo, redondeo)
+
+    #Enteros de Python, sin límite de tamaño
+    a, b, divisor = a.astype(object), b.astype(object), divisor.astype(object)
+    negativo = (a < 0) ^ (b < 0) ^ (divisor < 0)
+    a = np.where(divisor < 0, -a, a)
+    divisor = np.abs(divisor)
+    producto = a * b
+    cociente = producto // divisor
+    residuo = producto - cociente * divisor
+
+    return entero_int64(aplicar_redondeo(cociente, residuo, divisor, negativo, redondeo))
+
+def entero_int64(valores: np.ndarray) -> np.ndarray:
+    """Convierte un arreglo de enteros de Python a int64.
+
+    Raises:
+        OverflowError: Si algún valor no cabe en un int64.
+    """
+
+    if valores.size and max(abs(valor) for valor in valores.flat) > LIMITE_INT64:
+        raise OverflowError("El resultado no cabe en un entero de 64 bits")
+
+    return valores.astype(np.int64)
+
+def sumar_int64(a: np.ndarray, b: np.ndarray, restar: bool = False) -> np.ndarray:
+    """Suma (o resta) enteros int64 sin que un desbordamiento pase desapercibido.
+
+    Raises:
+        OverflowError: Si algún resultado no cabe en un int64 (entre -LIMITE_INT64 y LIMITE_INT64).
+    """
+
+    with np.errstate(over='ignore'):
+        resultado = np.subtract(a, b) if restar else np.add(a, b)
+
+    #Al desbordarse, el resultado tiene el signo contrario al de a y al de b (en la resta, al de -b)
+    desbordados = (a ^ resultado) & ((a ^ b) if restar else (b ^ resultado))
+
+    if np.any(desbordados < 0) or np.any(resultado == -LIMITE_INT64 - 1):
+        raise OverflowError("El resultado no cabe en un entero de 64 bits")
+
+    return resultado
+
+def redondear_flotante(valores: np.ndarray, redondeo: str) -> np.ndarray:
+    """Redondea flotantes a enteros (todavía en flotante) según una regla, en el mismo arreglo.
+
+    Args:
+        valores (np.ndarray): Flotantes; se modifican.
+        redondeo (str): Regla de REDONDEOS.
+
+    Raises:
+        ValueError: Si la regla no existe.
+
+    Returns:
+        np.ndarray: El mismo arreglo, redondeado.
+    """
+
+    match redondeo:
+        case 'piso':
+            return np.floor(valores, out=valores)
+        case 'techo':
+            return np.ceil(valores, out=valores)
+        case 'truncar':
+            return np.trunc(valores, out=valores)
+        case 'mitad_arriba':
+            valores += np.copysign(0.5, valores)
+            return np.trunc(valores, out=valores)
+        case 'mitad_par':
+            return np.rint(valores, out=valores)
+        case _:
+            raise ValueError(f"Regla de redondeo desconocida: {redondeo} (opciones: {', '.join(REDONDEOS)})")
+
+def a_enteros(cantidades, factor: int, redondeo: str = REDONDEO_DINERO) -> np.ndarray:
+    """Convierte cantidades a enteros int64 de cantidad * factor, con una regla de redondeo explícita.
+
+    Los flotantes se toman con DECIMALES_CAPTURA decimales antes de redondear, por lo que 1.005 pesos
+    son 100.5 centavos (y no 100.49999...).
+
+    Args:
+        cantidades (float | np.ndarray | pd.Series): Cantidades.
+        factor (int): Factor entero (la escala del dinero o PRECISION_CANTIDAD).
+        redondeo (str, optional): Regla de REDONDEOS. Defaults to REDONDEO_DINERO.
+
+    Raises:
+        ValueError: Si hay cantidades NaN o infinitas, o la regla no existe.
+        OverflowError: Si alguna cantidad no cabe en un int64.
+
+    Returns:
+        np.ndarray: Enteros int64.
+    """
+
+    valores = np.asarray(cantidades)
+
+    if valores.dtype.kind in 'iub':
+        if maximo_absoluto(valores) > LIMITE_INT64 // factor:
+            raise OverflowError("La cantidad no cabe en un entero de 64 bits")
+        return valores.astype(np.int64) * factor
+
+    #atleast_1d permite operar en el mismo arreglo también con un escalar; los flotantes de 64 bits
+    #se multiplican sin una copia previa
+    enteros = np.atleast_1d(valores)
+    if enteros.dtype != np.float64:
+        enteros = enteros.astype(np.float64)
+    enteros = enteros * factor
+    np.round(enteros, DECIMALES_CAPTURA, out=enteros)
+
+    #Los límites se revisan antes de redondear: a partir de 2 ** 52 los flotantes ya son enteros
+    #y el redondeo no los cambia, así que tampoco puede llevarlos fuera de un int64
+    minimo = 0.0
+    if enteros.size:
+        minimo, maximo = enteros.min(), enteros.max()
+
+        if not (np.isfinite(minimo) and np.isfinite(maximo)):
+            raise ValueError("Las cantidades de un cálculo exacto no pueden ser NaN ni infinitas")
+        if minimo <= -2.0 ** 63 or maximo >= 2.0 ** 63:
+            raise OverflowError("La cantidad no cabe en un entero de 64 bits")
+
+    if redondeo == 'mitad_arriba' and minimo >= 0:
+        #Sin negativos (el caso común de precios y costos), la mitad hacia arriba es el piso de valor + 0.5
+        enteros += 0.5
+        np.floor(enteros, out=enteros)
+    else:
+        redondear_flotante(enteros, redondeo)
+
+    return enteros.astype(np.int64).reshape(valores.shape)
+
+def cantidades_racionales(cantidades) -> np.ndarray:
+    """Convierte cantidades que no son dinero (unidades, porcentajes) a numeradores sobre PRECISION_CANTIDAD."""
+
+    return a_enteros(cantidades, PRECISION_CANTIDAD, 'mitad_par')
+
+def maximo_absoluto(valores: np.ndarray) -> int:
+    """Regresa el mayor valor absoluto de un arreglo de enteros (0 si está vacío), sin crear arreglos intermedios."""
+
+    if valores.size == 0:
+        return 0
+
+    return max(int(valores.max()), -int(valores.min()))
+
+def suma_exacta(valores: np.ndarray) -> int:
+    """Suma enteros sin desbordamiento; regresa un entero de Python."""
+
+    valores = np.asarray(valores)
+    if valores.size == 0:
+        return 0
+
+    if valores.dtype != object and maximo_absoluto(valores) * valores.size <= LIMITE_INT64:
+        return int(valores.sum())
+
+    return int(sum(int(valor) for valor in valores.flat))
+
+def producto_exacto(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Multiplica enteros elemento a elemento: en int64 si el resultado cabe y, si no, con enteros de Python."""
+
+    a, b = np.asarray(a), np.asarray(b)
+
+    if maximo_absoluto(a) * maximo_absoluto(b) <= LIMITE_INT64:
+        return a.astype(np.int64) * b.astype(np.int64)
+
+    return a.astype(object) * b.astype(object)
+
+class Dinero:
+    """Cantidades de dinero exactas: un arreglo int64 en la unidad mínima de una escala (centavos por defecto).
+
+    Las sumas y restas son exactas y lanzan OverflowError si se salen de un int64; las multiplicaciones
+    y ponderaciones redondean una sola vez, al final, con una regla explícita. Convertir a flotante (a_flotante) sólo se hace para mostrar o exportar.
+    """
+
+    __slots__ = ('minimos', 'escala')
+
+    def __init__(self, minimos, escala: int = ESCALA_DINERO):
+        """Crea el dinero a partir de enteros que ya están en la unidad mínima.
+
+        Args:
+            minimos (int | np.ndarray): Cantidades en la unidad mínima (por ejemplo, centavos).
+            escala (int, optional): Unidades mínimas por peso. Defaults to ESCALA_DINERO.
+        """
+
+        self.minimos = np.asarray(minimos, dtype=np.int64)
+        self.escala = escala
+
+    @classmethod
+    def desde(cls, cantidades, escala: int = ESCALA_DINERO, redondeo: str = REDONDEO_DINERO) -> Dinero:
+        """Convierte cantidades en pesos (flotantes o enteros) a dinero exacto.
+
+        Args:
+            cantidades (float | np.ndarray | pd.Series): Cantidades en pesos.
+            escala (int, optional): Unidades mínimas por peso. Defaults to ESCALA_DINERO.
+            redondeo (str, optional): Regla para las fracciones de la unidad mínima. Defaults to REDONDEO_DINERO.
+
+        Returns:
+            Dinero: Cantidades exactas.
+        """
+
+        return cls(a_enteros(cantidades, escala, redondeo), escala)
+
+    def compatibles(self, otro: Dinero) -> np.ndarray:
+        """Regresa las unidades mínimas de otro dinero, validando que tenga la misma escala.
+
+        Raises:
+            TypeError: Si el otro valor no es Dinero.
+            ValueError: Si las escalas son distintas.
+        """
+
+        if not isinstance(otro, Dinero):
+            raise TypeError(f"No se puede operar Dinero con {type(otro).__name__}")
+
+        if otro.escala != self.escala:
+            raise ValueError(f"Escalas distintas: {self.escala} y {otro.escala}")
+
+        return otro.minimos
+
+    def __add__(self, otro: Dinero) -> Dinero:
+        return Dinero(sumar_int64(self.minimos, self.compatibles(otro)), self.escala)
+
+    def __sub__(self, otro: Dinero) -> Dinero:
+        return Dinero(sumar_int64(self.minimos, self.compatibles(otro), restar=True), self.escala)
+
+    def __neg__(self) -> Dinero:
+        return Dinero(sumar_int64(np.zeros_like(self.minimos), self.minimos, restar=True), self.escala)
+
+    def __eq__(self, otro) -> bool:
+        return isinstance(otro, Dinero) and otro.escala == self.escala and np.array_equal(otro.minimos, self.minimos)
+
+    def __len__(self) -> int:
+        return len(self.minimos)
+
+    def __getitem__(self, posicion) -> Dinero:
+        return Dinero(self.minimos[posicion], self.escala)
+
+    def ponderar(self, numeradores, denominador=1, redondeo: str = REDONDEO_DINERO) -> Dinero:
+        """Multiplica por la fracción exacta numeradores / denominador, redondeando una sola vez.
+
+        Args:
+            numeradores (int | np.ndarray): Numeradores enteros.
+            denominador (int | np.ndarray, optional): Denominadores enteros. Defaults to 1.
+            redondeo (str, optional): Regla de REDONDEOS. Defaults to REDONDEO_DINERO.
+
+        Returns:
+            Dinero: Resultado en la misma escala.
+        """
+
+        return Dinero(multiplicar_dividir(self.minimos, numeradores, denominador, redondeo), self.escala)
+
+    def multiplicar(self, cantidades, redondeo: str = REDONDEO_DINERO) -> Dinero:
+        """Multiplica por cantidades (por ejemplo, unidades), tomadas con hasta 6 decimales."""
+
+        cantidades = np.asarray(cantidades)
+
+        #Las cantidades enteras no requieren redondeo
+        if cantidades.dtype.kind in 'iub':
+            producto = producto_exacto(self.minimos, cantidades)
+            return Dinero(entero_int64(producto) if producto.dtype == object else producto, self.escala)
+
+        return self.ponderar(cantidades_racionales(cantidades), PRECISION_CANTIDAD, redondeo)
+
+    def porcentaje(self, porcentajes, redondeo: str = REDONDEO_DINERO) -> Dinero:
+        """Aplica porcentajes (0 - 100), tomados con hasta 6 decimales."""
+
+        return self.ponderar(cantidades_racionales(porcentajes), 100 * PRECISION_CANTIDAD, redondeo)
+
+    def suma(self) -> Dinero:
+        """Suma todas las cantidades sin error de redondeo.
+
+        Raises:
+            OverflowError: Si el total no cabe en un int64.
+        """
+
+        total = suma_exacta(self.minimos)
+        if abs(total) > LIMITE_INT64:
+            raise OverflowError("El total no cabe en un entero de 64 bits")
+
+        return Dinero(total, self.escala)
+
+    def a_flotante(self) -> float | np.ndarray:
+        """Convierte a pesos en flotante, para mostrar o exportar. Cada valor es el flotante más cercano al exacto."""
+
+        flotantes = self.minimos / self.escala
+        return float(flotantes) if flotantes.ndim == 0 else flotantes
+
+    def texto(self) -> str | list[str]:
+        """Da formato exacto a las cantidades (por ejemplo, "-1,234.56"), sin pasar por flotantes."""
+
+        decimales = len(str(self.escala)) - 1
+
+        def formatear(minimos: int) -> str:
+            pesos, fraccion = divmod(abs(minimos), self.escala)
+            signo = '-' if minimos < 0 else ''
+            return f"{signo}{pesos:,}.{fraccion:0{decimales}d}" if decimales else f"{signo}{pesos:,}"
+
+        if self.minimos.ndim == 0:
+            return formatear(int(self.minimos))
+
+        return [formatear(minimos) for minimos in self.minimos.tolist()]
+
+    def __repr__(self) -> str:
+        return f"Dinero({self.texto()!r}, escala={self.escala})"
+
+def a_pesos(minimos: np.ndarray, escala: int) -> float | np.ndarray:
+    """Convierte unidades mínimas exactas a pesos en flotante (un solo redondeo, al flotante más cercano)."""
+
+    return Dinero(minimos, escala).a_flotante()
+
+######################## API DE CÁLCULO ########################
+#Funciones sin entrada ni salida en la terminal, para usar el programa como biblioteca.
+#Los registros usan __slots__ para ocupar poca memoria y crearse rápido; sin pandas.
+#Los campos numéricos pueden ser escalares o columnas (arreglos o pd.Series): las fórmulas sólo operan
+#elemento a elemento, y los calculadores vectorizados las usan sobre las columnas completas.
+class Registro:
+    """Base de los registros de la API de cálculo: comparación, representación y conversión a diccionario."""
+
+    __slots__ = ()
+
+    def como_dict(self) -> dict:
+        """Convierte el registro en un diccionario con un valor por campo."""
+
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __eq__(self, otro) -> bool:
+        return type(self) is type(otro) and all(getattr(self, campo) == getattr(otro, campo) for campo in self.__slots__)
+
+    def __repr__(self) -> str:
+        campos = ', '.join(f'{campo}={getattr(self, campo)!r}' for campo in self.__slots__)
+        return f'{type(self).__name__}({campos})'
+
+class Producto(Registro):
+    """Producto para el punto de equilibrio normal o multilínea."""
+
+    __slots__ = ('nombre', 'precio_venta', 'costo_variable', 'porcentaje_margen_contribucion', 'margen_contribucion')
+
+    def __init__(self, nombre: str, precio_venta: float, costo_variable: float, porcentaje_margen_contribucion: float = 100.0,
+                 margen_contribucion: float = None):
+        """Crea el producto.
+
+        Args:
+            nombre (str): Nombre del producto.
+            precio_venta (float): Precio de venta unitario.
+            costo_variable (float): Costo variable unitario.
+            porcentaje_margen_contribucion (float, optional): Participación en la mezcla (0 - 100). Defaults to 100.0.
+            margen_contribucion (float, optional): Margen de contribución unitario. Defaults to None (precio - costo).
+        """
+
+        self.nombre = nombre
+        self.precio_venta = precio_venta
+        self.costo_variable = costo_variable
+        self.porcentaje_margen_contribucion = porcentaje_margen_contribucion
+        self.margen_contribucion = precio_venta - costo_variable if margen_contribucion is None else margen_contribucion
+
+class ProductoPresupuesto(Registro):
+    """Producto para el presupuesto de ventas y producción."""
+
+    __slots__ = ('nombre', 'pronostico_ventas', 'precio_unitario', 'inventario_final', 'inventario_inicial')
+
+    def __init__(self, nombre: str, pronostico_ventas: float, precio_unitario: float = 1.0, inventario_final: float = 0.0,
+                 inventario_inicial: float = 0.0):
+        self.nombre = nombre
+        self.pronostico_ventas = pronostico_ventas
+        self.precio_unitario = precio_unitario
+        self.inventario_final = inventario_final
+        self.inventario_inicial = inventario_inicial
+
+class Componente(Registro):
+    """Componente (o materia prima) para el presupuesto de necesidades y compras."""
+
+    __slots__ = ('nombre', 'materia_prima_unidad', 'inventario_final', 'inventario_inicial', 'costo_materia_prima')
+
+    def __init__(self, nombre: str, materia_prima_unidad: float, inventario_final: float = 0.0, inventario_inicial: float = 0.0,
+                 costo_materia_prima: float = 0.0):
+        self.nombre = nombre
+        self.materia_prima_unidad = materia_prima_unidad
+        self.inventario_final = inventario_final
+        self.inventario_inicial = inventario_inicial
+        self.costo_materia_prima = costo_materia_prima
+
+class Propuesta(Registro):
+    """Situación actual o propuesta del análisis Costo - Volumen - Utilidad (los campos de CAMPOS_CVU)."""
+
+    __slots__ = ('precio_venta', 'costos_variables', 'costos_fijos', 'ventas')
+
+    def __init__(self, precio_venta: float, costos_variables: float, costos_fijos: float, ventas: float):
+        self.precio_venta = precio_venta
+        self.costos_variables = costos_variables
+        self.costos_fijos = costos_fijos
+        self.ventas = ventas
+
+    @classmethod
+    def desde_campos(cls, campos: dict) -> Propuesta:
+        """Crea la propuesta a partir de un diccionario con los campos de CAMPOS_CVU."""
+
+        return cls(*(campos[campo] for campo in CAMPOS_CVU))
+
+    def campos(self) -> dict:
+        """Convierte la propuesta en un diccionario con los campos de CAMPOS_CVU."""
+
+        return dict(zip(CAMPOS_CVU, (self.precio_venta, self.costos_variables, self.costos_fijos, self.ventas)))
+
+    def ajustar(self, campo: str, ajuste: str, cantidad: float = 0) -> Propuesta:
+        """Crea una nueva propuesta con un campo ajustado (ver ajustar_valor).
+
+        Args:
+            campo (str): Campo a ajustar (uno de __slots__).
+            ajuste (str): Uno de los ajustes de AJUSTES_CVU.
+            cantidad (float, optional): Porcentaje (0 - 100) o cantidad del ajuste. Defaults to 0.
+
+        Returns:
+            Propuesta: Propuesta ajustada.
+        """
+
+        valores = self.como_dict()
+        valores[campo] = ajustar_valor(valores[campo], ajuste, cantidad)
+
+        return Propuesta(**valores)
+
+class PuntoEquilibrio(Registro):
+    """Punto de equilibrio en unidades y en pesos."""
+
+    __slots__ = ('unidades', 'pesos')
+
+    def __init__(self, unidades: float, pesos: float):
+        self.unidades = unidades
+        self.pesos = pesos
+
+class ResultadoCVU(Registro):
+    """Estado de resultados de una propuesta del análisis Costo - Volumen - Utilidad."""
+
+    __slots__ = ('ingreso', 'costo_variable', 'margen_contribucion', 'costo_fijo', 'utilidad_operacion')
+
+    def __init__(self, ingreso: float, costo_variable: float, margen_contribucion: float, costo_fijo: float, utilidad_operacion: float):
+        self.ingreso = ingreso
+        self.costo_variable = costo_variable
+        self.margen_contribucion = margen_contribucion
+        self.costo_fijo = costo_fijo
+        self.utilidad_operacion = utilidad_operacion
+
+class DesgloseMezcla(Registro):
+    """Punto de equilibrio multilínea producto por producto."""
+
+    __slots__ = ('margen_ponderado', 'unidades', 'unidades_por_producto', 'pesos_por_producto', 'pesos')
+
+    def __init__(self, margen_ponderado, unidades: float, unidades_por_producto, pesos_por_producto, pesos: float):
+        self.margen_ponderado = margen_ponderado
+        self.unidades = unidades
+        self.unidades_por_producto = unidades_por_producto
+        self.pesos_por_producto = pesos_por_producto
+        self.pesos = pesos
+
+class PresupuestoProducto(Registro):
+    """Ventas presupuestadas y producción requerida de un producto."""
+
+    __slots__ = ('ventas_presupuestadas', 'produccion_requerida')
+
+    def __init__(self, ventas_presupuestadas: float, produccion_requerida: float):
+        self.ventas_presupuestadas = ventas_presupuestadas
+        self.produccion_requerida = produccion_requerida
+
+class Necesidad(Registro):
+    """Necesidades y compras presupuestadas de un componente."""
+
+    __slots__ = ('materia_prima_produccion', 'materia_prima_requerida', 'compras_presupuestadas')
+
+    def __init__(self, materia_prima_produccion: float, materia_prima_requerida: float, compras_presupuestadas: float):
+        self.materia_prima_produccion = materia_prima_produccion
+        self.materia_prima_requerida = materia_prima_requerida
+        self.compras_presupuestadas = compras_presupuestadas
+
+def punto_equilibrio(producto: Producto, costo_fijo: float) -> PuntoEquilibrio:
+    """Calcula el punto de equilibrio normal de un producto.
+
+    Args:
+        producto (Producto): Producto.
+        costo_fijo (float): Costo fijo total.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario es cero.
+
+    Returns:
+        PuntoEquilibrio: Punto de equilibrio en unidades y en pesos.
+    """
+
+    unidades = costo_fijo / (producto.precio_venta - producto.costo_variable)
+
+    return PuntoEquilibrio(unidades, unidades * producto.precio_venta)
+
+def punto_equilibrio_mezcla(productos: Iterable[Producto], costo_fijo: float) -> PuntoEquilibrio:
+    """Calcula el punto de equilibrio multilínea de una mezcla de productos.
+
+    Args:
+        productos (Iterable[Producto]): Productos con su porcentaje de participación.
+        costo_fijo (float): Costo fijo total.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario ponderado es cero.
+
+    Returns:
+        PuntoEquilibrio: Unidades totales de la mezcla y el total en pesos.
+    """
+
+    productos = list(productos)
+    columnas = (np.array([getattr(producto, campo) for producto in productos], dtype=np.float64)
+                for campo in ('margen_contribucion', 'precio_venta', 'porcentaje_margen_contribucion'))
+
+    desglose = desglose_mezcla(*columnas, costo_fijo)
+
+    return PuntoEquilibrio(float(desglose.unidades), float(desglose.pesos))
+
+def desglose_mezcla(margen_contribucion: np.ndarray, precio_venta: np.ndarray, porcentaje_margen_contribucion: np.ndarray,
+                    costo_fijo: float) -> DesgloseMezcla:
+    """Calcula el punto de equilibrio multilínea producto por producto a partir de las columnas de la mezcla.
+
+    Args:
+        margen_contribucion (np.ndarray): Margen de contribución unitario de cada producto.
+        precio_venta (np.ndarray): Precio de venta de cada producto.
+        porcentaje_margen_contribucion (np.ndarray): Participación de cada producto en la mezcla (0 - 100).
+        costo_fijo (float): Costo fijo total.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario ponderado es cero.
+
+    Returns:
+        DesgloseMezcla: Margen ponderado, unidades y pesos de cada producto y los totales de unidades y pesos.
+    """
+
+    participacion = porcentaje_margen_contribucion / 100
+    margen_ponderado = margen_contribucion * participacion
+    margen_unitario = margen_ponderado.sum()
+
+    if margen_unitario == 0:
+        raise ZeroDivisionError("El margen de contribución unitario es cero")
+
+    unidades = costo_fijo / margen_unitario
+    unidades_por_producto = unidades * participacion
+    pesos_por_producto = unidades_por_producto * precio_venta
+
+    return DesgloseMezcla(margen_ponderado, unidades, unidades_por_producto, pesos_por_producto, pesos_por_producto.sum())
+
+def evaluar_propuesta(propuesta: Propuesta) -> ResultadoCVU:
+    """Calcula el estado de resultados de una propuesta (la versión con registros de resultado_cvu).
+
+    Args:
+        propuesta (Propuesta): Propuesta a evaluar.
+
+    Returns:
+        ResultadoCVU: Estado de resultados.
+    """
+
+    ingreso = propuesta.ventas * propuesta.precio_venta
+    margen_contribucion = ingreso - propuesta.costos_variables
+
+    return ResultadoCVU(ingreso, propuesta.costos_variables, margen_contribucion, propuesta.costos_fijos,
+                        margen_contribucion - propuesta.costos_fijos)
+
+def presupuesto_producto(producto: ProductoPresupuesto) -> PresupuestoProducto:
+    """Calcula las ventas presupuestadas y la producción requerida de un producto.
+
+    Args:
+        producto (ProductoPresupuesto): Producto.
+
+    Returns:
+        PresupuestoProducto: Ventas presupuestadas y producción requerida.
+    """
+
+    return PresupuestoProducto(producto.pronostico_ventas * producto.precio_unitario,
+                               (producto.pronostico_ventas + producto.inventario_final) - producto.inventario_inicial)
+
+def necesidad_componente(produccion_requerida: float, componente: Componente) -> Necesidad:
+    """Calcula las necesidades y compras presupuestadas de un componente.
+
+    Args:
+        produccion_requerida (float): Producción requerida del producto que usa el componente.
+        componente (Componente): Componente.
+
+    Returns:
+        Necesidad: Materia prima para la producción, materia prima requerida y compras presupuestadas.
+    """
+
+    materia_prima_produccion = produccion_requerida * componente.materia_prima_unidad
+    materia_prima_requerida = (materia_prima_produccion + componente.inventario_final) - componente.inventario_inicial
+
+    return Necesidad(materia_prima_produccion, materia_prima_requerida, materia_prima_requerida * componente.costo_materia_prima)
+
+######################## PUNTO DE EQUILIBRIO ########################
+def punto_equilibrio_menu() -> None:
+    """Menú que muestra las opciones para el punto de equilibrio."""
+
+    titulo = 'Usted escogió: Punto de equilibrio'
+    subtitulo = 'Escoja el tipo de cálculo que le gustaría realizar'
+    opciones = [
+        '(1) - Normal',
+        '(2) - Multilínea',
+        '(3) - Por lote (desde archivo)',
+        '(4) - Regresar al menú principal'
+    ]
+
+    while True:
+
+        atender_exportaciones()
+        mostrar_cuadro(opciones, titulo, subtitulo)
+
+        opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 4)
+
+        match opcion:
+            case 1:
+                punto_equilibrio_normal()
+            case 2:
+                punto_equilibrio_multilinea()
+            case 3:
+                punto_equilibrio_lote_interfaz()
+            case 4:
+                return
+
+@trazar('calculo')
+def calcular_punto_equilibrio_normal(precio_venta: float, costo_variable: float, costo_fijo: float,
+                                     escala: int = None, redondeo: str = REDONDEO_DINERO) -> dict:
+    """Calcula el punto de equilibrio normal.
+
+    Args:
+        precio_venta (float): Precio de venta unitario.
+        costo_variable (float): Costo variable unitario.
+        costo_fijo (float): Costo fijo total.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario es cero.
+
+    Returns:
+        dict: Diccionario con "punto_equilibrio_unidades" y "punto_equilibrio_pesos".
+    """
+
+    if escala is not None:
+        validar_aritmetica(escala, redondeo)
+        precio, costo, fijo = (int(a_enteros(valor, escala, redondeo)) for valor in (precio_venta, costo_variable, costo_fijo))
+
+        if precio == costo:
+            raise ZeroDivisionError("El margen de contribución unitario es cero")
+
+        #Los pesos son costo fijo * precio / margen, con un solo redondeo
+        return {
+            "punto_equilibrio_unidades": fijo / (precio - costo),
+            "punto_equilibrio_pesos": a_pesos(multiplicar_dividir(fijo, precio, precio - costo, redondeo), escala)
+        }
+
+    resultado = punto_equilibrio(Producto("", precio_venta, costo_variable), costo_fijo)
+
+    return {
+        "punto_equilibrio_unidades": resultado.unidades,
+        "punto_equilibrio_pesos": resultado.pesos
+    }
+
+@trazar('interfaz')
+def punto_equilibrio_normal() -> None:
+    """Función que muestra una interfaz para determinar el punto de equilibrio normal."""
+
+    try:
+        mostrar_cuadro(["1. Ingrese el precio de venta"])
+        precio_venta = pedir_numero("Valor del precio de venta: ", 0)
+
+        mostrar_cuadro(["2. Ingrese el costo variable"])
+        costo_variable = pedir_numero("Valor del costo variable: ", 0)
+
+        mostrar_cuadro(["3. Ingrese el costo fijo"])
+        costo_fijo = pedir_numero("Valor del costo fijo: ", 0)
+
+        resultado = calcular_punto_equilibrio_normal(precio_venta, costo_variable, costo_fijo, **ARITMETICA_DINERO)
+        registrar_ejecucion('punto_equilibrio_normal',
+                            {'precio_venta': precio_venta, 'costo_variable': costo_variable, 'costo_fijo': costo_fijo},
+                            {'resultado': pd.DataFrame([resultado])})
+
+        contenido = [
+            f'El punto de equilibrio en unidades es: {resultado["punto_equilibrio_unidades"]}',
+            f'El punto de equilibrio en pesos es: ${resultado["punto_equilibrio_pesos"]:,.2f}'
+        ]
+
+        mostrar_aviso(contenido, tipo='Resultado')
+
+        pausar()
+
+    except ZeroDivisionError:
+        print(f"{negrita('Error')}: división por cero.")
+    except OverflowError as e:
+        print(f"{negrita('Error')}: {e}.")
+
+#Estados posibles de cada fila en el cálculo por lote. El orden corresponde al código de la categoría.
+ESTADOS_PUNTO_EQUILIBRIO = ['OK', 'Margen cero', 'Margen negativo', 'Dato inválido']
+
+@memoizar
+@trazar('calculo')
+def punto_equilibrio_lote(datos: pd.DataFrame, escala: int = None, redondeo: str = REDONDEO_DINERO) -> pd.DataFrame:
+    """Calcula el punto de equilibrio de todas las filas de una tabla en una sola pasada.
+
+    Las filas cuyo margen de contribución es cero o negativo no detienen el cálculo;
+    su punto de equilibrio queda como NaN y se marcan en la columna "estado".
+
+    Args:
+        datos (pd.DataFrame): Tabla con las columnas precio_venta, costo_variable y costo_fijo.
+            Cualquier otra columna (por ejemplo, el SKU) se conserva en el resultado.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Raises:
+        KeyError: Si falta alguna de las columnas requeridas.
+
+    Returns:
+        pd.DataFrame: La tabla original con las columnas margen_contribucion_unitario,
+            punto_equilibrio_unidades, punto_equilibrio_pesos y estado.
+    """
+
+    faltantes = [columna for columna in ('precio_venta', 'costo_variable', 'costo_fijo') if columna not in datos.columns]
+    if faltantes:
+        raise KeyError(f"Faltan las columnas: {', '.join(faltantes)}")
+
+    precio_venta = datos['precio_venta'].to_numpy(dtype=np.float64)
+    costo_variable = datos['costo_variable'].to_numpy(dtype=np.float64)
+    costo_fijo = datos['costo_fijo'].to_numpy(dtype=np.float64)
+
+    #Las filas con NaN o infinitos son datos inválidos: su margen y su punto de equilibrio quedan en NaN.
+    #Si la suma de todas las entradas es finita, todas lo son y se evita revisar cada fila.
+    todos_finitos = bool(np.isfinite(precio_venta.sum() + costo_variable.sum() + costo_fijo.sum()))
+    if not todos_finitos:
+        finitos = np.isfinite(precio_venta) & np.isfinite(costo_variable) & np.isfinite(costo_fijo)
+        todos_finitos = bool(finitos.all())
+
+    if escala is None:
+        margen_contribucion_unitario = precio_venta - costo_variable
+        if not todos_finitos:
+            np.putmask(margen_contribucion_unitario, ~finitos, np.nan)
+
+        #Sólo dividimos donde el margen es positivo, el resto de las filas se queda en NaN
+        validos = margen_contribucion_unitario > 0
+        punto_equilibrio_unidades = np.full(len(datos), np.nan)
+        np.divide(costo_fijo, margen_contribucion_unitario, out=punto_equilibrio_unidades, where=validos)
+        punto_equilibrio_pesos = punto_equilibrio_unidades * precio_venta
+    else:
+        validar_aritmetica(escala, redondeo)
+
+        #Las filas inválidas se calculan con cero y después se anulan
+        precio, costo, fijo = (a_enteros(valores if todos_finitos else np.where(finitos, valores, 0), escala, redondeo)
+                               for valores in (precio_venta, costo_variable, costo_fijo))
+
+        #a_enteros deja cada monto dentro de LIMITE_INT64 // escala, así que la resta sólo puede desbordarse con escala 1
+        margen = sumar_int64(precio, costo, restar=True) if escala == 1 else precio - costo
+        validos = margen > 0
+        margen_contribucion_unitario = a_pesos(margen, escala)
+
+        if not todos_finitos:
+            validos &= finitos
+            np.putmask(margen_contribucion_unitario, ~finitos, np.nan)
+
+        #Las filas sin margen positivo (las no finitas quedaron en cero) se dividen entre 1 y luego se anulan
+        divisor = np.maximum(margen, 1)
+        punto_equilibrio_unidades = fijo / divisor
+
+        #Los pesos son costo fijo * precio / margen, con un solo redondeo
+        punto_equilibrio_pesos = a_pesos(multiplicar_dividir(fijo, precio, divisor, redondeo), escala)
+
+        if not validos.all():
+            invalidos = ~validos
+            np.putmask(punto_equilibrio_unidades, invalidos, np.nan)
+            np.putmask(punto_equilibrio_pesos, invalidos, np.nan)
+
+    #Códigos de estado: 0 = OK, 1 = margen cero, 2 = margen negativo, 3 = dato inválido (NaN o infinito)
+    codigos = np.select(
+        [validos, margen_contribucion_unitario == 0, margen_contribucion_unitario < 0],
+        [0, 1, 2],
+        default=3
+    ).astype(np.int8)
+
+    return datos.assign(
+        margen_contribucion_unitario=margen_contribucion_unitario,
+        punto_equilibrio_unidades=punto_equilibrio_unidades,
+        punto_equilibrio_pesos=punto_equilibrio_pesos,
+        estado=pd.Categorical.from_codes(codigos, categories=ESTADOS_PUNTO_EQUILIBRIO)
+    )
+
+@trazar('interfaz')
+def punto_equilibrio_lote_interfaz() -> None:
+    """Función que muestra una interfaz para calcular el punto de equilibrio de un catálogo desde un archivo."""
+
+    mostrar_aviso(['El archivo debe tener las columnas precio_venta, costo_variable y costo_fijo'], tipo = "Información")
+
+    mostrar_cuadro(['Escriba la ruta del archivo (.csv o .xlsx)'])
+    ruta = pedir_campo('Ruta del archivo: ')
+
+    try:
+        datos = leer_tabla(ruta)
+        resultado = punto_equilibrio_lote(datos, **ARITMETICA_DINERO)
+    except (OSError, ValueError, KeyError, OverflowError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    exportar_segundo_plano(resultado, nombre_archivo="punto_equilibrio_lote")
+
+    conteo = resultado['estado'].value_counts(sort=False)
+    contenido = [f'Filas procesadas: {len(resultado):,}']
+    contenido += [f'{estado}: {cantidad:,}' for estado, cantidad in conteo.items()]
+
+    mostrar_aviso(contenido, tipo = 'Resultado')
+
+    pausar()
+
+@memoizar
+@trazar('calculo')
+def calcular_punto_equilibrio_multilinea(productos: pd.DataFrame, costo_fijo: float, escala: int = None,
+                                         redondeo: str = REDONDEO_DINERO) -> dict:
+    """Calcula el punto de equilibrio multilínea sobre una sola tabla columnar.
+
+    Con dinero exacto, los porcentajes se toman como racionales exactos y el margen unitario ponderado
+    no se redondea; cada importe se redondea una sola vez y el total en pesos es la suma exacta
+    de los importes por producto.
+
+    Args:
+        productos (pd.DataFrame): Tabla con un producto por fila (el índice es el nombre del producto)
+            y las columnas porcentaje_margen_contribucion, precio_venta, costo_variable y margen_contribucion.
+        costo_fijo (float): Costo fijo total.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario ponderado es cero.
+
+    Returns:
+        dict: Diccionario con las tablas largas compactas "datos", "margen_ponderado", "unidades" y "pesos"
+            (un producto por fila; ver compactar_tabla) y los totales "punto_equilibrio_unidades" y "punto_equilibrio_pesos".
+    """
+
+    porcentaje = productos['porcentaje_margen_contribucion'].to_numpy(dtype=np.float64)
+    precio_venta = productos['precio_venta'].to_numpy(dtype=np.float64)
+    margen_contribucion = productos['margen_contribucion'].to_numpy(dtype=np.float64)
+
+    if escala is None:
+        #Margen ponderado, punto de equilibrio en unidades, su ponderación y el equivalente en pesos
+        desglose = desglose_mezcla(margen_contribucion, precio_venta, porcentaje, costo_fijo)
+        margen_contribucion_ponderado = desglose.margen_ponderado
+        punto_equilibrio_unidades = desglose.unidades
+        punto_equilibrio_por_unidad = desglose.unidades_por_producto
+        punto_equilibrio_pesos = desglose.pesos_por_producto
+        total_pesos = desglose.pesos
+    else:
+        validar_aritmetica(escala, redondeo)
+        margen, precio = a_enteros(margen_contribucion, escala, redondeo), a_enteros(precio_venta, escala, redondeo)
+        fijo = int(a_enteros(costo_fijo, escala, redondeo))
+        participacion = cantidades_racionales(porcentaje)
+        denominador = 100 * PRECISION_CANTIDAD
+
+        #El margen unitario ponderado exacto es suma_ponderada / denominador
+        suma_ponderada = suma_exacta(producto_exacto(margen, participacion))
+        if suma_ponderada == 0:
+            raise ZeroDivisionError("El margen de contribución unitario es cero")
+
+        margen_contribucion_ponderado = a_pesos(multiplicar_dividir(margen, participacion, denominador, redondeo), escala)
+        punto_equilibrio_unidades = fijo * denominador / suma_ponderada
+        punto_equilibrio_por_unidad = participacion * (fijo / suma_ponderada)
+
+        #Pesos de cada producto: precio * participación * costo fijo / suma_ponderada, con un solo redondeo
+        pesos = multiplicar_dividir(producto_exacto(precio, participacion), fijo, suma_ponderada, redondeo)
+        punto_equilibrio_pesos = a_pesos(pesos, escala)
+        total_pesos = a_pesos(suma_exacta(pesos), escala)
+
+    tabla = productos.assign(
+        margen_contribucion_ponderado=margen_contribucion_ponderado,
+        punto_equilibrio_unidades=punto_equilibrio_unidades,
+        punto_equilibrio_por_unidad=punto_equilibrio_por_unidad,
+        punto_equilibrio_pesos=punto_equilibrio_pesos
+    )
+
+    #Cada tabla de resultado es una selección de columnas de la misma tabla compacta,
+    #por lo que todas comparten el índice categórico con los nombres de los productos.
+    tabla = compactar_tabla(tabla)
+
+    def seleccionar(columnas: dict) -> pd.DataFrame:
+        return tabla[list(columnas)].rename(columns=columnas)
+
+    return {
+        "datos": seleccionar({
+            'porcentaje_margen_contribucion': '% de Margen de contribución',
+            'precio_venta': 'Precio de venta',
+            'costo_variable': 'Costo variable',
+            'margen_contribucion': 'Margen de contribución'
+        }),
+        "margen_ponderado": seleccionar({
+            'margen_contribucion': 'Margen de contribución',
+            'porcentaje_margen_contribucion': 'Porcentaje del margen de contribución',
+            'margen_contribucion_ponderado': 'Margen de contribución ponderado'
+        }),
+        "unidades": seleccionar({
+            'porcentaje_margen_contribucion': 'Porcentaje del margen de contribución',
+            'punto_equilibrio_unidades': 'Punto de equilibrio en unidades',
+            'punto_equilibrio_por_unidad': 'Punto de equilibrio por unidad'
+        }),
+        "pesos": seleccionar({
+            'punto_equilibrio_por_unidad': 'Punto de equilibrio por unidad',
+            'precio_venta': 'Precio de venta',
+            'punto_equilibrio_pesos': 'Punto de equilibrio en pesos'
+        }),
+        "punto_equilibrio_unidades": punto_equilibrio_unidades,
+        "punto_equilibrio_pesos": total_pesos
+    }
+
+@trazar('interfaz')
+def punto_equilibrio_multilinea() -> None:
+    """Función que muestra una interfaz para determinar el punto de equilibrio multilínea."""
+
+    contador_productos = 1
+
+    #Recolectamos los datos por columna para construir una sola tabla al final
+    nombres = []
+    posiciones = {}
+    columnas = {
+        'porcentaje_margen_contribucion': [],
+        'precio_venta': [],
+        'costo_variable': [],
+        'margen_contribucion': []
+    }
+
+    suma_porcentaje = 0 #Utilizado para verificar que no se pase del 100%
+
+    #Recolección de datos
+    while True:
+
+        mostrar_cuadro([f'Producto {contador_productos}'])
+
+        nombre_producto = pedir_campo('Escriba el nombre del producto: ')
+        porcentaje_margen_contribucion = pedir_numero('Escriba el porcentaje del margen de contribución (Sin signo): ', 0, 100)
+        suma_porcentaje += porcentaje_margen_contribucion
+
+        if suma_porcentaje > 100:
+            mostrar_aviso(['La suma del porcentaje superó el 100%'])
+
+            contenido = [
+                '¿Está seguro de querer continuar?',
+                '(S) - Sí',
+                '(N) - No'
+            ]
+
+            mostrar_cuadro(contenido)
+
+            print("\n")
+            confirmar = pedir_campo("Respuesta: ").capitalize()
+
+            if confirmar == "N":
+                break
+
+
+        precio_venta = pedir_numero('Escriba el precio de venta: ', 0)
+        costo_variable = pedir_numero('Escriba el costo variable: ', 0)
+        margen_contribucion = pedir_numero('Escriba el margen de contribución: ', 0)
+
+        #Si el producto ya existía, se sobreescriben sus datos
+        posicion = posiciones.setdefault(nombre_producto, len(nombres))
+        if posicion == len(nombres):
+            nombres.append(nombre_producto)
+            for valores in columnas.values():
+                valores.append(0)
+
+        columnas['porcentaje_margen_contribucion'][posicion] = porcentaje_margen_contribucion
+        columnas['precio_venta'][posicion] = precio_venta
+        columnas['costo_variable'][posicion] = costo_variable
+        columnas['margen_contribucion'][posicion] = margen_contribucion
+
+        contador_productos += 1
+
+        contenido = [
+            '¿Quiere añadir otro producto?',
+            '(S) - Sí',
+            '(N) - No'
+        ]
+
+        mostrar_cuadro(contenido)
+
+        continuar = pedir_campo("Respuesta: ").capitalize()
+
+        if continuar == "N":
+            break
+
+    #Pedimos el costo fijo para las operaciones posteriores
+    costo_fijo = pedir_numero('Escriba el costo fijo: ', 0)
+
+    with etapa('construccion', filas=len(nombres)):
+        productos = pd.DataFrame(columnas, index=nombres)
+
+    try:
+        resultado = calcular_punto_equilibrio_multilinea(productos, costo_fijo, **ARITMETICA_DINERO)
+    except ZeroDivisionError:
+        print(f"{negrita('Error')}: división por cero.")
+        return
+    except OverflowError as e:
+        print(f"{negrita('Error')}: {e}.")
+        return
+
+    entradas = {'productos': [{'nombre': nombre, **dict(zip(columnas, valores))} for nombre, valores in zip(nombres, zip(*columnas.values()))],
+                'costo_fijo': costo_fijo}
+    registrar_ejecucion('punto_equilibrio_multilinea', entradas,
+                        {tabla: resultado[tabla] for tabla in ('datos', 'margen_ponderado', 'unidades', 'pesos')})
+
+    df_datos = resultado["datos"]
+    df_margen_ponderado = resultado["margen_ponderado"]
+    df_punto_equilibrio_unidades = resultado["unidades"]
+    df_punto_equilibrio_pesos = resultado["pesos"]
+
+    mostrar_aviso(['Su resultado se encuentra listo'], tipo = "Información")
+
+    exportar_segundo_plano(df_datos, df_margen_ponderado, df_punto_equilibrio_unidades, df_punto_equilibrio_pesos, nombre_archivo="punto_equilibrio")
+
+    #Usamos las matrices transpuestas porque intercambiar las filas por las columnas.
+    descripcion = [
+        f'El punto de equilibrio en unidades es: {resultado["punto_equilibrio_unidades"]}',
+        f'El punto de equilibrio en pesos es: ${resultado["punto_equilibrio_pesos"]:,.2f}'
+    ]
+    mostrar_aviso(descripcion, tipo = "Resultado")
+
+    mostrar_aviso(['A continuación se mostrarán las tablas'], tipo = "Información")
+
+    mostrar_cuadro(['Datos'])
+    mostrar_tabla(df_datos)
+
+    mostrar_cuadro(['Ponderación de margen'])
+    mostrar_tabla(df_margen_ponderado)
+
+    mostrar_cuadro(['Ponderación de punto de equilibrio (unidades)'])
+    mostrar_tabla(df_punto_equilibrio_unidades, transponer=False)
+
+    mostrar_cuadro(['Ponderación de punto de equilibrio (pesos)'])
+    mostrar_tabla(df_punto_equilibrio_pesos, transponer=False)
+
+    pausar()
+
+######################## UNIDADES ANTES Y DESPUÉS DE IMPUESTOS ########################
+def unidades_impuestos_menu() -> None:
+    """Función que muestra un menú para la opción de unidades de impuestos."""
+
+    título = "Unidades antes/después de impuestos"
+    subtítulo = "Escoja el tipo de cálculo que le gustaría realizar"
+    opciones = [
+        '(1) - Unidad antes de impuestos normal',
+        '(2) - Unidad antes de impuestos multilínea',
+        '(3) - Unidad después de impuestos normal',
+        '(4) - Unidad después de impuestos multilínea',
+        '(5) - Barrido de utilidades deseadas y tasas impositivas',
+        '(6) - Regresar'
+    ]
+
+    while True:
+        atender_exportaciones()
+        mostrar_cuadro(opciones, título, subtítulo)
+
+        opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 6)
+
+        match opcion:
+            case 1:
+                unidad_antes_de_impuestos_normal()
+            case 2:
+                unidad_antes_de_impuestos_multilinea()
+            case 3:
+                unidad_despues_de_impuestos_normal()
+            case 4:
+                unidad_despues_impuestos_multilinea()
+            case 5:
+                unidades_impuestos_superficie()
+            case 6:
+                return
+
+@trazar('calculo')
+def calcular_unidades_antes_impuestos(costo_fijo_total: float, utilidad_deseada: float, margen_contribucion_unitario: float) -> float:
+    """Calcula las unidades a vender antes de impuestos.
+
+    Args:
+        costo_fijo_total (float): Costo fijo total.
+        utilidad_deseada (float): Utilidad deseada antes de impuestos.
+        margen_contribucion_unitario (float): Margen de contribución unitario.
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario es cero.
+
+    Returns:
+        float: Unidades a vender antes de impuestos.
+    """
+
+    return (costo_fijo_total + utilidad_deseada) / margen_contribucion_unitario
+
+@trazar('calculo')
+def calcular_unidades_despues_impuestos(costo_fijo_total: float, utilidad_deseada: float, margen_contribucion_unitario: float, tasa_impositiva: float) -> float:
+    """Calcula las unidades a vender después de impuestos.
+
+    Args:
+        costo_fijo_total (float): Costo fijo total.
+        utilidad_deseada (float): Utilidad deseada después de impuestos.
+        margen_contribucion_unitario (float): Margen de contribución unitario.
+        tasa_impositiva (float): Tasa impositiva en porcentaje (0 - 100).
+
+    Raises:
+        ZeroDivisionError: Si el margen de contribución unitario es cero o la tasa es del 100%.
+
+    Returns:
+        float: Unidades a vender después de impuestos.
+    """
+
+    tasa_impositiva = tasa_impositiva / 100
+
+    return ((costo_fijo_total + (utilidad_deseada / (1 - tasa_impositiva)))
+            / margen_contribucion_unitario)
+
+@memoizar
+@trazar('calculo')
+def calcular_unidades_multilinea(unidades: float, participaciones: dict, etiqueta: str = 'Uds. antes de impuestos') -> pd.DataFrame:
+    """Pondera las unidades a vender entre varios productos según su participación.
+
+    Args:
+        unidades (float): Unidades totales a vender (antes o después de impuestos).
+        participaciones (dict): Diccionario con el nombre del producto y su porcentaje de participación (0 - 100).
+        etiqueta (str, optional): Nombre de la fila con las unidades ponderadas. Defaults to 'Uds. antes de impuestos'.
+
+    Returns:
+        pd.DataFrame: Tabla con un producto por columna y las filas '% Participación', 'Total Uds' y la etiqueta.
+    """
+
+    porcentaje_participacion = np.fromiter(participaciones.values(), dtype=np.float64, count=len(participaciones))
+
+    df_datos = pd.DataFrame({
+        '% Participación': porcentaje_participacion,
+        'Total Uds': unidades,
+        etiqueta: unidades * (porcentaje_participacion / 100)
+    }, index=list(participaciones))
+
+    return df_datos.T
+
+@trazar('interfaz')
+def unidad_antes_de_impuestos_normal(exportar: bool = False) -> None | float:
+    """Calcula las unidades a vender antes de impuestos normal.
+
+        Args:
+            exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
+        Returns:
+            None: Si no se especifica que se va a exportar.
+            float: Unidades a vender antes de impuestos.
+    """
+
+    print("\n")
+
+    mostrar_cuadro(["Escriba el costo fijo total"])
+    costo_fijo_total = pedir_numero("Valor del costo fijo total: ", 0)
+
+    mostrar_cuadro(["Escriba la utilidad deseada"])
+    utilidad_deseada = pedir_numero("Valor de la utilidad deseada: ", 0)
+
+    mostrar_cuadro(["Escriba el margen de contribución unitario"])
+    margen_contribucion_unitario = pedir_numero("Valor del margen de contribución unitario: ", 0)
+
+    unidades_antes_impuestos = calcular_unidades_antes_impuestos(costo_fijo_total, utilidad_deseada, margen_contribucion_unitario)
+
+    contenido = [f'Unidades a vender antes de impuestos: {unidades_antes_impuestos}']
+    mostrar_aviso(contenido, tipo = 'Resultado')
+
+    pausar()
+
+    if exportar:
+        return unidades_antes_impuestos
+
+@trazar('interfaz')
+def unidad_despues_de_impuestos_normal(exportar: bool = False) -> None | float:
+    """Calcula las unidades a vender después de impuestos normal.
+
+        Args:
+            exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
+        Returns:
+            None: Si no se especifica que se va a exportar.
+            float: Unidades a vender después de impuestos.
+    """
+
+    mostrar_cuadro(["Escriba el costo fijo total"])
+    costo_fijo_total = pedir_numero("Valor del costo fijo total: ", 0)
+
+    mostrar_cuadro(["Escriba la utilidad deseada"])
+    utilidad_deseada = pedir_numero("Valor de la utilidad deseada: ", 0)
+
+    mostrar_cuadro(["Escriba el margen de contribución unitario"])
+    margen_contribucion_unitario = pedir_numero("Valor del margen de contribución unitario: ", 0)
+
+    mostrar_cuadro(["Escriba la tasa impositiva"])
+    tasa_impositiva = pedir_numero("Valor de la tasa impositiva (0 - 100): ", 0, 100)
+
+    unidades_despues_impuestos = calcular_unidades_despues_impuestos(costo_fijo_total, utilidad_deseada, margen_contribucion_unitario, tasa_impositiva)
+
+    contenido = [f'Unidades a vender después de impuestos: {unidades_despues_impuestos}']
+    mostrar_aviso(contenido, tipo = 'Resultado')
+
+    if exportar:
+        return unidades_despues_impuestos
+
+def bloques_historial(ruta: str, columnas: list[str], tamano_bloque: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Lee un historial de ventas por bloques, sin cargar el archivo completo.
+
+    Los archivos CSV se leen con pandas por bloques y los Parquet por lotes de pyarrow.
+    Los archivos de Excel se leen completos.
+
+    Args:
+        ruta (str): Ruta del archivo (.csv, .parquet o .xlsx).
+        columnas (list[str]): Columnas a leer.
+        tamano_bloque (int, optional): Cantidad de filas por bloque. Defaults to 1_000_000.
+
+    Raises:
+        ValueError: Si la extensión del archivo no es soportada.
+
+    Yields:
+        pd.DataFrame: Bloques del historial con las columnas pedidas.
+    """
+
+    extension = ruta.rsplit('.', 1)[-1].lower()
+
+    match extension:
+        case 'csv':
+            yield from pd.read_csv(ruta, usecols=columnas, chunksize=tamano_bloque)
+        case 'parquet':
+            import pyarrow.parquet as pq
+
+            for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_bloque, columns=columnas):
+                yield lote.to_pandas()
+        case 'xlsx' | 'xls':
+            yield pd.read_excel(ruta, usecols=columnas)
+        case _:
+            raise ValueError(f"Formato de archivo no soportado: .{extension}")
+
+@trazar('calculo')
+def participacion_historial(ruta: str, columna_producto: str = 'producto', columna_cantidad: str = 'cantidad',
+                            tamano_bloque: int = 1_000_000) -> dict:
+    """Calcula el porcentaje de participación de cada producto a partir de un historial de ventas.
+
+    El historial se recorre por bloques; de cada bloque sólo se guarda la suma por producto,
+    por lo que la memoria depende de la cantidad de productos y no de la cantidad de ventas.
+
+    Args:
+        ruta (str): Ruta del historial (.csv, .parquet o .xlsx).
+        columna_producto (str, optional): Columna con el nombre del producto. Defaults to 'producto'.
+        columna_cantidad (str, optional): Columna con las unidades vendidas. Si es None, cada fila cuenta
+            como una unidad. Defaults to 'cantidad'.
+        tamano_bloque (int, optional): Cantidad de filas por bloque. Defaults to 1_000_000.
+
+    Raises:
+        ValueError: Si el historial no tiene ventas.
+
+    Returns:
+        dict: Diccionario con el nombre del producto y su porcentaje de participación (0 - 100),
+            ordenado de mayor a menor. La suma de los porcentajes es 100.
+    """
+
+    columnas = [columna_producto] if columna_cantidad is None else [columna_producto, columna_cantidad]
+    totales = None
+
+    for bloque in bloques_historial(ruta, columnas, tamano_bloque):
+        if columna_cantidad is None:
+            parcial = bloque[columna_producto].value_counts(sort=False)
+        else:
+            parcial = bloque.groupby(columna_producto, sort=False)[columna_cantidad].sum()
+
+        totales = parcial if totales is None else totales.add(parcial, fill_value=0)
+
+    if totales is None or totales.sum() <= 0:
+        raise ValueError(f"El historial {ruta} no tiene ventas")
+
+    participaciones = (totales / totales.sum() * 100).sort_values(ascending=False)
+
+    return {str(producto): float(porcentaje) for producto, porcentaje in participaciones.items()}
+
+def pedir_participaciones_historial() -> None | dict:
+    """Pregunta al usuario si quiere calcular la participación de los productos desde un historial de ventas.
+
+    Returns:
+        None | dict: None si el usuario prefiere capturar los productos a mano; si no,
+            el diccionario de participaciones calculado con participacion_historial.
+    """
+
+    contenido = [
+        '¿Cómo quiere obtener el porcentaje de participación de los productos?',
+        '(1) - Capturar cada producto',
+        '(2) - Calcularlo desde un historial de ventas (.csv, .parquet o .xlsx)'
+    ]
+    mostrar_cuadro(contenido)
+
+    if pedir_numero(f"{negrita('Escriba el número de la opción que vas a escoger: ')}", 1, 2) == 1:
+        return None
+
+    while True:
+        ruta = pedir_campo('Ruta del historial de ventas: ')
+        columna_producto = pedir_campo('Columna con el nombre del producto: ')
+        columna_cantidad = pedir_campo('Columna con las unidades vendidas (escriba - para contar las filas): ')
+
+        try:
+            participaciones = participacion_historial(ruta, columna_producto, None if columna_cantidad == '-' else columna_cantidad)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            print(f"{negrita('Error')}: {e}")
+            pedir_salida()
+            continue
+
+        mostrar_aviso([f'Se calculó la participación de {len(participaciones):,} productos'], tipo = "Información")
+
+        return participaciones
+
+@trazar('interfaz')
+def unidad_antes_de_impuestos_multilinea() -> None:
+    """Calcula las unidades antes de impuestos multilínea."""
+
+    mostrar_aviso(['Primero deberá determinar la utilidad antes de impuestos normal'], tipo = "Información")
+
+    unidad_antes_impuestos = unidad_antes_de_impuestos_normal(exportar= True)
+
+    participaciones = pedir_participaciones_historial()
+
+    if participaciones is None:
+        mostrar_aviso(['A continuación, deberá especificar los datos de los productos que tiene.'], tipo = "Información")
+
+        contador_productos = 1
+        suma_porcentaje_participacion = 0
+
+        participaciones = {}
+
+        while True:
+            mostrar_cuadro([f'Producto {contador_productos}'])
+            nombre_producto = pedir_campo('Escriba el nombre del producto: ')
+            porcentaje_participacion = pedir_numero('Escriba el porcentaje de participación (0 - 100) (Sin signo): ', 0, 100)
+
+            suma_porcentaje_participacion += porcentaje_participacion
+            if suma_porcentaje_participacion > 100:
+                mostrar_aviso(['La suma del porcentaje superó el 100%'])
+
+                contenido = [
+                    '¿Está seguro de querer continuar?',
+                    '(S) - Sí',
+                    '(N) - No'
+                ]
+
+                mostrar_cuadro(contenido)
+
+                continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+
+                if continuar == 'N':
+                    break
+
+            participaciones[nombre_producto] = porcentaje_participacion
+
+            contador_productos += 1
+
+            contenido = ['¿Quiere añadir otro producto?',
+                         '(S) - Sí',
+                         '(N) - No']
+            mostrar_cuadro(contenido)
+
+            continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+
+            if continuar == 'N':
+                break
+
+    df_datos = calcular_unidades_multilinea(unidad_antes_impuestos, participaciones, 'Uds. antes de impuestos')
+
+    exportar_segundo_plano(df_datos.T, nombre_archivo="unidades_antes_de_impuestos")
+
+    mostrar_cuadro(['Ponderación'])
+    mostrar_tabla(df_datos.T)
+
+    pausar()
+
+@trazar('interfaz')
+def unidad_despues_impuestos_multilinea() -> None:
+    """Calcula las unidades después de impuestos multilínea."""
+
+    mostrar_aviso(['Primero deberá determinar la utilidad antes de impuestos normal'], tipo = "Información")
+
+    unidad_despues_impuestos = unidad_despues_de_impuestos_normal(exportar= True)
+
+    participaciones = pedir_participaciones_historial()
+
+    if participaciones is None:
+        mostrar_aviso(['A continuación, deberá especificar los datos de los productos que tiene.'], tipo = "Información")
+
+        contador_productos = 1
+        suma_porcentaje_participacion = 0
+
+        participaciones = {}
+
+        while True:
+            mostrar_cuadro([f'Producto {contador_productos}'])
+            nombre_producto = pedir_campo('Escriba el nombre del producto: ')
+            porcentaje_participacion = pedir_numero('Escriba el porcentaje de participación (0 - 100) (Sin signo): ', 0, 100)
+
+            suma_porcentaje_participacion += porcentaje_participacion
+            if suma_porcentaje_participacion > 100:
+                mostrar_aviso(['La suma del porcentaje superó el 100%'])
+
+                contenido = [
+                    '¿Está seguro de querer continuar?',
+                    '(S) - Sí',
+                    '(N) - No'
+                ]
+
+                mostrar_cuadro(contenido)
+
+                continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+
+                if continuar == 'S':
+                    break
+
+            participaciones[nombre_producto] = porcentaje_participacion
+
+            contador_productos += 1
+
+            contenido = ['¿Quiere añadir otro producto?',
+                         '(S) - Sí',
+                         '(N) - No']
+            mostrar_cuadro(contenido)
+
+            continuar = pedir_campo(f"{negrita('Escriba su respuesta: ')}").capitalize()
+
+            if continuar == 'N':
+                break
+
+    df_datos = calcular_unidades_multilinea(unidad_despues_impuestos, participaciones, 'Uds. después de impuestos')
+
+    exportar_segundo_plano(df_datos, nombre_archivo="unidades_despues_de_impuestos")
+
+    mostrar_cuadro(['Ponderación'])
+    mostrar_tabla(df_datos.T)
+
+    pausar()
+
+def barrido_unidades_impuestos(costo_fijo_total, utilidad_deseada, margen_contribucion_unitario, tasa_impositiva=None) -> np.ndarray:
+    """Calcula las unidades a vender antes o después de impuestos para arreglos de entradas.
+
+    Las entradas se combinan con las reglas de broadcasting de NumPy, por lo que se puede
+    pasar, por ejemplo, un arreglo de utilidades de forma (n, 1) y uno de tasas de forma (1, m)
+    para obtener la superficie completa de n x m. Los elementos con margen de contribución
+    cero o negativo, o con una tasa impositiva del 100% o mayor, quedan como NaN.
+
+    Args:
+        costo_fijo_total (array_like): Costo fijo total.
+        utilidad_deseada (array_like): Utilidad deseada.
+        margen_contribucion_unitario (array_like): Margen de contribución unitario.
+        tasa_impositiva (array_like, optional): Tasa impositiva en porcentaje (0 - 100).
+            Si no se especifica, se calculan las unidades antes de impuestos. Defaults to None.
+
+    Returns:
+        np.ndarray: Unidades a vender, con la forma resultante del broadcasting.
+    """
+
+    costo_fijo_total, utilidad_deseada, margen_contribucion_unitario, tasa = np.broadcast_arrays(
+        *(np.asarray(valor, dtype=np.float64) for valor in (costo_fijo_total, utilidad_deseada, margen_contribucion_unitario,
+                                                             0 if tasa_impositiva is None else tasa_impositiva)))
+
+    validos = (margen_contribucion_unitario > 0) & (tasa < 100)
+
+    #Utilidad antes de impuestos necesaria para obtener la utilidad deseada después de impuestos
+    utilidad_antes_impuestos = np.full(validos.shape, np.nan)
+    np.divide(utilidad_deseada, 1 - tasa / 100, out=utilidad_antes_impuestos, where=validos)
+
+    unidades = np.full(validos.shape, np.nan)
+    np.divide(costo_fijo_total + utilidad_antes_impuestos, margen_contribucion_unitario, out=unidades, where=validos)
+
+    return unidades
+
+@memoizar
+@trazar('calculo')
+def unidades_impuestos_lote(datos: pd.DataFrame) -> pd.DataFrame:
+    """Calcula las unidades a vender antes y después de impuestos para cada fila de una tabla.
+
+    Args:
+        datos (pd.DataFrame): Tabla con las columnas costo_fijo_total, utilidad_deseada y
+            margen_contribucion_unitario, y opcionalmente tasa_impositiva (0 - 100).
+
+    Returns:
+        pd.DataFrame: La tabla original con la columna unidades_antes_impuestos y, si hay tasa,
+            unidades_despues_impuestos. Las filas que no se pueden calcular quedan como NaN.
+    """
+
+    entradas = [datos['costo_fijo_total'], datos['utilidad_deseada'], datos['margen_contribucion_unitario']]
+    columnas = {'unidades_antes_impuestos': barrido_unidades_impuestos(*entradas)}
+
+    if 'tasa_impositiva' in datos.columns:
+        columnas['unidades_despues_impuestos'] = barrido_unidades_impuestos(*entradas, datos['tasa_impositiva'])
+
+    return datos.assign(**columnas)
+
+#Cantidad máxima de celdas (utilidades deseadas por tasas impositivas) de la superficie de unidades
+CELDAS_MAXIMAS_SUPERFICIE = 1_000_000
+
+def validar_celdas_superficie(cantidad_utilidades: int, cantidad_tasas: int) -> None:
+    """Revisa que la superficie de unidades no exceda CELDAS_MAXIMAS_SUPERFICIE celdas.
+
+    Args:
+        cantidad_utilidades (int): Cantidad de utilidades deseadas (filas).
+        cantidad_tasas (int): Cantidad de tasas impositivas (columnas).
+
+    Raises:
+        ValueError: Si la superficie tendría demasiadas celdas.
+    """
+
+    celdas = cantidad_utilidades * cantidad_tasas
+    if celdas > CELDAS_MAXIMAS_SUPERFICIE:
+        raise ValueError(f"La superficie tendría {celdas:,} celdas y el máximo es {CELDAS_MAXIMAS_SUPERFICIE:,}; "
+                         "use pasos más grandes o rangos más cortos")
+
+@memoizar
+@trazar('calculo')
+def superficie_unidades_impuestos(costo_fijo_total: float, margen_contribucion_unitario: float,
+                                  utilidades_deseadas, tasas_impositivas) -> pd.DataFrame:
+    """Calcula la matriz de unidades a vender después de impuestos para cada utilidad deseada y tasa.
+
+    Args:
+        costo_fijo_total (float): Costo fijo total.
+        margen_contribucion_unitario (float): Margen de contribución unitario.
+        utilidades_deseadas (array_like): Utilidades deseadas (filas de la matriz).
+        tasas_impositivas (array_like): Tasas impositivas en porcentaje (columnas de la matriz).
+
+    Raises:
+        ValueError: Si la matriz tendría más de CELDAS_MAXIMAS_SUPERFICIE celdas.
+
+    Returns:
+        pd.DataFrame: Matriz con una fila por utilidad deseada y una columna por tasa impositiva.
+    """
+
+    utilidades_deseadas = np.asarray(utilidades_deseadas, dtype=np.float64)
+    tasas_impositivas = np.asarray(tasas_impositivas, dtype=np.float64)
+
+    validar_celdas_superficie(utilidades_deseadas.size, tasas_impositivas.size)
+
+    unidades = barrido_unidades_impuestos(costo_fijo_total, utilidades_deseadas[:, np.newaxis],
+                                          margen_contribucion_unitario, tasas_impositivas[np.newaxis, :])
+
+    return pd.DataFrame(unidades,
+                        index=pd.Index(utilidades_deseadas, name='Utilidad deseada'),
+                        columns=pd.Index([f'{tasa:g}%' for tasa in tasas_impositivas], name='Tasa impositiva'))
+
+@trazar('interfaz')
+def unidades_impuestos_superficie() -> None:
+    """Interfaz para calcular las unidades después de impuestos en un rango de utilidades deseadas y tasas."""
+
+    mostrar_cuadro(["Escriba el costo fijo total"])
+    costo_fijo_total = pedir_numero("Valor del costo fijo total: ", 0)
+
+    mostrar_cuadro(["Escriba el margen de contribución unitario"])
+    margen_contribucion_unitario = pedir_numero("Valor del margen de contribución unitario: ", 0)
+
+    mostrar_cuadro(["Rango de utilidades deseadas"])
+    utilidad_minima = pedir_numero("Utilidad deseada mínima: ", 0)
+    utilidad_maxima = pedir_numero("Utilidad deseada máxima: ", utilidad_minima)
+    paso_utilidad = pedir_numero("Paso de la utilidad deseada (0 para un solo valor): ", 0)
+
+    mostrar_cuadro(["Rango de tasas impositivas"])
+    tasa_minima = pedir_numero("Tasa impositiva mínima (0 - 100): ", 0, 100)
+    tasa_maxima = pedir_numero("Tasa impositiva máxima (0 - 100): ", tasa_minima, 100)
+    paso_tasa = pedir_numero("Paso de la tasa impositiva (0 para un solo valor): ", 0)
+
+    #El tamaño se revisa antes de generar los rangos, que por sí solos podrían no caber en memoria
+    try:
+        validar_celdas_superficie(cantidad_valores(utilidad_minima, utilidad_maxima, paso_utilidad),
+                                  cantidad_valores(tasa_minima, tasa_maxima, paso_tasa))
+    except ValueError as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    df_superficie = superficie_unidades_impuestos(costo_fijo_total, margen_contribucion_unitario,
+                                                  rango_valores(utilidad_minima, utilidad_maxima, paso_utilidad),
+                                                  rango_valores(tasa_minima, tasa_maxima, paso_tasa))
+
+    exportar_segundo_plano(df_superficie, nombre_archivo="unidades_impuestos_superficie")
+
+    mostrar_cuadro(['Unidades a vender después de impuestos'], 'Filas: utilidad deseada. Columnas: tasa impositiva.')
+    mostrar_tabla(df_superficie)
+
+    pausar()
+
+######################## ANÁLISIS COSTO - VOLUMEN - UTILIDAD ########################
+
+def analisis_cvu_menu() -> None:
+    """Muestra al usuario un menú para iniciar el análisis Costo - Volumen - Utilidad."""
+
+    titulo = 'Análisis Costo - Volumen - Utilidad'
+    subtitulo = '¿Qué quiere hacer?'
+    contenido = ['(1) - Iniciar Análisis Costo - Volumen - Utilidad',
+                 '(2) - Rejilla de propuestas (todas las combinaciones)',
+                 '(3) - Simulación de riesgo (Monte Carlo)',
+                 '(4) - Regresar al menú principal']
+
+    while True:
+        atender_exportaciones()
+        mostrar_cuadro(contenido, titulo, subtitulo)
+        opcion = pedir_numero(f'{negrita("Escriba el número de la opción que vas a escoger: ")}', 1, 4)
+
+        match opcion:
+            case 1:
+                analisis_cvu()
+            case 2:
+                analisis_cvu_rejilla()
+            case 3:
+                analisis_cvu_simulacion()
+            case 4:
+                return
+
+#Campos de cada propuesta y ajustes posibles, en el mismo orden que las opciones de la interfaz.
+CAMPOS_CVU = ["Precio de venta", "Costos Variables", "Costos Fijos", "Ventas"]
+AJUSTES_CVU = ['aumentar_porcentaje', 'aumentar_cantidad', 'disminuir_porcentaje', 'disminuir_cantidad', 'mantener']
+
+def ajustar_valor(valor: float, ajuste: str, cantidad: float = 0) -> float:
+    """Aplica a un valor uno de los ajustes del análisis Costo - Volumen - Utilidad.
+
+    Args:
+        valor (float): Valor actual.
+        ajuste (str): Uno de los ajustes de AJUSTES_CVU.
+        cantidad (float, optional): Porcentaje (0 - 100) o cantidad del ajuste. Defaults to 0.
+
+    Raises:
+        ValueError: Si el ajuste no existe.
+
+    Returns:
+        float: Valor ajustado.
+    """
+
+    match ajuste:
+        case 'aumentar_porcentaje':
+            return valor * (1 + (cantidad / 100))
+        case 'aumentar_cantidad':
+            return valor + cantidad
+        case 'disminuir_porcentaje':
+            return valor - (valor * (cantidad / 100))
+        case 'disminuir_cantidad':
+            return valor - cantidad
+        case 'mantener':
+            return valor
+        case _:
+            raise ValueError(f"Ajuste desconocido: {ajuste}")
+
+def resultado_cvu(propuesta: dict) -> dict:
+    """Calcula el estado de resultados de una propuesta del análisis Costo - Volumen - Utilidad.
+
+    Args:
+        propuesta (dict): Diccionario con los campos de CAMPOS_CVU.
+
+    Returns:
+        dict: Ingreso, Costo Variable, Margen de Contribución, Costo Fijo y Utilidad de Operación.
+    """
+
+    resultado = evaluar_propuesta(Propuesta.desde_campos(propuesta))
+
+    return {
+        "Ingreso": resultado.ingreso,
+        "Costo Variable": resultado.costo_variable,
+        "Margen de Contribución": resultado.margen_contribucion,
+        "Costo Fijo": resultado.costo_fijo,
+        "Utilidad de Operación": resultado.utilidad_operacion
+    }
+
+def resultado_cvu_exacto(propuesta: dict, escala: int = ESCALA_DINERO, redondeo: str = REDONDEO_DINERO) -> dict:
+    """Calcula el estado de resultados de resultado_cvu con dinero exacto.
+
+    El ingreso (ventas * precio de venta) se redondea una sola vez; el resto de los conceptos son sumas
+    y restas exactas, por lo que la utilidad de operación cuadra al centavo con los demás conceptos.
+
+    Args:
+        propuesta (dict): Diccionario con los campos de CAMPOS_CVU (escalares o arreglos).
+        escala (int, optional): Unidades mínimas por peso. Defaults to ESCALA_DINERO.
+        redondeo (str, optional): Regla de redondeo (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Returns:
+        dict: Los mismos conceptos que resultado_cvu, en pesos.
+    """
+
+    precio = Dinero.desde(propuesta["Precio de venta"], escala, redondeo)
+    costos_variables = Dinero.desde(propuesta["Costos Variables"], escala, redondeo)
+    costos_fijos = Dinero.desde(propuesta["Costos Fijos"], escala, redondeo)
+
+    ingreso = precio.multiplicar(propuesta["Ventas"], redondeo)
+    margen_contribucion = ingreso - costos_variables
+
+    return {
+        "Ingreso": ingreso.a_flotante(),
+        "Costo Variable": costos_variables.a_flotante(),
+        "Margen de Contribución": margen_contribucion.a_flotante(),
+        "Costo Fijo": costos_fijos.a_flotante(),
+        "Utilidad de Operación": (margen_contribucion - costos_fijos).a_flotante()
+    }
+
+@memoizar
+@trazar('calculo')
+def calcular_analisis_cvu(propuestas: dict, escala: int = None, redondeo: str = REDONDEO_DINERO) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Calcula el análisis Costo - Volumen - Utilidad de la situación actual y sus propuestas.
+
+    Args:
+        propuestas (dict): Diccionario con la llave "actual" y una llave por propuesta.
+            Cada valor es un diccionario con los campos de CAMPOS_CVU.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Tabla de propuestas y tabla de cálculos (una columna por propuesta).
+    """
+
+    if escala is None:
+        propuestas_calculos = {propuesta: resultado_cvu(valores) for propuesta, valores in propuestas.items()}
+        return pd.DataFrame(propuestas), pd.DataFrame(propuestas_calculos)
+
+    validar_aritmetica(escala, redondeo)
+
+    #Todas las propuestas se calculan juntas, con un arreglo por campo
+    campos = {campo: np.array([valores[campo] for valores in propuestas.values()], dtype=np.float64) for campo in CAMPOS_CVU}
+    conceptos = resultado_cvu_exacto(campos, escala, redondeo)
+
+    return pd.DataFrame(propuestas), pd.DataFrame(conceptos, index=list(propuestas)).T
+
+@trazar('interfaz')
+def analisis_cvu() -> None:
+    """Se le muestra una interfaz al usuario para realizar el análisis Costo - Volumen - Utilidad."""
+
+    print("\n")
+    mostrar_cuadro(['Bienvenido al análisis Costo - Volumen - Utilidad'])
+
+    propuestas = {"actual": dict.fromkeys(CAMPOS_CVU, 0)}
+
+    for dato in propuestas["actual"].keys():
+        titulo = f'{dato}'
+        contenido = [f'Escriba el valor numérico de {dato}']
+        mostrar_cuadro(contenido, titulo)
+
+        valor = pedir_numero(f"Valor numérico de {dato}: ", 0)
+        propuestas["actual"][dato] = valor
+
+
+    print("\n")
+
+    mostrar_aviso(['A continuación, usted deberá introducir la cantidad de propuestas que tiene,',
+                   'las cuales se compararán con los datos que proporcionó anteriormente.'],
+                   tipo = "Información")
+
+    num_propuestas = pedir_numero(f"{negrita('Escriba la cantidad de propuestas a realizar: ')}")
+
+    for propuesta in range(1, num_propuestas + 1): #Le añadimos uno porque el range no toma en cuenta el último valor
+
+        propuestas[propuesta] = {}
+
+        mostrar_cuadro([f'Propuesta {propuesta}'])
+
+
+        for dato in propuestas["actual"].keys():
+            dato_original = propuestas["actual"][dato]
+
+            titulo = f"¿Qué quieres hacer con {dato}?"
+            contenido = [
+                '(1) - Aumentar valor (% porcentaje)',
+                '(2) - Aumentar valor (cantidad)',
+                '(3) - Disminuir valor (% porcentaje)',
+                '(4) - Disminuir valor (cantidad)',
+                '(5) - Mantener el valor actual'
+            ]
+
+            mostrar_cuadro(contenido, titulo)
+
+            opcion = pedir_numero(f"{negrita('Escriba el número de la opción que vas a escoger: ')}", 1, 5)
+
+            match opcion:
+                case 1:
+                    mostrar_cuadro([f'Usted escogió aumentar el valor de {dato} en porcentaje'])
+                    cantidad_aumento = pedir_numero('Escriba el porcentaje que desea aumentar (0 - 100) (Sin signo): ', 0, 100)
+                case 2:
+                    mostrar_cuadro([f'Usted escogió aumentar el valor de {dato} en cantidad ($)'])
+                    cantidad_aumento = pedir_numero('Escriba la cantidad que desea aumentar: ', 0)
+                case 3:
+                    mostrar_cuadro([f'Usted escogió disminuir el valor de {dato} en porcentaje'])
+                    cantidad_aumento = pedir_numero('Escriba el porcentaje que desea disminuir (0 - 100) (Sin signo): ', 0, 100)
+                case 4:
+                    mostrar_cuadro([f'Usted escogió disminuir el valor del {dato} en cantidad ($)'])
+                    cantidad_aumento = pedir_numero('Escriba la cantidad que desea disminuir: ', 0)
+                case 5:
+                    cantidad_aumento = 0
+
+            propuestas[propuesta][dato] = ajustar_valor(dato_original, AJUSTES_CVU[opcion - 1], cantidad_aumento)
+
+    try:
+        df_propuestas, df_propuestas_calculos = calcular_analisis_cvu(propuestas, **ARITMETICA_DINERO)
+    except OverflowError as e:
+        print(f"{negrita('Error')}: {e}.")
+        return
+
+    registrar_ejecucion('analisis_cvu', {'actual': propuestas["actual"], 'propuestas': [propuestas[numero] for numero in range(1, num_propuestas + 1)]},
+                        {'propuestas': df_propuestas, 'calculos': df_propuestas_calculos})
+
+    exportar_segundo_plano(df_propuestas, df_propuestas_calculos, nombre_archivo="analisis_cvu")
+
+    mostrar_cuadro(['Análisis'])
+    mostrar_tabla(df_propuestas_calculos)
+    mostrar_tabla(df_propuestas)
+
+    pausar()
+
+def rango_valores(inicio: float, fin: float, paso: float) -> np.ndarray:
+    """Genera los valores de un rango, incluyendo ambos extremos.
+
+    Args:
+        inicio (float): Primer valor.
+        fin (float): Último valor.
+        paso (float): Distancia entre valores. Si es cero, el rango sólo contiene el inicio.
+
+    Raises:
+        ValueError: Si el paso es negativo o el fin es menor al inicio.
+
+    Returns:
+        np.ndarray: Valores del rango.
+    """
+
+    if paso < 0 or fin < inicio:
+        raise ValueError("El rango debe tener un paso positivo y un fin mayor o igual al inicio")
+
+    if paso == 0:
+        return np.array([inicio], dtype=np.float64)
+
+    #Se suma medio paso al fin para que el último valor no se pierda por redondeo
+    return np.arange(inicio, fin + paso / 2, paso, dtype=np.float64)
+
+def cantidad_valores(inicio: float, fin: float, paso: float) -> int:
+    """Cuenta los valores que genera rango_valores con los mismos argumentos, sin generarlos.
+
+    Raises:
+        ValueError: Si el paso es negativo o el fin es menor al inicio.
+    """
+
+    if paso < 0 or fin < inicio:
+        raise ValueError("El rango debe tener un paso positivo y un fin mayor o igual al inicio")
+
+    if paso == 0:
+        return 1
+
+    return max(math.ceil((fin + paso / 2 - inicio) / paso), 0)
+
+@memoizar
+@trazar('calculo')
+def rejilla_cvu(rangos: dict, top: int = 10, tamano_bloque: int = 1_000_000) -> pd.DataFrame:
+    """Evalúa todas las combinaciones de valores del análisis Costo - Volumen - Utilidad y regresa las mejores.
+
+    El producto cartesiano se recorre por bloques de índices, por lo que nunca se construye
+    la rejilla completa; de cada bloque sólo se conservan las mejores propuestas.
+
+    Args:
+        rangos (dict): Diccionario con los campos de CAMPOS_CVU y los valores a probar de cada uno.
+        top (int, optional): Cantidad de propuestas a regresar. Defaults to 10.
+        tamano_bloque (int, optional): Cantidad de combinaciones evaluadas a la vez. Defaults to 1_000_000.
+
+    Raises:
+        KeyError: Si falta algún campo.
+
+    Returns:
+        pd.DataFrame: Las mejores propuestas, ordenadas por Utilidad de Operación de mayor a menor,
+            con los valores de cada campo y su estado de resultados.
+    """
+
+    valores = [np.atleast_1d(np.asarray(rangos[campo], dtype=np.float64)) for campo in CAMPOS_CVU]
+    forma = tuple(len(valores_campo) for valores_campo in valores)
+    total = int(np.prod(forma))
+
+    mejores_indices = np.empty(0, dtype=np.int64)
+    mejores_utilidades = np.empty(0, dtype=np.float64)
+
+    for inicio in range(0, total, tamano_bloque):
+        indices = np.arange(inicio, min(inicio + tamano_bloque, total), dtype=np.int64)
+        propuesta = dict(zip(CAMPOS_CVU, (valores_campo[posiciones] for valores_campo, posiciones in zip(valores, np.unravel_index(indices, forma)))))
+
+        utilidades = resultado_cvu(propuesta)["Utilidad de Operación"]
+
+        #Juntamos los mejores del bloque con los mejores anteriores y nos quedamos con los primeros
+        indices = np.concatenate([mejores_indices, indices])
+        utilidades = np.concatenate([mejores_utilidades, utilidades])
+
+        if len(utilidades) > top:
+            seleccion = np.argpartition(-utilidades, top - 1)[:top]
+            indices, utilidades = indices[seleccion], utilidades[seleccion]
+
+        mejores_indices, mejores_utilidades = indices, utilidades
+
+    orden = np.argsort(-mejores_utilidades, kind='stable')
+    mejores_indices = mejores_indices[orden]
+
+    propuestas = {campo: valores_campo[posiciones] for campo, valores_campo, posiciones in zip(CAMPOS_CVU, valores, np.unravel_index(mejores_indices, forma))}
+
+    df_rejilla = pd.DataFrame({**propuestas, **resultado_cvu(propuestas)}, index=pd.RangeIndex(1, len(mejores_indices) + 1, name='Propuesta'))
+
+    return df_rejilla
+
+@trazar('interfaz')
+def analisis_cvu_rejilla() -> None:
+    """Interfaz para evaluar todas las combinaciones de variaciones del análisis Costo - Volumen - Utilidad."""
 
     print("\n")
-    mostrar_cuadro(['Bienvenido al análisis Costo - Volumen - Utilidad'])
+    mostrar_cuadro(['Rejilla de propuestas del análisis Costo - Volumen - Utilidad'])
+
+    actual = {}
+    for dato in CAMPOS_CVU:
+        mostrar_cuadro([f'Escriba el valor numérico de {dato}'], f'{dato}')
+        actual[dato] = pedir_numero(f"Valor numérico de {dato}: ", 0)
+
+    mostrar_aviso(['Para cada dato, escriba la variación mínima, la máxima y el paso en porcentaje.',
+                   'Por ejemplo: -10, 20 y 5 prueba -10%, -5%, 0%, 5%, ..., 20%.',
+                   'Se evaluarán todas las combinaciones posibles.'], tipo = "Información")
+
+    rangos = {}
+    for dato in CAMPOS_CVU:
+        mostrar_cuadro([f'Variación de {dato}'])
+        minimo = pedir_numero('Variación mínima (%): ', -100)
+        maximo = pedir_numero('Variación máxima (%): ', minimo)
+        paso = pedir_numero('Paso (%) (0 para no variar): ', 0)
+
+        rangos[dato] = actual[dato] * (1 + rango_valores(minimo, maximo, paso) / 100)
+
+    top = pedir_numero(f"{negrita('Cantidad de mejores propuestas a mostrar: ')}", 1)
+
+    total = int(np.prod([len(valores) for valores in rangos.values()]))
+    mostrar_aviso([f'Se evaluarán {total:,} combinaciones'], tipo = "Información")
+
+    df_rejilla = rejilla_cvu(rangos, top)
+
+    exportar_segundo_plano(df_rejilla, nombre_archivo="analisis_cvu_rejilla")
+
+    mostrar_cuadro(['Mejores propuestas por Utilidad de Operación'])
+    mostrar_tabla(df_rejilla.T)
+
+    pausar()
+
+#Distribuciones disponibles para la simulación, en el mismo orden que las opciones de la interfaz.
+#Sus parámetros son porcentajes respecto al valor actual.
+DISTRIBUCIONES_CVU = ['fija', 'normal', 'uniforme', 'triangular']
+
+#Percentiles que se reportan en la simulación
+PERCENTILES_SIMULACION = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+
+def muestrear_campo(generador, valor: float, distribucion: dict, cantidad: int) -> np.ndarray:
+    """Genera valores aleatorios de un campo alrededor de su valor actual.
+
+    Args:
+        generador (np.random.Generator): Generador de números aleatorios.
+        valor (float): Valor actual del campo.
+        distribucion (dict): Diccionario con "tipo" (uno de DISTRIBUCIONES_CVU) y sus parámetros en porcentaje:
+            "desviacion" para la normal, y "minimo" y "maximo" para la uniforme y la triangular.
+        cantidad (int): Cantidad de valores a generar.
+
+    Raises:
+        ValueError: Si la distribución no existe.
+
+    Returns:
+        np.ndarray: Valores generados.
+    """
+
+    match distribucion.get('tipo', 'fija'):
+        case 'fija':
+            return np.full(cantidad, valor, dtype=np.float64)
+        case 'normal':
+            return generador.normal(valor, abs(valor) * distribucion['desviacion'] / 100, cantidad)
+        case 'uniforme':
+            return generador.uniform(valor * (1 + distribucion['minimo'] / 100), valor * (1 + distribucion['maximo'] / 100), cantidad)
+        case 'triangular':
+            minimo = valor * (1 + distribucion['minimo'] / 100)
+            maximo = valor * (1 + distribucion['maximo'] / 100)
+
+            if minimo == maximo:
+                return np.full(cantidad, valor, dtype=np.float64)
+            return generador.triangular(minimo, valor, maximo, cantidad)
+        case tipo:
+            raise ValueError(f"Distribución desconocida: {tipo}")
+
+def simular_bloque_cvu(argumentos: tuple) -> tuple:
+    """Simula un bloque de escenarios del análisis Costo - Volumen - Utilidad.
+
+    Se ejecuta en los procesos de simular_cvu, por eso recibe sus argumentos en una sola tupla.
+
+    Args:
+        argumentos (tuple): Valores actuales, distribuciones, cantidad de escenarios, semilla del bloque
+            (np.random.SeedSequence) y límites y cantidad de intervalos del histograma.
+
+    Returns:
+        tuple: Cantidad de escenarios, media, suma de los cuadrados de las desviaciones respecto a la media,
+            cantidad de pérdidas, mínimo, máximo y conteos del histograma (incluyendo un intervalo
+            inicial y uno final para los valores fuera de los límites).
+    """
+
+    actual, distribuciones, cantidad, semilla, inferior, superior, intervalos = argumentos
+
+    generador = np.random.default_rng(semilla)
+    propuesta = {campo: muestrear_campo(generador, actual[campo], distribuciones.get(campo, {}), cantidad) for campo in CAMPOS_CVU}
+    utilidades = resultado_cvu(propuesta)["Utilidad de Operación"]
+
+    posiciones = np.floor((utilidades - inferior) * (intervalos / (superior - inferior)))
+    posiciones = np.clip(posiciones, -1, intervalos).astype(np.int64) + 1
+    conteos = np.bincount(posiciones, minlength=intervalos + 2)
+
+    #Las desviaciones se toman respecto a la media del bloque para no perder precisión
+    #cuando la media es grande comparada con la dispersión
+    media = float(utilidades.mean())
+
+    return (cantidad, media, float(np.square(utilidades - media).sum()), int(np.count_nonzero(utilidades < 0)),
+            float(utilidades.min()), float(utilidades.max()), conteos)
+
+@memoizar
+@trazar('calculo')
+def simular_cvu(actual: dict, distribuciones: dict, simulaciones: int = 1_000_000, semilla: int = 0,
+                trabajadores: int = None, tamano_bloque: int = 1_000_000, intervalos: int = 100_000) -> dict:
+    """Simulación Monte Carlo de la Utilidad de Operación del análisis Costo - Volumen - Utilidad.
+
+    Los escenarios se generan por bloques, cada uno con su propia semilla derivada de la semilla
+    principal, y los bloques se reparten entre varios procesos. El resultado sólo depende de la
+    semilla y del tamaño de bloque, no de la cantidad de procesos. Los percentiles se obtienen de
+    un histograma cuyos límites se fijan con un bloque piloto, por lo que tienen la resolución
+    de un intervalo del histograma.
+
+    Args:
+        actual (dict): Valores actuales de los campos de CAMPOS_CVU.
+        distribuciones (dict): Distribución de cada campo (ver muestrear_campo). Los campos omitidos se mantienen fijos.
+        simulaciones (int, optional): Cantidad de escenarios. Defaults to 1_000_000.
+        semilla (int, optional): Semilla para reproducir la simulación. Defaults to 0.
+        trabajadores (int, optional): Cantidad de procesos. Por defecto, uno por núcleo. Defaults to None.
+        tamano_bloque (int, optional): Cantidad de escenarios por bloque. Defaults to 1_000_000.
+        intervalos (int, optional): Cantidad de intervalos del histograma. Defaults to 100_000.
+
+    Returns:
+        dict: Simulaciones, utilidad esperada, desviación estándar, probabilidad de pérdida,
+            mínimo, máximo y un diccionario con los percentiles de PERCENTILES_SIMULACION.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    semillas = np.random.SeedSequence(semilla).spawn(-(-simulaciones // tamano_bloque) + 1)
+
+    #Bloque piloto para fijar los límites del histograma, con un margen para los extremos
+    piloto = simular_bloque_cvu((actual, distribuciones, min(simulaciones, 100_000), semillas[0], 0.0, 1.0, 1))
+    margen = max(piloto[5] - piloto[4], abs(piloto[5]), 1.0) * 0.5
+    inferior, superior = piloto[4] - margen, piloto[5] + margen
+
+    bloques = [(actual, distribuciones, min(tamano_bloque, simulaciones - inicio), semillas[numero + 1], inferior, superior, intervalos)
+               for numero, inicio in enumerate(range(0, simulaciones, tamano_bloque))]
+
+    trabajadores = min(trabajadores or os.cpu_count() or 1, len(bloques))
+
+    if trabajadores <= 1:
+        resultados = list(map(simular_bloque_cvu, bloques))
+    else:
+        with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+            resultados = list(ejecutor.map(simular_bloque_cvu, bloques))
+
+    #Se combinan la media y la suma de cuadrados de las desviaciones de cada bloque (fórmula de Chan et al.)
+    cantidad, media, desviaciones = 0, 0.0, 0.0
+    for cantidad_bloque, media_bloque, desviaciones_bloque, *_ in resultados:
+        total = cantidad + cantidad_bloque
+        diferencia = media_bloque - media
+        media += diferencia * cantidad_bloque / total
+        desviaciones += desviaciones_bloque + diferencia ** 2 * cantidad * cantidad_bloque / total
+        cantidad = total
+
+    perdidas = sum(resultado[3] for resultado in resultados)
+    minimo = min(resultado[4] for resultado in resultados)
+    maximo = max(resultado[5] for resultado in resultados)
+    conteos = np.sum([resultado[6] for resultado in resultados], axis=0)
+
+    varianza = desviaciones / simulaciones
+
+    #Percentiles interpolados dentro del intervalo del histograma en el que caen
+    bordes = np.concatenate([[minimo], np.linspace(inferior, superior, intervalos + 1), [maximo]])
+    bordes = np.clip(bordes, minimo, maximo)
+    acumulado = np.cumsum(conteos)
+    percentiles = {}
+
+    for percentil in PERCENTILES_SIMULACION:
+        objetivo = percentil / 100 * simulaciones
+        intervalo = int(np.searchsorted(acumulado, objetivo))
+        anterior = acumulado[intervalo - 1] if intervalo > 0 else 0
+        fraccion = (objetivo - anterior) / conteos[intervalo] if conteos[intervalo] else 0.0
+        percentiles[percentil] = float(bordes[intervalo] + fraccion * (bordes[intervalo + 1] - bordes[intervalo]))
+
+    return {
+        "simulaciones": simulaciones,
+        "utilidad_esperada": media,
+        "desviacion_estandar": varianza ** 0.5,
+        "probabilidad_perdida": perdidas / simulaciones,
+        "minimo": minimo,
+        "maximo": maximo,
+        "percentiles": percentiles
+    }
+
+def tabla_simulacion_cvu(resultado: dict) -> pd.DataFrame:
+    """Convierte el resultado de simular_cvu en una tabla de una columna.
+
+    Args:
+        resultado (dict): Resultado de simular_cvu.
+
+    Returns:
+        pd.DataFrame: Tabla con una fila por indicador.
+    """
+
+    indicadores = {
+        'Simulaciones': resultado['simulaciones'],
+        'Utilidad esperada': resultado['utilidad_esperada'],
+        'Desviación estándar': resultado['desviacion_estandar'],
+        'Probabilidad de pérdida (%)': resultado['probabilidad_perdida'] * 100,
+        'Mínimo': resultado['minimo'],
+        'Máximo': resultado['maximo'],
+        **{f'Percentil {percentil}': valor for percentil, valor in resultado['percentiles'].items()}
+    }
+
+    return pd.DataFrame({'Utilidad de Operación': indicadores})
+
+@trazar('interfaz')
+def analisis_cvu_simulacion() -> None:
+    """Interfaz para la simulación Monte Carlo del análisis Costo - Volumen - Utilidad."""
+
+    print("\n")
+    mostrar_cuadro(['Simulación de riesgo del análisis Costo - Volumen - Utilidad'])
+
+    actual = {}
+    for dato in CAMPOS_CVU:
+        mostrar_cuadro([f'Escriba el valor numérico de {dato}'], f'{dato}')
+        actual[dato] = pedir_numero(f"Valor numérico de {dato}: ", 0)
+
+    distribuciones = {}
+    for dato in CAMPOS_CVU:
+        contenido = [
+            '(1) - Fijo (sin incertidumbre)',
+            '(2) - Normal (desviación en %)',
+            '(3) - Uniforme (mínimo y máximo en %)',
+            '(4) - Triangular (mínimo y máximo en %, con el valor actual como moda)'
+        ]
+        mostrar_cuadro(contenido, f"¿Cómo varía {dato}?")
+
+        opcion = pedir_numero(f"{negrita('Escriba el número de la opción que vas a escoger: ')}", 1, 4)
+        distribucion = {'tipo': DISTRIBUCIONES_CVU[opcion - 1]}
+
+        match opcion:
+            case 2:
+                distribucion['desviacion'] = pedir_numero('Desviación estándar (%): ', 0)
+            case 3 | 4:
+                distribucion['minimo'] = pedir_numero('Variación mínima (%): ', -100, 0)
+                distribucion['maximo'] = pedir_numero('Variación máxima (%): ', 0)
+
+        distribuciones[dato] = distribucion
+
+    simulaciones = pedir_numero(f"{negrita('Cantidad de escenarios a simular: ')}", 1)
+    semilla = pedir_numero(f"{negrita('Semilla (para reproducir el resultado): ')}", 0)
+
+    resultado = simular_cvu(actual, distribuciones, simulaciones, semilla)
+    df_simulacion = tabla_simulacion_cvu(resultado)
+
+    exportar_segundo_plano(df_simulacion, nombre_archivo="analisis_cvu_simulacion")
+
+    contenido = [
+        f'Utilidad esperada: ${resultado["utilidad_esperada"]:,.2f}',
+        f'Probabilidad de pérdida: {resultado["probabilidad_perdida"]:.2%}',
+        f'Percentiles 5 - 95: ${resultado["percentiles"][5]:,.2f} a ${resultado["percentiles"][95]:,.2f}'
+    ]
+    mostrar_aviso(contenido, tipo = 'Resultado')
+
+    mostrar_cuadro(['Distribución de la Utilidad de Operación'])
+    mostrar_tabla(df_simulacion)
+
+    pausar()
+
+######################## PRESUPUESTO DE VENTAS Y PRODUCCIÓN ########################
+
+def presupuesto_ventas_produccion_menu() -> None:
+    """Muestra al usuario un menú para escoger el presupuesto que hará."""
+
+    titulo = "Presupuesto de ventas y producción"
+    subtitulo = "Escoja el tipo de cálculo que le gustaría realizar"
+    contenido = ['(1) - Presupuesto de ventas',
+        '(2) - Presupuesto de producción',
+        '(3) - Presupuesto de producción multiperiodo (desde archivo)',
+        '(4) - Edición de un presupuesto producto por producto (desde archivo)',
+        '(5) - Regresar al menú principal']
+
+    while True:
+        atender_exportaciones()
+        mostrar_cuadro(contenido, titulo, subtitulo)
+        opcion = pedir_numero('Escriba el número de la opción: ', 1, 5)
+
+        match opcion:
+            case 1:
+                presupuesto_ventas()
+            case 2:
+                presupuesto_producción()
+            case 3:
+                presupuesto_produccion_multiperiodo_interfaz()
+            case 4:
+                presupuesto_incremental_interfaz()
+            case 5:
+                return
+
+
+@memoizar
+@trazar('calculo')
+def calcular_presupuesto_ventas(productos: pd.DataFrame, escala: int = None, redondeo: str = REDONDEO_DINERO) -> pd.DataFrame:
+    """Calcula el presupuesto de ventas.
+
+    Args:
+        productos (pd.DataFrame): Tabla con un producto por fila (el índice es el nombre del producto)
+            y las columnas pronostico_ventas y precio_unitario.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Returns:
+        pd.DataFrame: Tabla larga compacta (ver compactar_tabla) con un producto por fila y las columnas
+            'Pronóstico de ventas', 'Precio unitario' y 'Ventas presupuestadas'.
+    """
+
+    if escala is None:
+        producto = ProductoPresupuesto(productos.index, productos['pronostico_ventas'], productos['precio_unitario'])
+        ventas_presupuestadas = presupuesto_producto(producto).ventas_presupuestadas
+    else:
+        validar_aritmetica(escala, redondeo)
+        precio = Dinero.desde(productos['precio_unitario'], escala, redondeo)
+        ventas_presupuestadas = pd.Series(precio.multiplicar(productos['pronostico_ventas'], redondeo).a_flotante(), index=productos.index)
+
+    df_datos = pd.DataFrame({
+        'Pronóstico de ventas': productos['pronostico_ventas'],
+        'Precio unitario': productos['precio_unitario'],
+        'Ventas presupuestadas': ventas_presupuestadas
+    })
+
+    return compactar_tabla(df_datos)
+
+@memoizar
+@trazar('calculo')
+def calcular_presupuesto_produccion(productos: pd.DataFrame) -> pd.DataFrame:
+    """Calcula el presupuesto de producción; la fila de total se agrega al mostrarlo o exportarlo (ver agregar_total).
+
+    Args:
+        productos (pd.DataFrame): Tabla con un producto por fila (el índice es el nombre del producto)
+            y las columnas ventas, inventario_final e inventario_inicial.
+
+    Returns:
+        pd.DataFrame: Tabla larga compacta (ver compactar_tabla) con un producto por fila y las columnas
+            'Pronóstico de ventas', 'Inventario final', 'Inventario inicial' y 'Producción requerida'.
+    """
+
+    producto = ProductoPresupuesto(productos.index, productos['ventas'], 1.0, productos['inventario_final'], productos['inventario_inicial'])
+
+    df_datos_produccion = pd.DataFrame({
+        'Pronóstico de ventas': productos['ventas'],
+        'Inventario final': productos['inventario_final'],
+        'Inventario inicial': productos['inventario_inicial'],
+        'Producción requerida': presupuesto_producto(producto).produccion_requerida
+    })
+
+    return compactar_tabla(df_datos_produccion)
+
+@trazar('interfaz')
+def presupuesto_ventas(exportar: bool = False) -> None | dict:
+    """Muestra una interfaz al usuario para realizar el presupuesto de ventas.
+
+    Args:
+        exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
+
+    Returns:
+        None | dict: None si no se expecifica que se quiere exportar el diccionario o si el cálculo falló.
+    """
+
+    mostrar_cuadro(['Escriba la cantidad de productos que tiene'])
+    num_productos = pedir_numero('Cantidad de productos: ', 0)
+
+    datos = {}
+
+    for producto in range(0, num_productos):
+        mostrar_cuadro([f'Producto {producto + 1}'])
+        nombre = pedir_campo('Escriba el nombre del producto: ')
+        pronostico_ventas = pedir_numero('Pronóstico de ventas: ', 0)
+        precio_unitario = pedir_numero('Precio unitario (escriba el número 1 si no tiene este dato): ', 1)
+
+        datos[nombre] = {
+            "pronostico_ventas": pronostico_ventas,
+            "precio_unitario": precio_unitario
+        }
+
+    with etapa('construccion', filas=len(datos)):
+        productos = pd.DataFrame.from_dict(datos, orient='index', columns=['pronostico_ventas', 'precio_unitario'])
+
+    try:
+        df_datos = calcular_presupuesto_ventas(productos, **ARITMETICA_DINERO)
+    except OverflowError as e:
+        print(f"{negrita('Error')}: {e}.")
+        return None
+
+    registrar_ejecucion('presupuesto_ventas', {'productos': [{'nombre': nombre, **valores} for nombre, valores in datos.items()]},
+                        {'presupuesto_ventas': df_datos})
+
+    exportar_segundo_plano(df_datos, nombre_archivo="presupuesto_ventas")
+
+    mostrar_cuadro(['Resultado del presupuesto de ventas'])
+    mostrar_tabla(df_datos)
+
+    pausar()
+
+    if exportar:
+        return df_datos.to_dict(orient='index')
+
+@trazar('interfaz')
+def presupuesto_producción() -> None:
+    """Muestra una interfaz al usuario para la realización del presupuesto de producción."""
+
+    mostrar_aviso(['Primero usted deberá realizar el presupuesto de ventas,'
+                   'debido a que se requieren ciertos datos de este.'], tipo = "Información")
+    datos_ventas = presupuesto_ventas(exportar = True)
+
+    if datos_ventas is None:
+        return
+
+    mostrar_aviso(['A continuación, se iniciará el proceso del presupuesto de producción'], tipo = "Información")
+    datos_produccion = {}
+
+    for producto, informacion in datos_ventas.items():
+        mostrar_cuadro([f'Producto {producto}'])
+        ventas = informacion['Ventas presupuestadas']
+        inventario_final = pedir_numero('Escriba el inventario final deseado de producto terminado: ', 0)
+        inventario_inicial = pedir_numero('Escriba el inventario inicial de producto terminado: ', 0)
+
+        datos_produccion[producto] = {
+            "ventas": ventas,
+            "inventario_final": inventario_final,
+            "inventario_inicial": inventario_inicial
+        }
+
+    with etapa('construccion', filas=len(datos_produccion)):
+        productos = pd.DataFrame.from_dict(datos_produccion, orient='index', columns=['ventas', 'inventario_final', 'inventario_inicial'])
+
+    df_datos_producción = calcular_presupuesto_produccion(productos)
+    registrar_ejecucion('presupuesto_produccion', {'productos': [{'nombre': nombre, **valores} for nombre, valores in datos_produccion.items()]},
+                        {'presupuesto_produccion': df_datos_producción})
+
+    df_datos_producción = agregar_total(df_datos_producción)
+    exportar_segundo_plano(df_datos_producción, nombre_archivo="presupuesto_producción")
+
+    mostrar_cuadro(['Resultado del presupuesto de producción'])
+    mostrar_tabla(df_datos_producción)
+
+    pausar()
+
+@memoizar
+@trazar('calculo')
+def presupuesto_produccion_multiperiodo(ventas: pd.DataFrame, inventario_inicial=0, inventario_final: pd.DataFrame = None,
+                                        cobertura=None) -> dict[str, pd.DataFrame]:
+    """Calcula el presupuesto de producción de varios periodos, arrastrando el inventario de un periodo al siguiente.
+
+    El inventario inicial de cada periodo es el inventario final del periodo anterior y la producción
+    requerida es ventas + inventario final - inventario inicial, calculada para todos los productos y
+    periodos a la vez. El inventario final se toma de inventario_final o, si no se especifica,
+    de la política de cobertura: un porcentaje de las ventas del siguiente periodo (en el último
+    periodo, de sus propias ventas).
+
+    Args:
+        ventas (pd.DataFrame): Ventas con un producto por fila y un periodo por columna.
+        inventario_inicial (float | pd.Series, optional): Inventario inicial del primer periodo, igual para todos
+            los productos o por producto. Defaults to 0.
+        inventario_final (pd.DataFrame, optional): Inventario final deseado, con la misma forma que ventas. Defaults to None.
+        cobertura (float | pd.Series, optional): Porcentaje (0 - 100) de las ventas del siguiente periodo que
+            se quiere tener como inventario final, igual para todos los productos o por producto. Defaults to None.
+
+    Raises:
+        ValueError: Si no se especifica inventario_final ni cobertura.
+
+    Returns:
+        dict[str, pd.DataFrame]: Tablas "produccion", "inventario_inicial", "inventario_final" y
+            "produccion_acumulada" (un producto por fila y un periodo por columna; la fila de total se agrega
+            al mostrarlas o exportarlas, ver agregar_total), y "resumen" con los totales de cada concepto por periodo.
+    """
+
+    matriz_ventas = ventas.to_numpy(dtype=np.float64)
+
+    if inventario_final is not None:
+        matriz_inventario_final = inventario_final.reindex(index=ventas.index, columns=ventas.columns).to_numpy(dtype=np.float64)
+    elif cobertura is not None:
+        if isinstance(cobertura, pd.Series):
+            cobertura = cobertura.reindex(ventas.index).to_numpy(dtype=np.float64)[:, np.newaxis]
+
+        #Las ventas del siguiente periodo; el último periodo usa las suyas
+        ventas_siguientes = np.concatenate([matriz_ventas[:, 1:], matriz_ventas[:, -1:]], axis=1)
+        matriz_inventario_final = ventas_siguientes * (np.asarray(cobertura, dtype=np.float64) / 100)
+    else:
+        raise ValueError("Se requiere el inventario final o la cobertura")
+
+    if isinstance(inventario_inicial, pd.Series):
+        inventario_inicial = inventario_inicial.reindex(ventas.index).fillna(0).to_numpy(dtype=np.float64)
+
+    #El inventario inicial de cada periodo es el final del anterior
+    primer_inventario = np.broadcast_to(np.asarray(inventario_inicial, dtype=np.float64), (len(ventas),))
+    matriz_inventario_inicial = np.concatenate([primer_inventario[:, np.newaxis], matriz_inventario_final[:, :-1]], axis=1)
+
+    matriz_produccion = (matriz_ventas + matriz_inventario_final) - matriz_inventario_inicial
+
+    def tabla(matriz: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(matriz, index=ventas.index, columns=ventas.columns)
+
+    tablas = {
+        "produccion": tabla(matriz_produccion),
+        "inventario_inicial": tabla(matriz_inventario_inicial),
+        "inventario_final": tabla(matriz_inventario_final),
+        "produccion_acumulada": tabla(np.cumsum(matriz_produccion, axis=1))
+    }
+
+    tablas["resumen"] = pd.DataFrame({
+        'Pronóstico de ventas': matriz_ventas.sum(axis=0),
+        'Inventario final': matriz_inventario_final.sum(axis=0),
+        'Inventario inicial': matriz_inventario_inicial.sum(axis=0),
+        'Producción requerida': matriz_produccion.sum(axis=0)
+    }, index=ventas.columns).T
+
+    return tablas
+
+@trazar('interfaz')
+def presupuesto_produccion_multiperiodo_interfaz() -> None:
+    """Interfaz para el presupuesto de producción de varios periodos a partir de un archivo de ventas."""
+
+    mostrar_aviso(['El archivo debe tener una fila por producto: la primera columna es el nombre',
+                   'y cada columna siguiente son las ventas de un periodo. Si tiene la columna',
+                   'inventario_inicial, se usa como inventario inicial del primer periodo.'], tipo = "Información")
+
+    mostrar_cuadro(['Escriba la ruta del archivo de ventas (.csv o .xlsx)'])
+    ruta = pedir_campo('Ruta del archivo: ')
+
+    try:
+        ventas = leer_tabla(ruta)
+    except (OSError, ValueError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    ventas = ventas.set_index(ventas.columns[0])
+    inventario_inicial = ventas.pop('inventario_inicial') if 'inventario_inicial' in ventas.columns else None
+
+    mostrar_cuadro(['Escriba la política de inventario final'])
+    cobertura = pedir_numero('Porcentaje de las ventas del siguiente periodo a tener en inventario final: ', 0)
+
+    if inventario_inicial is None:
+        #Sin dato, se supone que el primer periodo empieza con la misma cobertura
+        inventario_inicial = ventas.iloc[:, 0] * (cobertura / 100)
+
+    tablas = presupuesto_produccion_multiperiodo(ventas, inventario_inicial, cobertura=cobertura)
+
+    produccion, inventario_inicial, inventario_final = (agregar_total(tablas[nombre]) for nombre in ('produccion', 'inventario_inicial', 'inventario_final'))
+    exportar_segundo_plano(produccion, inventario_inicial, inventario_final, tablas["resumen"],
+                           nombre_archivo="presupuesto_producción_multiperiodo")
+
+    mostrar_cuadro(['Producción requerida por periodo'])
+    mostrar_tabla(produccion)
+
+    mostrar_cuadro(['Resumen por periodo'])
+    mostrar_tabla(tablas["resumen"])
+
+    pausar()
+
+CAMPOS_PRESUPUESTO_INCREMENTAL = ['pronostico_ventas', 'precio_unitario', 'inventario_final', 'inventario_inicial', 'costo_materia_prima_unidad']
+
+class PresupuestoIncremental:
+    """Presupuesto de ventas, producción y compras que se actualiza producto por producto.
+
+    Cada producto guarda sus datos y sus conceptos calculados, y los totales se ajustan sólo con la
+    diferencia del producto modificado, por lo que insertar, cambiar o quitar un producto cuesta lo mismo
+    sin importar el tamaño del catálogo. Cada total se lleva como sumas parciales sin error de redondeo
+    (como math.fsum), así que después de cualquier serie de cambios es la suma correctamente redondeada
+    de los productos actuales. Las compras presupuestadas son la producción requerida por el costo de
+    materia prima por unidad del producto.
+    """
+
+    #Concepto de la tabla y la columna de datos de la que sale, o None si es calculado
+    CONCEPTOS = {
+        'Pronóstico de ventas': 'pronostico_ventas',
+        'Precio unitario': 'precio_unitario',
+        'Ventas presupuestadas': None,
+        'Inventario final': 'inventario_final',
+        'Inventario inicial': 'inventario_inicial',
+        'Producción requerida': None,
+        'Costo de materia prima por unidad': 'costo_materia_prima_unidad',
+        'Compras presupuestadas': None
+    }
+
+    #Conceptos que tienen total; los precios y costos unitarios no se suman
+    CONCEPTOS_TOTAL = ['Pronóstico de ventas', 'Ventas presupuestadas', 'Inventario final', 'Inventario inicial',
+                       'Producción requerida', 'Compras presupuestadas']
+
+    def __init__(self, productos: pd.DataFrame = None):
+        """Crea el presupuesto, opcionalmente con una tabla inicial de productos.
+
+        Args:
+            productos (pd.DataFrame, optional): Tabla con un producto por fila (el índice es el nombre)
+                y las columnas de CAMPOS_PRESUPUESTO_INCREMENTAL; las faltantes se toman como 0,
+                salvo precio_unitario que se toma como 1. Defaults to None.
+
+        Raises:
+            ValueError: Si la tabla tiene productos repetidos.
+        """
+
+        self.productos = {}
+        self.totales = dict.fromkeys(self.CONCEPTOS_TOTAL, 0.0)
+        self.parciales = {concepto: [] for concepto in self.CONCEPTOS_TOTAL}
+
+        if productos is not None:
+            repetidos = productos.index[productos.index.duplicated()].unique()
+            if len(repetidos):
+                raise ValueError(f"Productos repetidos: {', '.join(map(str, repetidos))}")
+
+            for nombre, fila in productos.reindex(columns=CAMPOS_PRESUPUESTO_INCREMENTAL).to_dict('index').items():
+                #Los datos vacíos toman su valor por defecto (NaN no es igual a sí mismo)
+                self.insertar(nombre, **{campo: valor for campo, valor in fila.items() if valor == valor})
+
+    @classmethod
+    def conceptos(cls, datos: dict) -> dict:
+        """Calcula todos los conceptos de un producto a partir de sus datos.
+
+        Args:
+            datos (dict): Datos del producto con las llaves de CAMPOS_PRESUPUESTO_INCREMENTAL.
+
+        Returns:
+            dict: Diccionario con el concepto y su valor.
+        """
+
+        valores = {concepto: datos[campo] for concepto, campo in cls.CONCEPTOS.items() if campo}
+
+        presupuesto = presupuesto_producto(ProductoPresupuesto(None, datos['pronostico_ventas'], datos['precio_unitario'],
+                                                               datos['inventario_final'], datos['inventario_inicial']))
+
+        #La materia prima de cada producto se trata como un solo componente de una unidad por producto, sin inventarios
+        compras = necesidad_componente(presupuesto.produccion_requerida, Componente(None, 1.0, costo_materia_prima=datos['costo_materia_prima_unidad']))
+
+        valores['Ventas presupuestadas'] = presupuesto.ventas_presupuestadas
+        valores['Producción requerida'] = presupuesto.produccion_requerida
+        valores['Compras presupuestadas'] = compras.compras_presupuestadas
+
+        return {concepto: valores[concepto] for concepto in cls.CONCEPTOS}
+
+    @staticmethod
+    def acumular(parciales: list[float], valor: float) -> float:
+        """Suma un valor a una lista de sumas parciales sin perder los errores de redondeo.
+
+        Es el mismo algoritmo de math.fsum (Shewchuk): las parciales no se traslapan y su suma exacta
+        es la suma exacta de todos los valores acumulados.
+
+        Args:
+            parciales (list[float]): Sumas parciales del total; se modifica en su lugar.
+            valor (float): Valor a sumar (negativo para restar).
+
+        Returns:
+            float: El total correctamente redondeado.
+        """
+
+        i = 0
+        for parcial in parciales:
+            if abs(valor) < abs(parcial):
+                valor, parcial = parcial, valor
+
+            suma = valor + parcial
+            error = parcial - (suma - valor)
+
+            if error:
+                parciales[i] = error
+                i += 1
+
+            valor = suma
+
+        parciales[i:] = [valor]
+
+        return math.fsum(parciales)
+
+    def aplicar(self, nombre, nuevos: dict | None) -> dict:
+        """Reemplaza los conceptos de un producto y ajusta los totales con la diferencia.
+
+        Args:
+            nombre: Nombre del producto.
+            nuevos (dict | None): Conceptos nuevos del producto, o None para quitarlo.
+
+        Returns:
+            dict: Celdas que cambiaron, con la llave (producto, concepto) y el valor nuevo (None si la celda se quitó).
+                Los totales usan la llave (None, concepto), para no confundirlos con un producto llamado "Total".
+        """
+
+        anteriores = self.productos.pop(nombre, {}).get('conceptos', {})
+        cambios = {}
+
+        for concepto in self.CONCEPTOS:
+            anterior = anteriores.get(concepto)
+            nuevo = None if nuevos is None else nuevos[concepto]
+
+            if anterior == nuevo:
+                continue
+
+            cambios[(nombre, concepto)] = nuevo
+
+            #Se suma el valor nuevo y se resta el anterior por separado; restarlos antes redondearía la diferencia
+            if concepto in self.totales:
+                self.acumular(self.parciales[concepto], -(anterior or 0))
+                self.totales[concepto] = self.acumular(self.parciales[concepto], nuevo or 0)
+                cambios[(None, concepto)] = self.totales[concepto]
+
+        return cambios
+
+    def insertar(self, nombre, pronostico_ventas: float = 0, precio_unitario: float = 1, inventario_final: float = 0,
+                 inventario_inicial: float = 0, costo_materia_prima_unidad: float = 0) -> dict:
+        """Agrega un producto o reemplaza todos sus datos.
+
+        Args:
+            nombre: Nombre del producto.
+            pronostico_ventas (float, optional): Pronóstico de ventas en unidades. Defaults to 0.
+            precio_unitario (float, optional): Precio unitario. Defaults to 1.
+            inventario_final (float, optional): Inventario final deseado de producto terminado. Defaults to 0.
+            inventario_inicial (float, optional): Inventario inicial de producto terminado. Defaults to 0.
+            costo_materia_prima_unidad (float, optional): Costo de materia prima por unidad producida. Defaults to 0.
+
+        Returns:
+            dict: Celdas que cambiaron, con la llave (producto, concepto) y el valor nuevo.
+        """
+
+        datos = {
+            'pronostico_ventas': float(pronostico_ventas),
+            'precio_unitario': float(precio_unitario),
+            'inventario_final': float(inventario_final),
+            'inventario_inicial': float(inventario_inicial),
+            'costo_materia_prima_unidad': float(costo_materia_prima_unidad)
+        }
+
+        conceptos = self.conceptos(datos)
+        cambios = self.aplicar(nombre, conceptos)
+        self.productos[nombre] = {'datos': datos, 'conceptos': conceptos}
+
+        return cambios
+
+    def actualizar(self, nombre, **campos) -> dict:
+        """Cambia algunos datos de un producto existente.
+
+        Args:
+            nombre: Nombre del producto.
+            **campos: Datos a cambiar, con los nombres de CAMPOS_PRESUPUESTO_INCREMENTAL.
+
+        Raises:
+            KeyError: Si el producto no existe o algún dato no es válido.
+
+        Returns:
+            dict: Celdas que cambiaron, con la llave (producto, concepto) y el valor nuevo.
+        """
+
+        desconocidos = [campo for campo in campos if campo not in CAMPOS_PRESUPUESTO_INCREMENTAL]
+        if desconocidos:
+            raise KeyError(f"Datos desconocidos: {', '.join(desconocidos)}")
+
+        return self.insertar(nombre, **{**self.productos[nombre]['datos'], **campos})
+
+    def eliminar(self, nombre) -> dict:
+        """Quita un producto del presupuesto.
+
+        Args:
+            nombre: Nombre del producto.
+
+        Raises:
+            KeyError: Si el producto no existe.
+
+        Returns:
+            dict: Celdas que cambiaron, con la llave (producto, concepto) y None en las celdas del producto.
+        """
+
+        if nombre not in self.productos:
+            raise KeyError(nombre)
+
+        return self.aplicar(nombre, None)
+
+    def tabla(self) -> pd.DataFrame:
+        """Construye la tabla completa del presupuesto.
+
+        Returns:
+            pd.DataFrame: Tabla con un producto por columna, la columna "Total" al final y una fila por concepto.
+        """
+
+        conceptos = list(self.CONCEPTOS)
+        productos = pd.DataFrame({nombre: producto['conceptos'] for nombre, producto in self.productos.items()}, index=conceptos)
+
+        #El total se agrega como otra columna para que un producto llamado "Total" no se sobrescriba
+        return pd.concat([productos, pd.Series(self.totales, index=conceptos, name='Total')], axis=1)
+
+@trazar('interfaz')
+def presupuesto_incremental_interfaz() -> None:
+    """Interfaz para editar producto por producto un presupuesto de ventas, producción y compras cargado desde un archivo."""
+
+    mostrar_aviso(['El archivo debe tener la columna producto y puede tener pronostico_ventas,',
+                   'precio_unitario, inventario_final, inventario_inicial y costo_materia_prima_unidad'], tipo = "Información")
+
+    mostrar_cuadro(['Escriba la ruta del archivo (.csv o .xlsx)'])
+    ruta = pedir_campo('Ruta del archivo: ')
+
+    try:
+        presupuesto = PresupuestoIncremental(leer_tabla(ruta).set_index('producto'))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    contenido = ['(1) - Agregar o cambiar un producto',
+                 '(2) - Quitar un producto',
+                 '(3) - Terminar y exportar']
+
+    while True:
+        mostrar_aviso([f'Productos: {len(presupuesto.productos):,}',
+                       f'Ventas presupuestadas: {presupuesto.totales["Ventas presupuestadas"]:,.2f}',
+                       f'Producción requerida: {presupuesto.totales["Producción requerida"]:,.2f}',
+                       f'Compras presupuestadas: {presupuesto.totales["Compras presupuestadas"]:,.2f}'], tipo = 'Resultado')
+
+        mostrar_cuadro(contenido, 'Edición del presupuesto', 'Escoja el cambio que quiere hacer')
+        opcion = pedir_numero('Escriba el número de la opción: ', 1, 3)
+
+        match opcion:
+            case 1:
+                nombre = pedir_campo('Escriba el nombre del producto: ')
+                cambios = presupuesto.insertar(nombre,
+                                               pedir_numero('Pronóstico de ventas: ', 0),
+                                               pedir_numero('Precio unitario (escriba el número 1 si no tiene este dato): ', 1),
+                                               pedir_numero('Escriba el inventario final deseado de producto terminado: ', 0),
+                                               pedir_numero('Escriba el inventario inicial de producto terminado: ', 0),
+                                               pedir_numero('Escriba el costo de materia prima por unidad: ', 0))
+            case 2:
+                nombre = pedir_campo('Escriba el nombre del producto: ')
+
+                try:
+                    cambios = presupuesto.eliminar(nombre)
+                except KeyError:
+                    print(f"{negrita('Error')}: no existe el producto {nombre}")
+                    continue
+            case 3:
+                break
+
+        if cambios:
+            mostrar_aviso([f'{"Total" if producto is None else producto} - {concepto}: {"(quitado)" if valor is None else f"{valor:,.2f}"}'
+                           for (producto, concepto), valor in cambios.items()], tipo = 'Resultado')
+
+    df_datos = presupuesto.tabla()
+
+    exportar_segundo_plano(df_datos, nombre_archivo="presupuesto_incremental")
+
+    mostrar_tabla(df_datos)
+
+    pausar()
+
+######################## PRESUPUESTO DE NECESIDADES DE MATERIAS PRIMAS Y COMPRAS ########################
+
+def presupuesto_necesidades_menu() -> None:
+    """Muestra un menú para iniciar el prespuesto de necesidades de materias primas y compras."""
+
+    titulo = "Presupuesto de necesidades de materias primas y compras"
+    subtitulo = "Escoja el tipo de cálculo que le gustaría realizar"
+    contenido = ['(1) - Presupuesto de necesidades de materias primas y compras',
+            '(2) - Explosión de materiales de todo el catálogo (desde archivos)',
+            '(3) - Simulación de cambios en la lista de materiales (desde archivos)',
+            '(4) - Regresar al menú principal']
+
+    while True:
+        atender_exportaciones()
+        mostrar_cuadro(contenido, titulo, subtitulo)
+        opcion = pedir_numero('Escriba el número de la opción: ', 1, 4)
+
+        match opcion:
+            case 1:
+                presupuesto_necesidades()
+            case 2:
+                explosion_materiales_interfaz()
+            case 3:
+                explosion_materiales_simulacion()
+            case 4:
+                return
+
+@memoizar
+@trazar('calculo')
+def calcular_presupuesto_necesidades(produccion_requerida: float, componentes: pd.DataFrame, escala: int = None,
+                                     redondeo: str = REDONDEO_DINERO) -> pd.DataFrame:
+    """Calcula el presupuesto de necesidades de materias primas y compras de un producto.
+
+    Con dinero exacto, la materia prima requerida se toma con hasta 6 decimales y las compras
+    se redondean una sola vez.
+
+    Args:
+        produccion_requerida (float): Producción requerida del producto.
+        componentes (pd.DataFrame): Tabla con un componente por fila (el índice es el nombre del componente)
+            y las columnas materia_prima_unidad, inventario_final, inventario_inicial y costo_materia_prima.
+        escala (int, optional): Unidades mínimas por peso para calcular con dinero exacto; None para usar flotantes. Defaults to None.
+        redondeo (str, optional): Regla de redondeo del dinero exacto (ver REDONDEOS). Defaults to REDONDEO_DINERO.
+
+    Returns:
+        pd.DataFrame: Tabla larga compacta (ver compactar_tabla) con un componente por fila y una columna
+            por concepto del presupuesto.
+    """
+
+    componente = Componente(componentes.index, *(componentes[columna] for columna in
+                                                 ('materia_prima_unidad', 'inventario_final', 'inventario_inicial', 'costo_materia_prima')))
+    necesidad = necesidad_componente(produccion_requerida, componente)
+    materia_prima_produccion = necesidad.materia_prima_produccion
+    materia_prima_requerida = necesidad.materia_prima_requerida
+
+    if escala is None:
+        compras_presupuestadas = necesidad.compras_presupuestadas
+    else:
+        validar_aritmetica(escala, redondeo)
+        costo = Dinero.desde(componentes['costo_materia_prima'], escala, redondeo)
+        compras_presupuestadas = pd.Series(costo.multiplicar(materia_prima_requerida, redondeo).a_flotante(), index=componentes.index)
+
+    df_datos = pd.DataFrame({
+        'Materia prima por unidad': componentes['materia_prima_unidad'],
+        'Materia prima para la producción': materia_prima_produccion,
+        'Inventario final deseado de materia prima': componentes['inventario_final'],
+        'Inventario inicial de materia prima': componentes['inventario_inicial'],
+        'Materia prima requerida': materia_prima_requerida,
+        'Costo de materia prima': componentes['costo_materia_prima'],
+        'Compras presupuestadas': compras_presupuestadas
+    })
+
+    return compactar_tabla(df_datos, 'Componente')
+
+@trazar('interfaz')
+def presupuesto_necesidades() -> None:
+    """Se le muestra una interfaz al usuario para la realización del presupuesto de necesidades de materias primas y compras."""
+
+    mostrar_aviso(['En este programa, este presupuesto se hará por producto',
+                   'por lo que puede requerir hacerlo muchas veces',
+                   'si tiene muchos productos.'])
+
+    mostrar_cuadro(['Escriba la producción requerida para el producto'])
+    produccion_requerida = pedir_numero('Producción requerida: ', 0)
+
+    mostrar_cuadro(['Escriba la cantidad de componentes (o ingredientes) que utiliza para fabricar el producto'])
+    num_componentes = pedir_numero('Cantidad de componentes: ', 0)
+
+    datos = {}
+
+    for componente in range(0, num_componentes):
+        mostrar_cuadro([f'Componente {componente + 1}'])
+        nombre = pedir_campo('Escriba el nombre del componente: ')
+        materia_prima_unidad = pedir_numero('Escriba la materia prima por unidad: ', 0)
+        inventario_final = pedir_numero('Escriba el inventario final deseado de materia prima: ', 0)
+        inventario_inicial = pedir_numero('Escriba el inventario inicial de materia prima: ', 0)
+        costo_materia_prima = pedir_numero('Escriba el costo de materia prima: ', 0)
+
+        datos[nombre] = {
+            "materia_prima_unidad": materia_prima_unidad,
+            "inventario_final": inventario_final,
+            "inventario_inicial": inventario_inicial,
+            "costo_materia_prima": costo_materia_prima
+        }
+
+    columnas = ['materia_prima_unidad', 'inventario_final', 'inventario_inicial', 'costo_materia_prima']
+    with etapa('construccion', filas=len(datos)):
+        componentes = pd.DataFrame.from_dict(datos, orient='index', columns=columnas)
+
+    try:
+        df_datos = calcular_presupuesto_necesidades(produccion_requerida, componentes, **ARITMETICA_DINERO)
+    except OverflowError as e:
+        print(f"{negrita('Error')}: {e}.")
+        return
+
+    registrar_ejecucion('presupuesto_necesidades', {'produccion_requerida': produccion_requerida,
+                                                    'componentes': [{'nombre': nombre, **valores} for nombre, valores in datos.items()]},
+                        {'presupuesto_necesidades': df_datos})
+
+    exportar_segundo_plano(df_datos, nombre_archivo="presupuesto_necesidades")
+
+    mostrar_cuadro(['Resultado'])
+    mostrar_tabla(df_datos)
+
+    pausar()
+
+COLUMNAS_INVENTARIO_MATERIALES = ['inventario_final', 'inventario_inicial', 'costo_materia_prima']
+
+def niveles_materiales(padres: np.ndarray, hijos: np.ndarray, cantidad_articulos: int) -> np.ndarray:
+    """Calcula el nivel más bajo en el que aparece cada artículo de una lista de materiales.
+
+    Los productos terminados tienen nivel 0 y cada componente queda un nivel debajo del más bajo
+    de los artículos que lo usan, de modo que al procesar los niveles en orden la necesidad de un
+    artículo ya está completa cuando se explota hacia sus componentes.
+
+    Args:
+        padres (np.ndarray): Código del artículo que usa el componente, por relación.
+        hijos (np.ndarray): Código del componente, por relación.
+        cantidad_articulos (int): Cantidad de artículos distintos.
+
+    Raises:
+        ValueError: Si la lista de materiales tiene un ciclo.
+
+    Returns:
+        np.ndarray: Nivel de cada artículo.
+    """
+
+    #Orden topológico de Kahn por frentes: un artículo entra al frente cuando ya se procesaron todos
+    #los artículos que lo usan, así que el número de frente es su nivel más bajo y cada relación se visita una vez
+    orden = np.argsort(padres, kind='stable')
+    hijos_ordenados = hijos[orden]
+    salidas = np.bincount(padres, minlength=cantidad_articulos)
+    inicios = np.concatenate(([0], np.cumsum(salidas)[:-1]))
+    pendientes = np.bincount(hijos, minlength=cantidad_articulos)
+
+    niveles = np.zeros(cantidad_articulos, dtype=np.int64)
+    frente = np.flatnonzero(pendientes == 0)
+    procesados = 0
+    nivel = 0
+
+    while len(frente):
+        niveles[frente] = nivel
+        procesados += len(frente)
+
+        #Posiciones de todas las relaciones que salen del frente en la lista ordenada por padre
+        cantidades = salidas[frente]
+        total = int(cantidades.sum())
+        desplazamientos = np.repeat(inicios[frente] - (np.cumsum(cantidades) - cantidades), cantidades)
+        componentes, usos = np.unique(hijos_ordenados[desplazamientos + np.arange(total)], return_counts=True)
+
+        pendientes[componentes] -= usos
+        frente = componentes[pendientes[componentes] == 0]
+        nivel += 1
+
+    if procesados == cantidad_articulos:
+        return niveles
+
+    raise ValueError("La lista de materiales tiene un ciclo")
+
+@memoizar
+@trazar('calculo')
+def explosion_materiales(estructura: pd.DataFrame, produccion: dict | pd.Series, inventarios: pd.DataFrame = None) -> pd.DataFrame:
+    """Explota la producción requerida de todo el catálogo a través de todos los niveles de la lista de materiales.
+
+    La lista de materiales se guarda como una matriz dispersa (artículo x componente) y la necesidad
+    de cada nivel se pasa al siguiente con un producto matriz-vector. En cada artículo se descuenta
+    el inventario como en el presupuesto de necesidades: requerida = necesidad + inventario final - inventario inicial,
+    sin bajar de cero. Sólo los artículos que no tienen componentes se compran; los demás se fabrican.
+
+    Args:
+        estructura (pd.DataFrame): Relaciones con las columnas producto, componente y cantidad
+            (unidades del componente por unidad del producto). Un componente puede ser a su vez un producto.
+        produccion (dict | pd.Series): Producción requerida de cada producto terminado.
+        inventarios (pd.DataFrame, optional): Tabla indexada por artículo con las columnas inventario_final,
+            inventario_inicial y costo_materia_prima. Los valores faltantes se toman como 0. Defaults to None.
+
+    Raises:
+        KeyError: Si a la estructura le falta alguna columna.
+        ValueError: Si la lista de materiales tiene un ciclo.
+        ImportError: Si no está instalado scipy.
+
+    Returns:
+        pd.DataFrame: Tabla con un artículo por fila y las columnas nivel, comprado, materia_prima_produccion,
+            inventario_final, inventario_inicial, materia_prima_requerida, costo_materia_prima y compras_presupuestadas.
+    """
+
+    try:
+        from scipy import sparse
+    except ImportError as e:
+        raise ImportError("Se requiere scipy para la explosión de materiales (pip install scipy)") from e
+
+    faltantes = [columna for columna in ['producto', 'componente', 'cantidad'] if columna not in estructura.columns]
+    if faltantes:
+        raise KeyError(f"Faltan las columnas: {', '.join(faltantes)}")
+
+    produccion = pd.Series(produccion, dtype=np.float64)
+
+    #Un solo código por artículo, sin importar si aparece como producto o como componente
+    codigos, articulos = pd.factorize(pd.concat([estructura['producto'], estructura['componente'], produccion.index.to_series()],
+                                                ignore_index=True))
+    cantidad_articulos = len(articulos)
+    relaciones = len(estructura)
+    padres = codigos[:relaciones]
+    hijos = codigos[relaciones:2 * relaciones]
+
+    niveles = niveles_materiales(padres, hijos, cantidad_articulos)
+
+    #Se guarda transpuesta (componente x artículo) para que cada nivel sea un solo producto matriz-vector
+    matriz = sparse.csr_matrix((estructura['cantidad'].to_numpy(dtype=np.float64), (hijos, padres)),
+                               shape=(cantidad_articulos, cantidad_articulos))
+
+    if inventarios is None:
+        inventarios = pd.DataFrame(columns=COLUMNAS_INVENTARIO_MATERIALES)
+    inventarios = inventarios.reindex(index=articulos, columns=COLUMNAS_INVENTARIO_MATERIALES).fillna(0).to_numpy(dtype=np.float64)
+    inventario_final, inventario_inicial, costo_materia_prima = inventarios.T
+
+    necesidad = np.zeros(cantidad_articulos)
+    necesidad[codigos[2 * relaciones:]] = produccion.to_numpy()
+    requerida = np.zeros(cantidad_articulos)
+
+    for nivel in range(niveles.max() + 1):
+        en_nivel = niveles == nivel
+        requerida[en_nivel] = np.maximum(necesidad[en_nivel] + inventario_final[en_nivel] - inventario_inicial[en_nivel], 0)
+        necesidad += matriz @ np.where(en_nivel, requerida, 0)
+
+    #Los artículos sin componentes son los que se compran
+    comprado = np.bincount(padres, minlength=cantidad_articulos) == 0
+
+    return pd.DataFrame({
+        'nivel': niveles,
+        'comprado': comprado,
+        'materia_prima_produccion': necesidad,
+        'inventario_final': inventario_final,
+        'inventario_inicial': inventario_inicial,
+        'materia_prima_requerida': requerida,
+        'costo_materia_prima': costo_materia_prima,
+        'compras_presupuestadas': np.where(comprado, requerida * costo_materia_prima, 0)
+    }, index=pd.Index(articulos, name='articulo'))
+
+class CacheMateriales:
+    """Explosión de la lista de materiales con caché de los requerimientos por unidad de cada artículo.
+
+    Para cada artículo se guarda cuánto necesita, por unidad, de cada artículo comprado (los que no tienen componentes).
+    Al cambiar una cantidad de la estructura sólo se invalidan el artículo modificado y los que lo usan,
+    directa o indirectamente; los costos no forman parte de la caché, por lo que cambiarlos no requiere explotar de nuevo.
+    A diferencia de explosion_materiales, sólo se descuentan los inventarios de los artículos comprados.
+    """
+
+    def __init__(self, estructura: pd.DataFrame, capacidad: int = 4096):
+        """Carga la estructura y valida que no tenga ciclos.
+
+        Args:
+            estructura (pd.DataFrame): Relaciones con las columnas producto, componente y cantidad.
+            capacidad (int, optional): Cantidad máxima de artículos en la caché. Defaults to 4096.
+
+        Raises:
+            KeyError: Si a la estructura le falta alguna columna.
+            ValueError: Si la lista de materiales tiene un ciclo.
+        """
+
+        faltantes = [columna for columna in ['producto', 'componente', 'cantidad'] if columna not in estructura.columns]
+        if faltantes:
+            raise KeyError(f"Faltan las columnas: {', '.join(faltantes)}")
+
+        codigos, articulos = pd.factorize(pd.concat([estructura['producto'], estructura['componente']], ignore_index=True))
+        niveles_materiales(codigos[:len(estructura)], codigos[len(estructura):], len(articulos))
+
+        #Componentes de cada artículo y, al revés, artículos que usan cada componente
+        self.hijos = {}
+        self.padres = {}
+        for producto, componente, cantidad in zip(estructura['producto'], estructura['componente'], estructura['cantidad'].astype(float)):
+            hijos = self.hijos.setdefault(producto, {})
+            hijos[componente] = hijos.get(componente, 0) + cantidad
+            self.padres.setdefault(componente, set()).add(producto)
+
+        self.capacidad = capacidad
+        self.cache = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    def guardar(self, articulo, requerimientos: dict) -> None:
+        """Guarda los requerimientos de un artículo, desalojando el usado hace más tiempo si la caché está llena."""
+
+        self.cache[articulo] = requerimientos
+
+        if len(self.cache) > self.capacidad:
+            self.cache.popitem(last=False)
+            self.desalojos += 1
+
+    def requerimientos(self, articulo) -> dict:
+        """Obtiene los requerimientos por unidad de un artículo.
+
+        Los subensambles que no están en la caché se calculan en orden posterior (primero sus componentes),
+        sin recursión, y se guardan para las siguientes consultas.
+
+        Args:
+            articulo: Nombre del artículo.
+
+        Returns:
+            dict: Diccionario con el nombre de cada artículo comprado y la cantidad necesaria por unidad.
+        """
+
+        #Los artículos comprados no se explotan ni ocupan lugar en la caché
+        if not self.hijos.get(articulo):
+            return {articulo: 1.0}
+
+        if articulo in self.cache:
+            self.aciertos += 1
+            self.cache.move_to_end(articulo)
+            return self.cache[articulo]
+
+        self.fallos += 1
+
+        #Los resultados de esta consulta se guardan aparte por si la caché desaloja alguno antes de usarlo
+        calculados = {}
+        pila = [(articulo, False)]
+
+        while pila:
+            actual, expandido = pila.pop()
+            if actual in calculados:
+                continue
+
+            if actual != articulo and actual in self.cache:
+                calculados[actual] = self.cache[actual]
+                continue
+
+            hijos = self.hijos.get(actual)
+
+            if not hijos:
+                calculados[actual] = {actual: 1.0}
+                continue
+
+            if not expandido:
+                pila.append((actual, True))
+                pila.extend((hijo, False) for hijo in hijos if hijo not in calculados)
+                continue
+
+            requerimientos = {}
+            for hijo, cantidad in hijos.items():
+                for comprado, cantidad_comprado in calculados[hijo].items():
+                    requerimientos[comprado] = requerimientos.get(comprado, 0) + cantidad * cantidad_comprado
+
+            calculados[actual] = requerimientos
+            self.guardar(actual, requerimientos)
+
+        return calculados[articulo]
+
+    def invalidar(self, articulo) -> int:
+        """Quita de la caché un artículo y todos los que lo usan, directa o indirectamente.
+
+        Args:
+            articulo: Nombre del artículo modificado.
+
+        Returns:
+            int: Cantidad de artículos quitados de la caché.
+        """
+
+        pendientes = [articulo]
+        visitados = {articulo}
+        quitados = 0
+
+        while pendientes:
+            actual = pendientes.pop()
+
+            if self.cache.pop(actual, None) is not None:
+                quitados += 1
+
+            for padre in self.padres.get(actual, ()):
+                if padre not in visitados:
+                    visitados.add(padre)
+                    pendientes.append(padre)
+
+        self.invalidaciones += quitados
+
+        return quitados
+
+    def cambiar_cantidad(self, producto, componente, cantidad: float) -> int:
+        """Cambia la cantidad de un componente en un artículo e invalida sólo lo afectado.
+
+        Args:
+            producto: Artículo que usa el componente.
+            componente: Componente a cambiar.
+            cantidad (float): Nueva cantidad por unidad; con 0 se quita el componente.
+
+        Raises:
+            ValueError: Si el cambio forma un ciclo.
+
+        Returns:
+            int: Cantidad de artículos quitados de la caché.
+        """
+
+        if cantidad:
+            #El componente no puede usar, directa o indirectamente, al producto
+            pendientes = [componente]
+            visitados = {componente}
+            while pendientes:
+                actual = pendientes.pop()
+                if actual == producto:
+                    raise ValueError(f"Agregar {componente} a {producto} forma un ciclo")
+                for hijo in self.hijos.get(actual, {}):
+                    if hijo not in visitados:
+                        visitados.add(hijo)
+                        pendientes.append(hijo)
+
+            self.hijos.setdefault(producto, {})[componente] = float(cantidad)
+            self.padres.setdefault(componente, set()).add(producto)
+        else:
+            self.hijos.get(producto, {}).pop(componente, None)
+            self.padres.get(componente, set()).discard(producto)
+
+        return self.invalidar(producto)
+
+    def necesidades(self, produccion: dict | pd.Series) -> pd.Series:
+        """Suma los requerimientos de los artículos comprados para la producción de todo el catálogo.
+
+        Args:
+            produccion (dict | pd.Series): Producción requerida de cada producto terminado.
+
+        Returns:
+            pd.Series: Materia prima para la producción de cada artículo comprado.
+        """
+
+        totales = {}
+
+        for producto, unidades in dict(produccion).items():
+            for comprado, cantidad in self.requerimientos(producto).items():
+                totales[comprado] = totales.get(comprado, 0) + unidades * cantidad
+
+        return pd.Series(totales, dtype=np.float64)
+
+    def presupuesto_compras(self, produccion: dict | pd.Series, inventarios: pd.DataFrame = None) -> pd.DataFrame:
+        """Calcula las necesidades y compras presupuestadas de los artículos comprados.
+
+        Args:
+            produccion (dict | pd.Series): Producción requerida de cada producto terminado.
+            inventarios (pd.DataFrame, optional): Tabla indexada por artículo con las columnas inventario_final,
+                inventario_inicial y costo_materia_prima. Los valores faltantes se toman como 0. Defaults to None.
+
+        Returns:
+            pd.DataFrame: Tabla con un artículo comprado por fila y las mismas columnas que explosion_materiales,
+                sin el nivel.
+        """
+
+        necesidad = self.necesidades(produccion)
+
+        if inventarios is None:
+            inventarios = pd.DataFrame(columns=COLUMNAS_INVENTARIO_MATERIALES)
+        inventarios = inventarios.reindex(index=necesidad.index, columns=COLUMNAS_INVENTARIO_MATERIALES).fillna(0).astype(np.float64)
+
+        requerida = (necesidad + inventarios['inventario_final'] - inventarios['inventario_inicial']).clip(lower=0)
+
+        df_datos = pd.DataFrame({
+            'comprado': True,
+            'materia_prima_produccion': necesidad,
+            'inventario_final': inventarios['inventario_final'],
+            'inventario_inicial': inventarios['inventario_inicial'],
+            'materia_prima_requerida': requerida,
+            'costo_materia_prima': inventarios['costo_materia_prima'],
+            'compras_presupuestadas': requerida * inventarios['costo_materia_prima']
+        })
+        df_datos.index.name = 'articulo'
+
+        return df_datos
+
+    def estadisticas(self) -> dict:
+        """Regresa las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos (0 - 100), desalojos, invalidaciones y tamaño actual.
+        """
+
+        consultas = self.aciertos + self.fallos
+
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas * 100 if consultas else 0.0,
+            'desalojos': self.desalojos,
+            'invalidaciones': self.invalidaciones,
+            'tamano': len(self.cache)
+        }
+
+@trazar('calculo')
+def recotizar_compras(presupuesto: pd.DataFrame, costos: dict) -> pd.DataFrame:
+    """Cambia el costo de algunas materias primas de un presupuesto de compras sin volver a explotar la estructura.
+
+    Args:
+        presupuesto (pd.DataFrame): Resultado de explosion_materiales o CacheMateriales.presupuesto_compras.
+        costos (dict): Diccionario con el nombre del artículo y su nuevo costo.
+
+    Returns:
+        pd.DataFrame: Copia del presupuesto con los costos y las compras presupuestadas actualizados.
+    """
+
+    nuevo = presupuesto.copy()
+    costos = pd.Series(costos, dtype=np.float64).reindex(nuevo.index)
+    cambiados = costos.notna()
+
+    nuevo.loc[cambiados, 'costo_materia_prima'] = costos[cambiados]
+
+    #Los artículos fabricados no tienen compras, por lo que se conservan en cero
+    compras = (nuevo['materia_prima_requerida'] * nuevo['costo_materia_prima']).where(nuevo['comprado'], 0)
+    nuevo.loc[cambiados, 'compras_presupuestadas'] = compras[cambiados]
+
+    return nuevo
+
+def pedir_archivos_materiales() -> None | tuple:
+    """Pide y lee los archivos de estructura, producción e inventarios de la lista de materiales.
+
+    Returns:
+        None | tuple: None si algún archivo no se pudo leer; si no, la estructura, la producción
+            requerida por producto y los inventarios (o None).
+    """
+
+    mostrar_aviso(['Se necesitan dos archivos y uno opcional:',
+                   'estructura: columnas producto, componente y cantidad',
+                   'producción: columnas producto y produccion_requerida',
+                   'inventarios (opcional): columnas articulo, inventario_final,',
+                   'inventario_inicial y costo_materia_prima'], tipo = "Información")
+
+    mostrar_cuadro(['Escriba las rutas de los archivos (.csv o .xlsx)'])
+    ruta_estructura = pedir_campo('Ruta de la estructura: ')
+    ruta_produccion = pedir_campo('Ruta de la producción: ')
+    ruta_inventarios = pedir_campo('Ruta de los inventarios (escriba - si no tiene): ')
+
+    try:
+        estructura = leer_tabla(ruta_estructura)
+        produccion = leer_tabla(ruta_produccion).set_index('producto')['produccion_requerida']
+        inventarios = None if ruta_inventarios == '-' else leer_tabla(ruta_inventarios).set_index('articulo')
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return None
+
+    return estructura, produccion, inventarios
+
+@trazar('interfaz')
+def explosion_materiales_interfaz() -> None:
+    """Interfaz para calcular las necesidades y compras de todo el catálogo desde archivos."""
+
+    archivos = pedir_archivos_materiales()
+    if archivos is None:
+        return
+
+    try:
+        resultado = explosion_materiales(*archivos)
+    except (ValueError, KeyError, ImportError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    exportar_segundo_plano(resultado, nombre_archivo="explosion_materiales")
+
+    mostrar_aviso([f'Artículos: {len(resultado):,}',
+                   f'Niveles: {resultado["nivel"].max() + 1:,}',
+                   f'Compras presupuestadas: {resultado["compras_presupuestadas"].sum():,.2f}'], tipo = 'Resultado')
+
+    mostrar_tabla(resultado)
+
+    pausar()
+
+@trazar('interfaz')
+def explosion_materiales_simulacion() -> None:
+    """Interfaz para probar cambios de cantidades y costos sobre la lista de materiales, usando la caché de explosión."""
+
+    archivos = pedir_archivos_materiales()
+    if archivos is None:
+        return
+
+    estructura, produccion, inventarios = archivos
+
+    try:
+        cache = CacheMateriales(estructura)
+    except (ValueError, KeyError) as e:
+        print(f"{negrita('Error')}: {e}")
+        return
+
+    resultado = cache.presupuesto_compras(produccion, inventarios)
+    #Costos cambiados en la simulación, que se vuelven a aplicar cada vez que se reconstruye el presupuesto
+    costos = {}
+
+    contenido = ['(1) - Cambiar la cantidad de un componente',
+                 '(2) - Cambiar el costo de una materia prima',
+                 '(3) - Terminar y exportar']
+
+    while True:
+        estadisticas = cache.estadisticas()
+        mostrar_aviso([f'Compras presupuestadas: {resultado["compras_presupuestadas"].sum():,.2f}',
+                       f'Caché: {estadisticas["tamano"]:,} artículos, {estadisticas["tasa_aciertos"]:.1f}% de aciertos,',
+                       f'{estadisticas["invalidaciones"]:,} invalidaciones y {estadisticas["desalojos"]:,} desalojos'], tipo = 'Resultado')
+
+        mostrar_cuadro(contenido, 'Simulación de cambios', 'Escoja el cambio que quiere probar')
+        opcion = pedir_numero('Escriba el número de la opción: ', 1, 3)
+
+        match opcion:
+            case 1:
+                producto = pedir_campo('Escriba el producto o subensamble: ')
+                componente = pedir_campo('Escriba el componente: ')
+                cantidad = pedir_numero('Escriba la nueva cantidad por unidad (0 para quitarlo): ', 0)
+
+                try:
+                    cache.cambiar_cantidad(producto, componente, cantidad)
+                except ValueError as e:
+                    print(f"{negrita('Error')}: {e}")
+                    continue
+
+                resultado = recotizar_compras(cache.presupuesto_compras(produccion, inventarios), costos)
+            case 2:
+                articulo = pedir_campo('Escriba la materia prima: ')
+                costos[articulo] = pedir_numero('Escriba el nuevo costo: ', 0)
+
+                #El costo no cambia los requerimientos, así que sólo se vuelven a calcular las compras
+                resultado = recotizar_compras(resultado, {articulo: costos[articulo]})
+            case 3:
+                break
+
+    exportar_segundo_plano(resultado, nombre_archivo="explosion_materiales_simulacion")
+
+    mostrar_tabla(resultado)
+
+    pausar()
+
+######################## MENÚ PRINCIPAL ########################
+def menu() -> None:
+    """Función que le muestra el menú principal al usuario."""
+
+    titulo = "Bienvenido al programa contable"
+    subtitulo = "Escoge la opción"
+    opciones = [
+        '(1) - Punto de equilibrio en unidades/pesos normal o multilínea',
+        '(2) - Unidades a vender antes/después de impuestos normal o multilínea',
+        '(3) - Análisis Costo-Volumen-Utilidad',
+        '(4) - Presupuesto de Ventas y Producción',
+        '(5) - Presupuesto de necesidades de Materias Primas y Compras',
+        '(6) - Historial de cálculos guardados',
+        '(7) - Salir del programa'
+    ]
+
+    while True:
+        try:
+            atender_exportaciones()
+            mostrar_cuadro(opciones, titulo, subtitulo)
+            opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 7)
+
+            match opcion:
+                case 1:
+                    punto_equilibrio_menu()
+                case 2:
+                    unidades_impuestos_menu()
+                case 3:
+                    analisis_cvu_menu()
+                case 4:
+                    presupuesto_ventas_produccion_menu()
+                case 5:
+                    presupuesto_necesidades_menu()
+                case 6:
+                    historial_interfaz()
+                case 7:
+                    break
+        except Salir:
+            continue
+
+
+######################## EJECUCIÓN SIN INTERFAZ (ESCENARIOS) ########################
+def cargar_escenarios(ruta: str) -> list[dict]:
+    """Lee un archivo de escenarios en formato JSON o YAML.
+
+    El archivo puede contener un solo escenario, una lista de escenarios o
+    un diccionario con la llave "escenarios".
+
+    Args:
+        ruta (str): Ruta del archivo (.json, .yaml o .yml).
+
+    Raises:
+        ValueError: Si la extensión no es soportada o el contenido no tiene escenarios.
+        ImportError: Si el archivo es YAML y no está instalado PyYAML.
+
+    Returns:
+        list[dict]: Lista de escenarios.
+    """
+
+    extension = ruta.rsplit('.', 1)[-1].lower()
+
+    with open(ruta, encoding='utf-8') as archivo:
+        match extension:
+            case 'json':
+                contenido = json.load(archivo)
+            case 'yaml' | 'yml':
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ImportError("Se requiere PyYAML para leer escenarios en YAML (pip install pyyaml)") from e
+                contenido = yaml.safe_load(archivo)
+            case _:
+                raise ValueError(f"Formato de escenario no soportado: .{extension}")
+
+    if isinstance(contenido, dict):
+        contenido = contenido.get('escenarios', [contenido])
+
+    if not isinstance(contenido, list) or not all(isinstance(escenario, dict) for escenario in contenido):
+        raise ValueError(f"El archivo {ruta} no contiene escenarios válidos")
+
+    return contenido
+
+@trazar('construccion')
+def tabla_productos(registros: list[dict], columnas: list[str]) -> pd.DataFrame:
+    """Convierte una lista de registros de un escenario en una tabla con un producto por fila.
+
+    Args:
+        registros (list[dict]): Registros con la llave "nombre" y las columnas requeridas.
+        columnas (list[str]): Columnas requeridas.
+
+    Raises:
+        KeyError: Si a algún registro le falta el nombre o alguna columna.
+
+    Returns:
+        pd.DataFrame: Tabla indexada por el nombre del producto.
+    """
+
+    tabla = pd.DataFrame.from_records(registros)
+
+    faltantes = [columna for columna in ['nombre', *columnas] if columna not in tabla.columns]
+    if faltantes:
+        raise KeyError(f"Faltan las columnas: {', '.join(faltantes)}")
+
+    return tabla.set_index('nombre')[columnas]
+
+def propuesta_escenario(actual: dict, propuesta: dict) -> dict:
+    """Resuelve una propuesta del análisis Costo - Volumen - Utilidad descrita en un escenario.
+
+    Cada campo puede ser un número (el valor final) o un diccionario con las llaves
+    "ajuste" (uno de AJUSTES_CVU) y "cantidad". Los campos omitidos conservan el valor actual.
+
+    Args:
+        actual (dict): Valores actuales.
+        propuesta (dict): Propuesta descrita en el escenario.
+
+    Returns:
+        dict: Valores de la propuesta.
+    """
+
+    valores = {}
+
+    for campo in CAMPOS_CVU:
+        cambio = propuesta.get(campo, {'ajuste': 'mantener'})
+
+        if isinstance(cambio, dict):
+            valores[campo] = ajustar_valor(actual[campo], cambio['ajuste'], cambio.get('cantidad', 0))
+        else:
+            valores[campo] = cambio
+
+    return valores
+
+def participaciones_escenario(entradas: dict) -> dict:
+    """Obtiene las participaciones de un escenario multilínea.
+
+    Se toman de la llave "participaciones" o se calculan desde la llave "historial", que tiene
+    "archivo" y opcionalmente "columna_producto" y "columna_cantidad".
+
+    Args:
+        entradas (dict): Entradas del escenario.
+
+    Returns:
+        dict: Diccionario con el nombre del producto y su porcentaje de participación.
+    """
+
+    if 'participaciones' in entradas:
+        return entradas['participaciones']
+
+    historial = entradas['historial']
+
+    return participacion_historial(historial['archivo'], historial.get('columna_producto', 'producto'),
+                                   historial.get('columna_cantidad', 'cantidad'))
+
+def ejecutar_escenario(escenario: dict) -> dict[str, pd.DataFrame]:
+    """Ejecuta el cálculo descrito en un escenario sin interacción con el usuario.
+
+    Args:
+        escenario (dict): Diccionario con las llaves "calculo" y "entradas". La llave opcional "dinero"
+            ({"escala": 100, "redondeo": "mitad_arriba"}) reemplaza la aritmética de la sesión (ARITMETICA_DINERO).
+
+    Raises:
+        ValueError: Si el cálculo no existe.
+        KeyError: Si falta alguna entrada requerida.
+
+    Returns:
+        dict[str, pd.DataFrame]: Tablas de resultado, en el orden en el que se exportan.
+    """
+
+    calculo = escenario['calculo']
+    entradas = escenario.get('entradas', {})
+    dinero = {**ARITMETICA_DINERO, **escenario.get('dinero', {})}
+
+    match calculo:
+        case 'punto_equilibrio_normal':
+            resultado = calcular_punto_equilibrio_normal(entradas['precio_venta'], entradas['costo_variable'], entradas['costo_fijo'], **dinero)
+            return {'resultado': pd.DataFrame([resultado])}
+
+        case 'punto_equilibrio_lote':
+            datos = pd.DataFrame(entradas['productos']) if 'productos' in entradas else leer_tabla(entradas['archivo'])
+            return {'resultado': punto_equilibrio_lote(datos, **dinero)}
+
+        case 'punto_equilibrio_multilinea':
+            columnas = ['porcentaje_margen_contribucion', 'precio_venta', 'costo_variable', 'margen_contribucion']
+            resultado = calcular_punto_equilibrio_multilinea(tabla_productos(entradas['productos'], columnas), entradas['costo_fijo'], **dinero)
+            return {tabla: resultado[tabla] for tabla in ('datos', 'margen_ponderado', 'unidades', 'pesos')}
+
+        case 'unidad_antes_de_impuestos_normal' | 'unidad_antes_de_impuestos_multilinea':
+            unidades = calcular_unidades_antes_impuestos(entradas['costo_fijo_total'], entradas['utilidad_deseada'], entradas['margen_contribucion_unitario'])
+
+            if calculo.endswith('normal'):
+                return {'resultado': pd.DataFrame([{'unidades_antes_impuestos': unidades}])}
+            return {'ponderacion': calcular_unidades_multilinea(unidades, participaciones_escenario(entradas), 'Uds. antes de impuestos').T}
+
+        case 'unidad_despues_de_impuestos_normal' | 'unidad_despues_de_impuestos_multilinea':
+            unidades = calcular_unidades_despues_impuestos(entradas['costo_fijo_total'], entradas['utilidad_deseada'],
+                                                           entradas['margen_contribucion_unitario'], entradas['tasa_impositiva'])
+
+            if calculo.endswith('normal'):
+                return {'resultado': pd.DataFrame([{'unidades_despues_impuestos': unidades}])}
+            return {'ponderacion': calcular_unidades_multilinea(unidades, participaciones_escenario(entradas), 'Uds. después de impuestos')}
+
+        case 'unidades_impuestos_lote':
+            datos = pd.DataFrame(entradas['filas']) if 'filas' in entradas else leer_tabla(entradas['archivo'])
+            return {'resultado': unidades_impuestos_lote(datos)}
+
+        case 'unidades_impuestos_superficie':
+            return {'superficie': superficie_unidades_impuestos(entradas['costo_fijo_total'], entradas['margen_contribucion_unitario'],
+                                                                 entradas['utilidades_deseadas'], entradas['tasas_impositivas'])}
+
+        case 'analisis_cvu':
+            actual = {campo: entradas['actual'][campo] for campo in CAMPOS_CVU}
+
+            propuestas = {"actual": actual}
+            for numero, propuesta in enumerate(entradas.get('propuestas', []), start=1):
+                propuestas[numero] = propuesta_escenario(actual, propuesta)
+
+            df_propuestas, df_propuestas_calculos = calcular_analisis_cvu(propuestas, **dinero)
+            return {'propuestas': df_propuestas, 'calculos': df_propuestas_calculos}
+
+        case 'analisis_cvu_rejilla':
+            #Cada campo puede ser una lista de valores o un rango con "inicio", "fin" y "paso"
+            rangos = {}
+            for campo in CAMPOS_CVU:
+                rango = entradas['rangos'][campo]
+                rangos[campo] = rango_valores(rango['inicio'], rango['fin'], rango['paso']) if isinstance(rango, dict) else rango
+
+            return {'rejilla': rejilla_cvu(rangos, entradas.get('top', 10))}
+
+        case 'analisis_cvu_simulacion':
+            resultado = simular_cvu(entradas['actual'], entradas.get('distribuciones', {}), entradas.get('simulaciones', 1_000_000),
+                                    entradas.get('semilla', 0), entradas.get('trabajadores'))
+            return {'simulacion': tabla_simulacion_cvu(resultado)}
+
+        case 'presupuesto_ventas':
+            productos = tabla_productos(entradas['productos'], ['pronostico_ventas', 'precio_unitario'])
+            return {'presupuesto_ventas': calcular_presupuesto_ventas(productos, **dinero)}
+
+        case 'presupuesto_produccion':
+            productos = tabla_productos(entradas['productos'], ['ventas', 'inventario_final', 'inventario_inicial'])
+            return {'presupuesto_produccion': calcular_presupuesto_produccion(productos)}
+
+        case 'presupuesto_produccion_multiperiodo':
+            #Las ventas e inventarios finales son diccionarios de producto a lista de ventas por periodo
+            ventas = pd.DataFrame.from_dict(entradas['ventas'], orient='index')
+            inventario_final = pd.DataFrame.from_dict(entradas['inventario_final'], orient='index') if 'inventario_final' in entradas else None
+
+            inventario_inicial = entradas.get('inventario_inicial', 0)
+            if isinstance(inventario_inicial, dict):
+                inventario_inicial = pd.Series(inventario_inicial)
+
+            tablas = presupuesto_produccion_multiperiodo(ventas, inventario_inicial, inventario_final, entradas.get('cobertura'))
+            return {tabla: tablas[tabla] for tabla in ('produccion', 'inventario_inicial', 'inventario_final', 'resumen')}
+
+        case 'presupuesto_necesidades':
+            columnas = ['materia_prima_unidad', 'inventario_final', 'inventario_inicial', 'costo_materia_prima']
+            componentes = tabla_productos(entradas['componentes'], columnas)
+            return {'presupuesto_necesidades': calcular_presupuesto_necesidades(entradas['produccion_requerida'], componentes, **dinero)}
+
+        case 'explosion_materiales':
+            estructura = pd.DataFrame(entradas['estructura']) if 'estructura' in entradas else leer_tabla(entradas['archivo_estructura'])
+
+            inventarios = entradas.get('inventarios')
+            if inventarios is not None:
+                inventarios = tabla_productos(inventarios, COLUMNAS_INVENTARIO_MATERIALES)
+
+            return {'explosion_materiales': explosion_materiales(estructura, entradas['produccion'], inventarios)}
+
+        case _:
+            raise ValueError(f"Cálculo desconocido: {calculo}")
+
+def ejecutar_escenarios(rutas: list[str], carpeta_salida: str = ".", formato: str = None, memoria: bool = False) -> int:
+    """Ejecuta todos los escenarios de uno o más archivos y exporta sus resultados.
+
+    Cada escenario se exporta a "<carpeta_salida>/<salida>", donde "salida" se toma
+    del escenario o, si no existe, se forma con el nombre del cálculo y su número.
+    El formato se toma del escenario ("formato"), del parámetro o de la extensión de "salida".
+
+    Args:
+        rutas (list[str]): Rutas de los archivos de escenarios.
+        carpeta_salida (str, optional): Carpeta donde se guardan los resultados. Defaults to ".".
+        formato (str, optional): Formato de exportación por defecto (ver exportar). Defaults to None.
+        memoria (bool, optional): True para mostrar al final la memoria de cada tabla de resultado (ver reporte_memoria). Defaults to False.
+
+    Returns:
+        int: Cantidad de escenarios que fallaron.
+    """
+
+    os.makedirs(carpeta_salida, exist_ok=True)
+
+    fallidos = 0
+    numero = 0
+    reportes = []
+
+    for ruta in rutas:
+        for escenario in cargar_escenarios(ruta):
+            numero += 1
+            salida = escenario.get('salida', f"{escenario.get('calculo', 'escenario')}_{numero}")
+
+            with etapa('escenario', escenario.get('calculo', 'escenario')):
+                #Un escenario que falla (entradas inválidas, archivos faltantes, montos fuera de rango,
+                #carpetas sin permiso...) se cuenta y se sigue con el siguiente
+                try:
+                    tablas = ejecutar_escenario(escenario)
+                    registrar_ejecucion(escenario['calculo'], escenario.get('entradas', {}), tablas)
+                    exportadas = [agregar_total(tabla) if nombre in TABLAS_CON_TOTAL else tabla for nombre, tabla in tablas.items()]
+                    rutas_salida = exportar(*exportadas, nombre_archivo=os.path.join(carpeta_salida, salida),
+                                            formato=escenario.get('formato', formato), aviso=False)
+                except Exception as e:
+                    fallidos += 1
+                    print(f"[{numero}] {salida}: Error: {type(e).__name__}: {e}")
+                    continue
+
+                if not rutas_salida:
+                    fallidos += 1
+                    print(f"[{numero}] {salida}: Error: no se pudo exportar el resultado")
+                    continue
+
+            if memoria:
+                reportes.append(reporte_memoria({f'{salida}/{nombre}': tabla for nombre, tabla in tablas.items()}))
+
+            print(f"[{numero}] {salida}: OK")
+
+    estadisticas = estadisticas_cache()
+    print(f"Caché: {estadisticas['aciertos_memoria'] + estadisticas['aciertos_disco']:,} aciertos, {estadisticas['fallos']:,} fallos, "
+          f"{estadisticas['exportaciones_reutilizadas']:,} exportaciones reutilizadas")
+
+    if reportes:
+        mostrar_cuadro(['Memoria de las tablas de resultado'])
+        mostrar_tabla(pd.concat(reportes), interactivo=False)
+
+    return fallidos
+
+######################## ALMACÉN DE EJECUCIONES ########################
+#Archivo de SQLite donde se guardan las ejecuciones; None para no guardarlas. Se activa con --almacen,
+#porque guardar cada celda de cada resultado cuesta más que muchos de los cálculos
+RUTA_ALMACEN_PREDETERMINADA = "contabilidad.sqlite"
+RUTA_ALMACEN = None
+
+#Llaves de las entradas de un escenario que son diccionarios por producto
+LLAVES_PRODUCTOS = ['participaciones', 'ventas', 'produccion']
+
+ESQUEMA_ALMACEN = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY,
+    calculo TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    entradas TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS productos (
+    ejecucion INTEGER NOT NULL REFERENCES ejecuciones(id) ON DELETE CASCADE,
+    producto TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    ejecucion INTEGER NOT NULL REFERENCES ejecuciones(id) ON DELETE CASCADE,
+    tabla TEXT NOT NULL,
+    orden_tabla INTEGER NOT NULL,
+    posicion_fila INTEGER NOT NULL,
+    posicion_columna INTEGER NOT NULL,
+    fila TEXT,
+    columna TEXT,
+    valor REAL,
+    texto TEXT
+);
+CREATE INDEX IF NOT EXISTS ejecuciones_calculo ON ejecuciones (calculo, fecha);
+CREATE INDEX IF NOT EXISTS ejecuciones_fecha ON ejecuciones (fecha);
+CREATE INDEX IF NOT EXISTS productos_producto ON productos (producto, ejecucion);
+CREATE INDEX IF NOT EXISTS productos_ejecucion ON productos (ejecucion);
+CREATE INDEX IF NOT EXISTS resultados_ejecucion ON resultados (ejecucion);
+"""
+
+def productos_entradas(entradas: dict) -> set[str]:
+    """Obtiene los nombres de los productos que aparecen en las entradas de un escenario.
+
+    Args:
+        entradas (dict): Entradas del escenario.
+
+    Returns:
+        set[str]: Nombres de los productos.
+    """
+
+    nombres = set()
+
+    for llave, valor in entradas.items():
+        if isinstance(valor, list):
+            nombres.update(str(registro['nombre']) for registro in valor if isinstance(registro, dict) and 'nombre' in registro)
+        elif isinstance(valor, dict) and llave in LLAVES_PRODUCTOS:
+            nombres.update(str(nombre) for nombre in valor)
+
+    return nombres
+
+def celdas_tabla(ejecucion: int, orden_tabla: int, nombre: str, tabla: pd.DataFrame) -> Iterator[tuple]:
+    """Recorre las celdas de una tabla en el formato de la tabla resultados del almacén.
+
+    Args:
+        ejecucion (int): Identificador de la ejecución.
+        orden_tabla (int): Posición de la tabla en el resultado.
+        nombre (str): Nombre de la tabla.
+        tabla (pd.DataFrame): Tabla a guardar.
+
+    Yields:
+        tuple: Una fila de la tabla resultados; los números van en valor y el resto en texto.
+    """
+
+    filas = [str(fila) for fila in tabla.index]
+    vacios = itertools.repeat(None)
+
+    #Las celdas se arman columna por columna con zip, sin un ciclo de Python por celda
+    for posicion_columna, columna in enumerate(tabla.columns):
+        serie = tabla.iloc[:, posicion_columna]
+
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            valores, textos = serie.astype(np.float64).tolist(), vacios
+        else:
+            valores, textos = vacios, serie.astype(str).where(serie.notna(), None).tolist()
+
+        yield from zip(itertools.repeat(ejecucion), itertools.repeat(nombre), itertools.repeat(orden_tabla), range(len(filas)),
+                       itertools.repeat(posicion_columna), filas, itertools.repeat(str(columna)), valores, textos)
+
+class AlmacenEscenarios:
+    """Almacén en SQLite de las entradas y resultados de cada ejecución.
+
+    Cada ejecución guarda su cálculo, su fecha y sus entradas en el formato de los escenarios, por lo que
+    se puede volver a ejecutar con ejecutar_escenario; sus tablas de resultado se guardan celda por celda
+    para poder consultarlas en bloque sin volver a calcular.
+    """
+
+    def __init__(self, ruta: str = RUTA_ALMACEN_PREDETERMINADA):
+        """Abre (o crea) el almacén.
+
+        Args:
+            ruta (str, optional): Ruta del archivo de SQLite. Defaults to RUTA_ALMACEN_PREDETERMINADA.
+        """
+
+        import sqlite3
+
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        self.conexion.executescript(ESQUEMA_ALMACEN)
+
+    def guardar(self, calculo: str, entradas: dict, tablas: dict[str, pd.DataFrame], fecha: str = None) -> int:
+        """Guarda una ejecución completa en una sola transacción.
+
+        Args:
+            calculo (str): Nombre del cálculo (el mismo que en los escenarios).
+            entradas (dict): Entradas en el formato de los escenarios.
+            tablas (dict[str, pd.DataFrame]): Tablas de resultado.
+            fecha (str, optional): Fecha en formato ISO. Defaults to None (ahora).
+
+        Returns:
+            int: Identificador de la ejecución.
+        """
+
+        from datetime import datetime
+
+        fecha = fecha or datetime.now().isoformat(timespec='seconds')
+
+        with self.conexion:
+            cursor = self.conexion.execute("INSERT INTO ejecuciones (calculo, fecha, entradas) VALUES (?, ?, ?)",
+                                           (calculo, fecha, json.dumps(entradas, ensure_ascii=False, default=str)))
+            ejecucion = cursor.lastrowid
+
+            self.conexion.executemany("INSERT INTO productos (ejecucion, producto) VALUES (?, ?)",
+                                      ((ejecucion, producto) for producto in sorted(productos_entradas(entradas))))
+
+            for orden_tabla, (nombre, tabla) in enumerate(tablas.items()):
+                self.conexion.executemany("INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                          celdas_tabla(ejecucion, orden_tabla, nombre, tabla))
+
+        return ejecucion
+
+    def cargar(self, ejecucion: int) -> dict:
+        """Carga una ejecución guardada, sin volver a calcularla.
+
+        Args:
+            ejecucion (int): Identificador de la ejecución.
+
+        Raises:
+            KeyError: Si la ejecución no existe.
+
+        Returns:
+            dict: Diccionario con las llaves "calculo", "fecha", "entradas" y "tablas" (en el orden en el que se guardaron).
+        """
+
+        registro = self.conexion.execute("SELECT calculo, fecha, entradas FROM ejecuciones WHERE id = ?", (ejecucion,)).fetchone()
+        if registro is None:
+            raise KeyError(f"No existe la ejecución {ejecucion}")
+
+        calculo, fecha, entradas = registro
+
+        #Las celdas se insertan tabla por tabla y columna por columna, así que en orden de inserción cada columna sale junta
+        celdas = pd.read_sql_query("SELECT tabla, orden_tabla, posicion_columna, fila, columna, valor, texto FROM resultados "
+                                   "WHERE ejecucion = ? ORDER BY rowid",
+                                   self.conexion, params=(ejecucion,))
+
+        tablas = {}
+        for (_, nombre), grupo in celdas.groupby(['orden_tabla', 'tabla'], sort=False):
+            columnas = {}
+            filas = None
+
+            for _, celdas_columna in grupo.groupby('posicion_columna', sort=False):
+                textos = celdas_columna['texto']
+                valores = celdas_columna['valor'] if textos.isna().all() else textos
+                columnas[celdas_columna['columna'].iat[0]] = valores.to_numpy()
+
+                if filas is None:
+                    filas = celdas_columna['fila'].to_numpy()
+
+            tablas[nombre] = pd.DataFrame(columnas, index=filas)
+
+        return {"calculo": calculo, "fecha": fecha, "entradas": json.loads(entradas), "tablas": tablas}
+
+    def historial(self, calculo: str = None, producto: str = None, desde: str = None, hasta: str = None, limite: int = None) -> pd.DataFrame:
+        """Consulta las ejecuciones guardadas.
+
+        Args:
+            calculo (str, optional): Sólo las ejecuciones de este cálculo. Defaults to None.
+            producto (str, optional): Sólo las ejecuciones que incluyen este producto. Defaults to None.
+            desde (str, optional): Fecha mínima en formato ISO. Defaults to None.
+            hasta (str, optional): Fecha máxima en formato ISO. Defaults to None.
+            limite (int, optional): Cantidad máxima de ejecuciones, las más recientes primero. Defaults to None.
+
+        Returns:
+            pd.DataFrame: Tabla indexada por el identificador con las columnas calculo, fecha y productos.
+        """
+
+        condiciones = []
+        parametros = []
+
+        if calculo is not None:
+            condiciones.append("e.calculo = ?")
+            parametros.append(calculo)
+        if producto is not None:
+            condiciones.append("e.id IN (SELECT ejecucion FROM productos WHERE producto = ?)")
+            parametros.append(producto)
+        if desde is not None:
+            condiciones.append("e.fecha >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("e.fecha <= ?")
+            parametros.append(hasta)
+
+        consulta = ("SELECT e.id, e.calculo, e.fecha, (SELECT COUNT(*) FROM productos p WHERE p.ejecucion = e.id) AS productos "
+                    "FROM ejecuciones e")
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += " ORDER BY e.fecha DESC, e.id DESC"
+        if limite is not None:
+            consulta += f" LIMIT {int(limite)}"
+
+        return pd.read_sql_query(consulta, self.conexion, params=parametros, index_col='id')
+
+    def resultados(self, calculo: str = None, tabla: str = None, fila: str = None, columna: str = None) -> pd.DataFrame:
+        """Consulta en bloque las celdas de resultado de todas las ejecuciones.
+
+        Args:
+            calculo (str, optional): Sólo las ejecuciones de este cálculo. Defaults to None.
+            tabla (str, optional): Sólo esta tabla de resultado. Defaults to None.
+            fila (str, optional): Sólo esta fila (por ejemplo, un concepto o un producto). Defaults to None.
+            columna (str, optional): Sólo esta columna (por ejemplo, un producto o un concepto). Defaults to None.
+
+        Returns:
+            pd.DataFrame: Tabla con las columnas ejecucion, calculo, fecha, tabla, fila, columna, valor y texto.
+        """
+
+        filtros = {'e.calculo': calculo, 'r.tabla': tabla, 'r.fila': fila, 'r.columna': columna}
+        condiciones = [f"{campo} = ?" for campo, valor in filtros.items() if valor is not None]
+
+        consulta = ("SELECT r.ejecucion, e.calculo, e.fecha, r.tabla, r.fila, r.columna, r.valor, r.texto "
+                    "FROM resultados r JOIN ejecuciones e ON e.id = r.ejecucion")
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+
+        return pd.read_sql_query(consulta, self.conexion, params=[valor for valor in filtros.values() if valor is not None])
+
+    def cerrar(self) -> None:
+        """Cierra la conexión con el almacén."""
+
+        self.conexion.close()
+
+#Almacén abierto por la sesión actual
+ALMACEN = None
+
+def obtener_almacen() -> None | AlmacenEscenarios:
+    """Regresa el almacén de la sesión, abriéndolo la primera vez.
+
+    Returns:
+        None | AlmacenEscenarios: None si el almacén está desactivado (RUTA_ALMACEN es None).
+    """
+
+    global ALMACEN
+
+    if RUTA_ALMACEN is None:
+        return None
+
+    if ALMACEN is None or ALMACEN.ruta != RUTA_ALMACEN:
+        ALMACEN = AlmacenEscenarios(RUTA_ALMACEN)
+
+    return ALMACEN
+
+@trazar('almacenamiento')
+def registrar_ejecucion(calculo: str, entradas: dict, tablas: dict[str, pd.DataFrame]) -> None | int:
+    """Guarda una ejecución en el almacén de la sesión, si está activado.
+
+    Un error del almacén sólo se informa, para no perder el resultado ya calculado.
+
+    Args:
+        calculo (str): Nombre del cálculo (el mismo que en los escenarios).
+        entradas (dict): Entradas en el formato de los escenarios.
+        tablas (dict[str, pd.DataFrame]): Tablas de resultado.
+
+    Returns:
+        None | int: Identificador de la ejecución, o None si no se guardó.
+    """
+
+    import sqlite3
+
+    try:
+        almacen = obtener_almacen()
+        return None if almacen is None else almacen.guardar(calculo, entradas, tablas)
+    except sqlite3.Error as e:
+        print(f"{negrita('Error')}: no se pudo guardar la ejecución ({e}).")
+        return None
+
+def historial_interfaz() -> None:
+    """Interfaz para consultar las ejecuciones guardadas y recuperar sus resultados."""
+
+    almacen = obtener_almacen()
+
+    if almacen is None:
+        mostrar_aviso(['El almacén de ejecuciones está desactivado;', 'inicie el programa con --almacen para guardarlas'])
+        return
+
+    mostrar_cuadro(['Escriba el nombre de un producto para filtrar o - para ver todas'])
+    producto = pedir_campo('Producto: ')
+
+    historial = almacen.historial(producto=None if producto == '-' else producto, limite=100)
+
+    if historial.empty:
+        mostrar_aviso(['No hay ejecuciones guardadas'], tipo = "Información")
+        return
+
+    mostrar_cuadro(['Ejecuciones guardadas (las 100 más recientes)'])
+    mostrar_tabla(historial)
+
+    mostrar_cuadro(['Escriba el número de la ejecución a recuperar o 0 para regresar'])
+    ejecucion = pedir_numero('Ejecución: ', 0)
+
+    if ejecucion == 0:
+        return
+
+    try:
+        guardada = almacen.cargar(ejecucion)
+    except KeyError as e:
+        print(f"{negrita('Error')}: {e.args[0]}")
+        return
+
+    mostrar_aviso([f'Cálculo: {guardada["calculo"]}', f'Fecha: {guardada["fecha"]}'], tipo = 'Resultado')
+
+    for nombre, tabla in guardada["tablas"].items():
+        mostrar_cuadro([nombre])
+        mostrar_tabla(tabla)
+
+    exportar_segundo_plano(*guardada["tablas"].values(), nombre_archivo=f"{guardada['calculo']}_{ejecucion}")
+
+    pausar()
+
+######################## SERVICIO HTTP LOCAL ########################
+MENSAJES_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+#Tamaño máximo del cuerpo de una petición, en bytes
+CUERPO_MAXIMO = 16 * 1024 ** 2
+
+def numero_json(valor: float) -> None | float:
+    """Convierte un número en un valor válido de JSON (NaN e infinito quedan como null)."""
+
+    valor = float(valor)
+    return valor if valor == valor and valor not in (float('inf'), float('-inf')) else None
+
+def lote_punto_equilibrio(entradas: list[dict]) -> list[dict]:
+    """Calcula el punto de equilibrio de un lote de peticiones con punto_equilibrio_lote.
+
+    Args:
+        entradas (list[dict]): Peticiones con precio_venta, costo_variable y costo_fijo.
+
+    Returns:
+        list[dict]: Un resultado por petición, en el mismo orden.
+    """
+
+    #Se usa la función sin caché: cada lote es distinto y sólo llenaría la caché
+    resultado = punto_equilibrio_lote.__wrapped__(pd.DataFrame.from_records(entradas, columns=['precio_venta', 'costo_variable', 'costo_fijo']))
+
+    return [{'punto_equilibrio_unidades': numero_json(unidades), 'punto_equilibrio_pesos': numero_json(pesos), 'estado': estado}
+            for unidades, pesos, estado in zip(resultado['punto_equilibrio_unidades'].tolist(), resultado['punto_equilibrio_pesos'].tolist(),
+                                               resultado['estado'].astype(str).tolist())]
+
+def lote_unidades_impuestos(entradas: list[dict]) -> list[dict]:
+    """Calcula las unidades a vender de un lote de peticiones con barrido_unidades_impuestos.
+
+    Las peticiones sin tasa impositiva se calculan con tasa 0, que equivale a las unidades antes de impuestos.
+
+    Args:
+        entradas (list[dict]): Peticiones con costo_fijo_total, utilidad_deseada, margen_contribucion_unitario
+            y opcionalmente tasa_impositiva (0 - 100).
+
+    Returns:
+        list[dict]: Un resultado por petición, en el mismo orden.
+    """
 
-    propuestas = {
-        "actual":
-        {
-            "Precio de venta": 0,
-            "Costos Variables": 0,
-            "Costos Fijos": 0,
-            "Ventas": 0
-        }
-    }
+    columnas = {campo: [entrada.get(campo, 0.0) for entrada in entradas]
+                for campo in ('costo_fijo_total', 'utilidad_deseada', 'margen_contribucion_unitario', 'tasa_impositiva')}
 
-    for dato in propuestas["actual"].keys():
-        titulo = f'{dato}'
-        contenido = [f'Escriba el valor numérico de {dato}']
-        mostrar_cuadro(contenido, titulo)
+    unidades = barrido_unidades_impuestos(columnas['costo_fijo_total'], columnas['utilidad_deseada'],
+                                          columnas['margen_contribucion_unitario'], columnas['tasa_impositiva'])
 
-        valor = pedir_numero(f"Valor numérico de {dato}: ", 0)
-        propuestas["actual"][dato] = valor
+    return [{'unidades': numero_json(valor)} for valor in unidades.tolist()]
 
+def lote_analisis_cvu(entradas: list[dict]) -> list[dict]:
+    """Calcula el estado de resultados de un lote de propuestas con resultado_cvu sobre arreglos.
 
-    propuestas_calculos = {
-        "actual":
-        {
-            "Ingreso": propuestas["actual"]["Ventas"] * propuestas["actual"]["Precio de venta"],
-            "Costo Variable": propuestas["actual"]["Costos Variables"],
-        }
-    }
+    Args:
+        entradas (list[dict]): Propuestas con los campos de CAMPOS_CVU.
 
-    propuestas_calculos["actual"]["Margen de Contribución"] = propuestas_calculos["actual"]["Ingreso"] - propuestas['actual']['Costos Variables']
-    propuestas_calculos["actual"]["Costo Fijo"] = propuestas["actual"]["Costos Fijos"]
-    propuestas_calculos["actual"]["Utilidad de Operación"] = propuestas_calculos["actual"]["Margen de Contribución"] - propuestas["actual"]["Costos Fijos"]
+    Returns:
+        list[dict]: Un resultado por propuesta, en el mismo orden.
+    """
 
-    print("\n")
+    resultado = resultado_cvu({campo: np.array([entrada[campo] for entrada in entradas]) for campo in CAMPOS_CVU})
+    columnas = {concepto: np.broadcast_to(valores, (len(entradas),)).tolist() for concepto, valores in resultado.items()}
 
-    mostrar_aviso(['A continuación, usted deberá introducir la cantidad de propuestas que tiene,',
-                   'las cuales se compararán con los datos que proporcionó anteriormente.'],
-                   tipo = "Información")
+    return [{concepto: numero_json(valores[posicion]) for concepto, valores in columnas.items()} for posicion in range(len(entradas))]
 
-    num_propuestas = pedir_numero(f"{negrita('Escriba la cantidad de propuestas a realizar: ')}")
+#Ruta, campos requeridos, campos opcionales y función que calcula un lote
+ENDPOINTS_LOTE = {
+    '/punto_equilibrio': (['precio_venta', 'costo_variable', 'costo_fijo'], [], lote_punto_equilibrio),
+    '/unidades_impuestos': (['costo_fijo_total', 'utilidad_deseada', 'margen_contribucion_unitario'], ['tasa_impositiva'], lote_unidades_impuestos),
+    '/analisis_cvu': (CAMPOS_CVU, [], lote_analisis_cvu)
+}
 
-    for propuesta in range(1, num_propuestas + 1): #Le añadimos uno porque el range no toma en cuenta el último valor
+class ErrorPeticion(Exception):
+    """Excepción usada para responder una petición con un código de error."""
 
-        propuestas[propuesta] = {}
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
 
-        mostrar_cuadro([f'Propuesta {propuesta}'])
+class LoteadorPeticiones:
+    """Junta las peticiones que llegan dentro de una ventana de tiempo y las calcula en un solo lote.
 
+    Las peticiones esperan en una cola acotada; si la cola está llena se rechazan de inmediato.
+    Cada lote se calcula en el grupo de trabajadores y, mientras tanto, se sigue juntando el siguiente,
+    con a lo más un lote en cálculo por trabajador.
+    """
 
-        for dato in propuestas["actual"].keys():
-            dato_original = propuestas["actual"][dato]
+    def __init__(self, funcion, ejecutor, trabajadores: int, ventana: float, lote_maximo: int, cola_maxima: int):
+        """Crea el loteador; la recolección empieza con iniciar.
 
-            titulo = f"¿Qué quieres hacer con {dato}?"
-            contenido = [
-                '(1) - Aumentar valor (% porcentaje)',
-                '(2) - Aumentar valor (cantidad)',
-                '(3) - Disminuir valor (% porcentaje)',
-                '(4) - Disminuir valor (cantidad)',
-                '(5) - Mantener el valor actual'
-            ]
+        Args:
+            funcion (Callable): Función que recibe una lista de entradas y regresa una lista de resultados.
+            ejecutor (Executor): Grupo de trabajadores donde se calculan los lotes.
+            trabajadores (int): Cantidad máxima de lotes en cálculo al mismo tiempo.
+            ventana (float): Tiempo, en segundos, que se esperan más peticiones después de la primera.
+            lote_maximo (int): Cantidad máxima de peticiones por lote.
+            cola_maxima (int): Cantidad máxima de peticiones en espera.
+        """
 
-            mostrar_cuadro(contenido, titulo)
+        import asyncio
 
-            opcion = pedir_numero(f"{negrita('Escriba el número de la opción que vas a escoger: ')}", 1, 5)
+        self.funcion = funcion
+        self.ejecutor = ejecutor
+        self.ventana = ventana
+        self.lote_maximo = lote_maximo
+        self.cola = asyncio.Queue(maxsize=cola_maxima)
+        self.espacios = asyncio.Semaphore(trabajadores)
+        self.tareas = set()
 
-            match opcion:
-                case 1:
-                    mostrar_cuadro([f'Usted escogió aumentar el valor de {dato} en porcentaje'])
-                    cantidad_aumento = pedir_numero('Escriba el porcentaje que desea aumentar (0 - 100) (Sin signo): ', 0, 100)
-                    propuestas[propuesta][dato] = dato_original * (1 + (cantidad_aumento / 100))
-                case 2:
-                    mostrar_cuadro([f'Usted escogió aumentar el valor de {dato} en cantidad ($)'])
-                    cantidad_aumento = pedir_numero('Escriba la cantidad que desea aumentar: ', 0)
-                    propuestas[propuesta][dato] = dato_original + cantidad_aumento
-                case 3:
-                    mostrar_cuadro([f'Usted escogió disminuir el valor de {dato} en porcentaje'])
-                    cantidad_aumento = pedir_numero('Escriba el porcentaje que desea disminuir (0 - 100) (Sin signo): ', 0, 100)
-                    propuestas[propuesta][dato] = dato_original - (dato_original * (cantidad_aumento / 100))
-                case 4:
-                    mostrar_cuadro([f'Usted escogió disminuir el valor del {dato} en cantidad ($)'])
-                    cantidad_aumento = pedir_numero('Escriba la cantidad que desea disminuir: ', 0)
-                    propuestas[propuesta][dato] = dato_original - cantidad_aumento
-                case 5:
-                    propuestas[propuesta][dato] = dato_original
+        self.peticiones = 0
+        self.lotes = 0
+        self.rechazadas = 0
 
-        propuestas_calculos[propuesta] = {
-                "Ingreso": propuestas[propuesta]["Ventas"] * propuestas[propuesta]["Precio de venta"],
-                "Costo Variable": propuestas[propuesta]["Costos Variables"],
-        }
+    def iniciar(self) -> None:
+        """Inicia la tarea que recolecta los lotes."""
 
-        propuestas_calculos[propuesta]["Margen de Contribución"] = propuestas_calculos[propuesta]["Ingreso"] - propuestas[propuesta]["Costos Variables"]
-        propuestas_calculos[propuesta]["Costo Fijo"] = propuestas[propuesta]["Costos Fijos"]
-        propuestas_calculos[propuesta]["Utilidad de Operación"] = propuestas_calculos[propuesta]["Margen de Contribución"] - propuestas[propuesta]["Costos Fijos"]
+        import asyncio
 
-    df_propuestas_calculos = pd.DataFrame(propuestas_calculos)
-    df_propuestas = pd.DataFrame(propuestas)
+        self.recolector = asyncio.get_running_loop().create_task(self.recolectar())
 
+    async def enviar(self, entradas: list[dict]) -> list[dict]:
+        """Forma las entradas de una petición en la cola y espera sus resultados.
 
-    exportar_excel(df_propuestas, df_propuestas_calculos, nombre_archivo="analisis_cvu")
+        Las entradas se forman todas o ninguna, para no calcular parte de una petición rechazada.
 
-    mostrar_cuadro(['Análisis'])
-    print(tabulate(df_propuestas_calculos, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
-    print(tabulate(df_propuestas, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+        Args:
+            entradas (list[dict]): Entradas ya validadas.
 
-    sleep(5)
+        Raises:
+            ErrorPeticion: Si no caben todas en la cola (503).
 
-######################## PRESUPUESTO DE VENTAS Y PRODUCCIÓN ########################
+        Returns:
+            list[dict]: Resultados en el mismo orden que las entradas.
+        """
 
-def presupuesto_ventas_produccion_menu() -> None:
-    """Muestra al usuario un menú para escoger el presupuesto que hará."""
+        import asyncio
 
-    titulo = "Presupuesto de ventas y producción"
-    subtitulo = "Escoja el tipo de cálculo que le gustaría realizar"
-    contenido = ['(1) - Presupuesto de ventas',
-        '(2) - Presupuesto de producción',
-        '(3) - Regresar al menú principal']
+        if self.cola.maxsize - self.cola.qsize() < len(entradas):
+            self.rechazadas += 1
+            raise ErrorPeticion(503, "El servicio está saturado, intente de nuevo")
 
-    while True:
-        mostrar_cuadro(contenido, titulo, subtitulo)
-        opcion = pedir_numero('Escriba el número de la opción: ', 1, 3)
+        futuros = []
+        for entrada in entradas:
+            futuro = asyncio.get_running_loop().create_future()
+            self.cola.put_nowait((entrada, futuro))
+            futuros.append(futuro)
 
-        match opcion:
-            case 1:
-                presupuesto_ventas()
-            case 2:
-                presupuesto_producción()
-            case 3:
-                return
+        return list(await asyncio.gather(*futuros))
 
+    async def recolectar(self) -> None:
+        """Junta lotes de la cola y los manda a calcular, indefinidamente."""
 
-def presupuesto_ventas(exportar: bool = False) -> None | dict:
-    """Muestra una interfaz al usuario para realizar el presupuesto de ventas.
+        import asyncio
+
+        while True:
+            lote = [await self.cola.get()]
+
+            #Damos tiempo a que lleguen más peticiones antes de cerrar el lote
+            if self.ventana > 0 and len(lote) + self.cola.qsize() < self.lote_maximo:
+                await asyncio.sleep(self.ventana)
+
+            while len(lote) < self.lote_maximo and not self.cola.empty():
+                lote.append(self.cola.get_nowait())
+
+            await self.espacios.acquire()
+            tarea = asyncio.get_running_loop().create_task(self.procesar(lote))
+            self.tareas.add(tarea)
+            tarea.add_done_callback(self.tareas.discard)
+
+    async def procesar(self, lote: list[tuple]) -> None:
+        """Calcula un lote en el grupo de trabajadores y entrega cada resultado a su petición."""
+
+        import asyncio
+
+        try:
+            resultados = await asyncio.get_running_loop().run_in_executor(self.ejecutor, self.funcion, [entrada for entrada, _ in lote])
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+        else:
+            for (_, futuro), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+        finally:
+            self.espacios.release()
+            self.peticiones += len(lote)
+            self.lotes += 1
+
+    def estadisticas(self) -> dict:
+        """Regresa los contadores del loteador."""
+
+        return {
+            'peticiones': self.peticiones,
+            'lotes': self.lotes,
+            'tamano_promedio_lote': self.peticiones / self.lotes if self.lotes else 0.0,
+            'en_cola': self.cola.qsize(),
+            'rechazadas': self.rechazadas
+        }
+
+def validar_entrada(entrada, requeridos: list[str], opcionales: list[str]) -> dict:
+    """Valida una entrada de un endpoint por lote y convierte sus campos a float.
 
     Args:
-        exportar (bool, optional): True si se quiere exportar el diccionario que contiene los datos del presupuesto. Defaults to False.
+        entrada: Entrada recibida.
+        requeridos (list[str]): Campos requeridos.
+        opcionales (list[str]): Campos opcionales.
+
+    Raises:
+        ErrorPeticion: Si la entrada no es un objeto, le falta un campo o algún campo no es numérico (400).
 
     Returns:
-        None | dict: None si no se expecifica que se quiere exportar el diccionario.
+        dict: Entrada con sólo los campos conocidos, como float.
     """
 
-    mostrar_cuadro(['Escriba la cantidad de productos que tiene'])
-    num_productos = pedir_numero('Cantidad de productos: ', 0)
+    if not isinstance(entrada, dict):
+        raise ErrorPeticion(400, "Cada entrada debe ser un objeto JSON")
 
-    datos = {}
+    faltantes = [campo for campo in requeridos if campo not in entrada]
+    if faltantes:
+        raise ErrorPeticion(400, f"Faltan los campos: {', '.join(faltantes)}")
 
-    for producto in range(0, num_productos):
-        mostrar_cuadro([f'Producto {producto + 1}'])
-        nombre = pedir_campo('Escriba el nombre del producto: ')
-        pronostico_ventas = pedir_numero('Pronóstico de ventas: ', 0)
-        precio_unitario = pedir_numero('Precio unitario (escriba el número 1 si no tiene este dato): ', 1)
-        ventas_presupuestadas = pronostico_ventas * precio_unitario
+    try:
+        return {campo: float(entrada[campo]) for campo in [*requeridos, *opcionales] if campo in entrada}
+    except (TypeError, ValueError) as e:
+        raise ErrorPeticion(400, f"Campo no numérico: {e}") from None
 
-        datos[nombre] = {
-            "Pronóstico de ventas": pronostico_ventas,
-            "Precio unitario": precio_unitario,
-            "Ventas presupuestadas": ventas_presupuestadas
-        }
+#Llaves de las entradas de un escenario que leen archivos locales; por HTTP sólo se aceptan entradas en línea
+LLAVES_ARCHIVO_SERVICIO = ['archivo', 'archivo_estructura', 'historial']
 
-    df_datos = pd.DataFrame(datos)
-    df_datos.index = ['Pronóstico de ventas', 'Precio unitario', 'Ventas presupuestadas']
+#Límites de los escenarios recibidos por HTTP
+SIMULACIONES_MAXIMAS_SERVICIO = 10_000_000
+COMBINACIONES_MAXIMAS_SERVICIO = 10_000_000
 
-    exportar_excel(df_datos, nombre_archivo="presupuesto_ventas")
+def validar_escenario_servicio(escenario) -> dict:
+    """Valida un escenario recibido por HTTP antes de ejecutarlo.
 
-    mostrar_cuadro(['Resultado del presupuesto de ventas'])
-    print(tabulate(df_datos, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+    El servicio no lee archivos locales, acota el tamaño de las simulaciones y de las rejillas
+    y ejecuta las simulaciones en el mismo hilo del trabajador (sin crear procesos).
 
-    sleep(5)
+    Args:
+        escenario: Escenario recibido.
 
-    if exportar:
-        return datos
+    Raises:
+        ErrorPeticion: Si el escenario no es un objeto con "calculo", lee archivos o excede los límites (400).
 
-def presupuesto_producción() -> None:
-    """Muestra una interfaz al usuario para la realización del presupuesto de producción."""
+    Returns:
+        dict: Escenario listo para ejecutar_escenario.
+    """
 
-    mostrar_aviso(['Primero usted deberá realizar el presupuesto de ventas,'
-                   'debido a que se requieren ciertos datos de este.'], tipo = "Información")
-    datos_ventas = presupuesto_ventas(exportar = True)
+    if not isinstance(escenario, dict) or 'calculo' not in escenario:
+        raise ErrorPeticion(400, "El escenario debe ser un objeto con la llave calculo")
 
-    mostrar_aviso(['A continuación, se iniciará el proceso del presupuesto de producción'], tipo = "Información")
-    datos_produccion = {}
+    entradas = escenario.get('entradas', {})
+    if not isinstance(entradas, dict):
+        raise ErrorPeticion(400, "Las entradas del escenario deben ser un objeto")
 
-    for producto, informacion in datos_ventas.items():
-        mostrar_cuadro([f'Producto {producto}'])
-        ventas = informacion['Ventas presupuestadas']
-        inventario_final = pedir_numero('Escriba el inventario final deseado de producto terminado: ', 0)
-        inventario_inicial = pedir_numero('Escriba el inventario inicial de producto terminado: ', 0)
-        produccion_requerida = (ventas + inventario_final) - inventario_inicial
+    archivos = [llave for llave in LLAVES_ARCHIVO_SERVICIO if llave in entradas]
+    if archivos:
+        raise ErrorPeticion(400, f"El servicio sólo acepta entradas en línea; quite las llaves: {', '.join(archivos)}")
 
-        datos_produccion[producto] = {
-            "Pronóstico de ventas": ventas,
-            "Inventario final": inventario_final,
-            "Inventario inicial": inventario_inicial,
-            "Producción requerida": produccion_requerida
-        }
+    match escenario['calculo']:
+        case 'analisis_cvu_simulacion':
+            simulaciones = entradas.get('simulaciones', 1_000_000)
+            if not isinstance(simulaciones, int) or not 1 <= simulaciones <= SIMULACIONES_MAXIMAS_SERVICIO:
+                raise ErrorPeticion(400, f"Las simulaciones deben ser un entero entre 1 y {SIMULACIONES_MAXIMAS_SERVICIO:,}")
 
-    #En esta parte calculamos los datos de la columna de total para después añadirlos
-    total_pronóstico_ventas = 0
-    total_inventario_inicial = 0
-    total_inventario_final = 0
-    total_produccion_requerida = 0
+            #El escenario ya corre en un hilo del servicio; no se crean procesos desde ahí
+            entradas = {**entradas, 'trabajadores': 1}
 
-    for producto, informacion in datos_produccion.items():
-        total_pronóstico_ventas += informacion["Pronóstico de ventas"]
-        total_inventario_final += informacion["Inventario final"]
-        total_inventario_inicial += informacion["Inventario inicial"]
-        total_produccion_requerida += informacion["Producción requerida"]
+        case 'analisis_cvu_rejilla':
+            combinaciones = 1
+            for campo in CAMPOS_CVU:
+                rango = entradas['rangos'][campo]
+                combinaciones *= cantidad_valores(rango['inicio'], rango['fin'], rango['paso']) if isinstance(rango, dict) else len(rango)
 
+            if combinaciones > COMBINACIONES_MAXIMAS_SERVICIO:
+                raise ErrorPeticion(400, f"La rejilla tendría {combinaciones:,} combinaciones y el máximo es {COMBINACIONES_MAXIMAS_SERVICIO:,}")
 
-    datos_produccion["Total"] = {
-        "Pronóstico de ventas": total_pronóstico_ventas,
-        "Inventario final": total_inventario_final,
-        "Inventario inicial": total_inventario_inicial,
-        "Producción requerida": total_produccion_requerida
-    }
+    return {**escenario, 'entradas': entradas}
 
-    df_datos_producción = pd.DataFrame(datos_produccion)
-    df_datos_producción.index = ['Pronóstico de ventas', 'Inventario final', 'Inventario inicial', 'Producción requerida']
+class ServicioCalculo:
+    """Servicio HTTP local (sólo biblioteca estándar y asyncio) para los cálculos del programa.
 
-    exportar_excel(df_datos_producción, nombre_archivo="presupuesto_producción")
+    Endpoints:
+        POST /punto_equilibrio, /unidades_impuestos y /analisis_cvu: un objeto o una lista de objetos con
+            las mismas entradas que los calculadores; se calculan por lotes (ver LoteadorPeticiones).
+        POST /escenario: un escenario con "calculo" y "entradas" en línea (ver ejecutar_escenario y
+            validar_escenario_servicio); regresa sus tablas.
+        GET /salud: estado del servicio y contadores de cada loteador.
+    """
 
-    mostrar_cuadro(['Resultado del presupuesto de producción'])
-    print(tabulate(df_datos_producción, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 8000, trabajadores: int = None, ventana_ms: float = 2,
+                 lote_maximo: int = 1024, cola_maxima: int = 10_000):
+        """Configura el servicio; se pone en marcha con servir.
 
-    sleep(5)
+        Args:
+            host (str, optional): Dirección donde se escucha. Defaults to "127.0.0.1".
+            puerto (int, optional): Puerto donde se escucha. Defaults to 8000.
+            trabajadores (int, optional): Hilos que calculan los lotes y escenarios. Defaults to None (cantidad de CPU).
+            ventana_ms (float, optional): Ventana para juntar peticiones en un lote, en milisegundos. Defaults to 2.
+            lote_maximo (int, optional): Cantidad máxima de peticiones por lote. Defaults to 1024.
+            cola_maxima (int, optional): Cantidad máxima de peticiones en espera por endpoint. Defaults to 10_000.
+        """
+
+        self.host = host
+        self.puerto = puerto
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.ventana = ventana_ms / 1000
+        self.lote_maximo = lote_maximo
+        self.cola_maxima = cola_maxima
+        self.escenarios_pendientes = 0
+
+    async def servir(self, listo=None) -> None:
+        """Pone en marcha el servicio hasta que se cancele.
 
-######################## PRESUPUESTO DE NECESIDADES DE MATERIAS PRIMAS Y COMPRAS ########################
+        Args:
+            listo (asyncio.Event, optional): Evento que se activa cuando el servicio ya escucha. Defaults to None.
+        """
 
-def presupuesto_necesidades_menu() -> None:
-    """Muestra un menú para iniciar el prespuesto de necesidades de materias primas y compras."""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
 
-    titulo = "Presupuesto de necesidades de materias primas y compras"
-    subtitulo = "Escoja el tipo de cálculo que le gustaría realizar"
-    contenido = ['(1) - Presupuesto de necesidades de materias primas y compras',
-            '(2) - Regresar al menú principal']
+        self.ejecutor = ThreadPoolExecutor(max_workers=self.trabajadores, thread_name_prefix='calculo')
+        self.loteadores = {ruta: LoteadorPeticiones(funcion, self.ejecutor, self.trabajadores, self.ventana, self.lote_maximo, self.cola_maxima)
+                           for ruta, (_, _, funcion) in ENDPOINTS_LOTE.items()}
+        for loteador in self.loteadores.values():
+            loteador.iniciar()
 
-    while True:
-        mostrar_cuadro(contenido, titulo, subtitulo)
-        opcion = pedir_numero('Escriba el número de la opción: ', 1, 3)
+        servidor = await asyncio.start_server(self.atender, self.host, self.puerto, limit=CUERPO_MAXIMO)
+        self.puerto = servidor.sockets[0].getsockname()[1]
 
-        match opcion:
-            case 1:
-                presupuesto_necesidades()
-            case 2:
-                return
+        if listo is not None:
+            listo.set()
 
-def presupuesto_necesidades() -> None:
-    """Se le muestra una interfaz al usuario para la realización del presupuesto de necesidades de materias primas y compras."""
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self.ejecutor.shutdown(wait=False, cancel_futures=True)
 
-    mostrar_aviso(['En este programa, este presupuesto se hará por producto',
-                   'por lo que puede requerir hacerlo muchas veces',
-                   'si tiene muchos productos.'])
+    async def atender(self, lector, escritor) -> None:
+        """Atiende las peticiones de una conexión, manteniéndola abierta mientras el cliente lo pida."""
 
-    mostrar_cuadro(['Escriba la producción requerida para el producto'])
-    produccion_requerida = pedir_numero('Producción requerida: ', 0)
+        import asyncio
 
-    mostrar_cuadro(['Escriba la cantidad de componentes (o ingredientes) que utiliza para fabricar el producto'])
-    num_componentes = pedir_numero('Cantidad de componentes: ', 0)
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
 
-    datos = {}
+                try:
+                    metodo, ruta, version = linea.decode('latin-1').split()
+                except ValueError:
+                    break
 
-    for componente in range(0, num_componentes):
-        mostrar_cuadro([f'Componente {componente + 1}'])
-        nombre = pedir_campo('Escriba el nombre del componente: ')
-        materia_prima_unidad = pedir_numero('Escriba la materia prima por unidad: ', 0)
-        materia_prima_produccion = produccion_requerida * materia_prima_unidad
-        inventario_final = pedir_numero('Escriba el inventario final deseado de materia prima: ', 0)
-        inventario_inicial = pedir_numero('Escriba el inventario inicial de materia prima: ', 0)
-        materia_prima_requerida = (materia_prima_produccion + inventario_final) - inventario_inicial
-        costo_materia_prima = pedir_numero('Escriba el costo de materia prima: ', 0)
-        compras_presupuestadas = materia_prima_requerida * costo_materia_prima
+                encabezados = {}
+                while (linea := await lector.readline()) not in (b'\r\n', b'\n', b''):
+                    nombre, _, valor = linea.decode('latin-1').partition(':')
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                mantener = encabezados.get('connection', '').lower() != 'close' if version == 'HTTP/1.1' \
+                           else encabezados.get('connection', '').lower() == 'keep-alive'
+
+                longitud = encabezados.get('content-length', '0') or '0'
+                longitud = int(longitud) if longitud.isascii() and longitud.isdigit() else None
+
+                #Sin una longitud válida no se sabe dónde termina el cuerpo, así que se cierra la conexión
+                if longitud is None:
+                    estado, contenido, mantener = 400, {'error': 'Content-Length inválido'}, False
+                elif longitud > CUERPO_MAXIMO:
+                    estado, contenido, mantener = 413, {'error': 'El cuerpo de la petición es demasiado grande'}, False
+                else:
+                    cuerpo = await lector.readexactly(longitud) if longitud else b''
+                    estado, contenido = await self.responder(metodo, ruta.split('?', 1)[0], cuerpo)
+
+                datos = json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+                escritor.write(f"HTTP/1.1 {estado} {MENSAJES_HTTP[estado]}\r\n"
+                               f"Content-Type: application/json; charset=utf-8\r\n"
+                               f"Content-Length: {len(datos)}\r\n"
+                               f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1') + datos)
+                await escritor.drain()
+
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
 
-        datos[nombre] = {
-            "Materia prima por unidad": materia_prima_unidad,
-            "Materia prima para la producción": materia_prima_produccion,
-            "Inventario final deseado de materia prima": inventario_final,
-            "Inventario inicial de materia prima": inventario_inicial,
-            "Materia prima requerida": materia_prima_requerida,
-            "Costo de materia prima": costo_materia_prima,
-            "Compras presupuestadas": compras_presupuestadas
-        }
+    async def responder(self, metodo: str, ruta: str, cuerpo: bytes) -> tuple[int, object]:
+        """Resuelve una petición.
 
-    df_datos = pd.DataFrame(datos)
-    df_datos.index = ['Materia prima por unidad', 'Materia prima para la producción', 'Inventario final deseado de materia prima', 'Inventario inicial de materia prima', 'Materia prima requerida', 'Costo de materia prima', 'Compras presupuestadas']
+        Args:
+            metodo (str): Método HTTP.
+            ruta (str): Ruta sin parámetros.
+            cuerpo (bytes): Cuerpo de la petición.
 
-    exportar_excel(df_datos, nombre_archivo="presupuesto_necesidades")
+        Returns:
+            tuple[int, object]: Código de estado y contenido de la respuesta.
+        """
 
-    mostrar_cuadro(['Resultado'])
-    print(tabulate(df_datos, headers='keys', tablefmt='psql', floatfmt=",.2f", numalign="center", intfmt=","))
+        try:
+            if ruta == '/salud':
+                return 200, {'estado': 'ok', 'trabajadores': self.trabajadores, 'escenarios_pendientes': self.escenarios_pendientes,
+                             'lotes': {ruta: loteador.estadisticas() for ruta, loteador in self.loteadores.items()}}
 
-    sleep(5)
+            if ruta not in ENDPOINTS_LOTE and ruta != '/escenario':
+                raise ErrorPeticion(404, f"No existe la ruta {ruta}")
 
-######################## MENÚ PRINCIPAL ########################
-def menu() -> None:
-    """Función que le muestra el menú principal al usuario."""
+            if metodo != 'POST':
+                raise ErrorPeticion(405, "Use POST")
 
-    titulo = "Bienvenido al programa contable"
-    subtitulo = "Escoge la opción"
-    opciones = [
-        '(1) - Punto de equilibrio en unidades/pesos normal o multilínea',
-        '(2) - Unidades a vender antes/después de impuestos normal o multilínea',
-        '(3) - Análisis Costo-Volumen-Utilidad',
-        '(4) - Presupuesto de Ventas y Producción',
-        '(5) - Presupuesto de necesidades de Materias Primas y Compras',
-        '(6) - Salir del programa'
-    ]
+            try:
+                entrada = json.loads(cuerpo or b'null')
+            except ValueError as e:
+                raise ErrorPeticion(400, f"JSON inválido: {e}") from None
 
-    while True:
+            if ruta == '/escenario':
+                return 200, await self.escenario(entrada)
+
+            requeridos, opcionales, _ = ENDPOINTS_LOTE[ruta]
+            loteador = self.loteadores[ruta]
+
+            #Una lista de entradas se responde con una lista de resultados en el mismo orden
+            if isinstance(entrada, list):
+                return 200, await loteador.enviar([validar_entrada(elemento, requeridos, opcionales) for elemento in entrada])
+
+            return 200, (await loteador.enviar([validar_entrada(entrada, requeridos, opcionales)]))[0]
+
+        except ErrorPeticion as e:
+            return e.estado, {'error': str(e)}
+        except (KeyError, ValueError, TypeError, ZeroDivisionError) as e:
+            return 400, {'error': f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def escenario(self, escenario) -> dict:
+        """Ejecuta un escenario en el grupo de trabajadores, respetando el límite de la cola.
+
+        Args:
+            escenario: Escenario con "calculo" y "entradas".
+
+        Raises:
+            ErrorPeticion: Si el escenario no es válido (400, ver validar_escenario_servicio) o hay demasiados
+                escenarios pendientes (503).
+
+        Returns:
+            dict: Cada tabla del resultado en el formato "split" de pandas (columns, index y data).
+        """
+
+        import asyncio
+
+        escenario = validar_escenario_servicio(escenario)
+
+        if self.escenarios_pendientes >= self.cola_maxima:
+            raise ErrorPeticion(503, "El servicio está saturado, intente de nuevo")
+
+        self.escenarios_pendientes += 1
         try:
-            mostrar_cuadro(opciones, titulo, subtitulo)
-            opcion = pedir_numero(f"{negrita('Escribe el número de la opción que vas a escoger: ')}", 1, 6)
+            tablas = await asyncio.get_running_loop().run_in_executor(self.ejecutor, ejecutar_escenario, escenario)
+        finally:
+            self.escenarios_pendientes -= 1
 
-            match opcion:
-                case 1:
-                    punto_equilibrio_menu()
-                case 2:
-                    unidades_impuestos_menu()
-                case 3:
-                    analisis_cvu_menu()
-                case 4:
-                    presupuesto_ventas_produccion_menu()
-                case 5:
-                    presupuesto_necesidades_menu()
-                case 6:
-                    break
-        except Salir:
+        return {nombre: json.loads(tabla.to_json(orient='split', force_ascii=False)) for nombre, tabla in tablas.items()}
+
+def ejecutar_servidor(host: str = "127.0.0.1", puerto: int = 8000, trabajadores: int = None, ventana_ms: float = 2,
+                      lote_maximo: int = 1024, cola_maxima: int = 10_000) -> int:
+    """Pone en marcha el servicio HTTP local hasta que se interrumpa con Ctrl+C.
+
+    Args:
+        host (str, optional): Dirección donde se escucha. Defaults to "127.0.0.1".
+        puerto (int, optional): Puerto donde se escucha. Defaults to 8000.
+        trabajadores (int, optional): Hilos de cálculo. Defaults to None (cantidad de CPU).
+        ventana_ms (float, optional): Ventana para juntar peticiones en un lote, en milisegundos. Defaults to 2.
+        lote_maximo (int, optional): Cantidad máxima de peticiones por lote. Defaults to 1024.
+        cola_maxima (int, optional): Cantidad máxima de peticiones en espera por endpoint. Defaults to 10_000.
+
+    Returns:
+        int: Código de salida.
+    """
+
+    import asyncio
+
+    servicio = ServicioCalculo(host, puerto, trabajadores, ventana_ms, lote_maximo, cola_maxima)
+
+    async def iniciar():
+        listo = asyncio.Event()
+        tarea = asyncio.create_task(servicio.servir(listo))
+        await listo.wait()
+        print(f"Servicio escuchando en http://{servicio.host}:{servicio.puerto} ({servicio.trabajadores} trabajadores)", flush=True)
+        await tarea
+
+    try:
+        asyncio.run(iniciar())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}")
+        return 2
+
+    return 0
+
+######################## PERFIL DE ARRANQUE ########################
+def perfil_arranque(limite_ms: float = None, cantidad: int = 10) -> int:
+    """Mide el costo de arranque del programa e imprime el costo de importación por módulo.
+
+    Primero se importa este archivo en un proceso nuevo con "python -X importtime" para medir
+    lo que cuesta llegar al menú; después se mide cuánto cuesta cargar cada dependencia perezosa.
+
+    Args:
+        limite_ms (float, optional): Tiempo máximo de importación permitido en milisegundos. Defaults to None.
+        cantidad (int, optional): Cantidad de módulos más costosos a mostrar. Defaults to 10.
+
+    Returns:
+        int: 1 si se superó el límite, 0 en otro caso.
+    """
+
+    import subprocess
+
+    carpeta, archivo = os.path.split(os.path.abspath(__file__))
+    nombre_modulo = os.path.splitext(archivo)[0]
+
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {nombre_modulo}'],
+                             cwd=carpeta, capture_output=True, text=True)
+
+    #Cada línea tiene el formato "import time: propio | acumulado | módulo"
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
             continue
 
+        propio, acumulado, modulo = linea.removeprefix('import time:').split('|')
+        modulos.append((modulo.strip(), int(propio) / 1000, int(acumulado) / 1000))
+
+    tiempo_arranque = next((acumulado for modulo, _, acumulado in modulos if modulo == nombre_modulo), 0.0)
+
+    print(f"Importación de {nombre_modulo}: {tiempo_arranque:,.1f} ms")
+    print(f"Módulos más costosos (de {len(modulos)} importados):")
+    for modulo, propio, acumulado in sorted(modulos, key=lambda modulo: modulo[1], reverse=True)[:cantidad]:
+        print(f"  {modulo:<40} propio: {propio:>9,.1f} ms   acumulado: {acumulado:>9,.1f} ms")
+
+    print("Costo de las dependencias perezosas (al usarse por primera vez):")
+    for modulo in MODULOS_PEREZOSOS:
+        ya_cargado = modulo in sys.modules
+        inicio = perf_counter()
+        importlib.import_module(modulo)
+        duracion = (perf_counter() - inicio) * 1000
+        print(f"  {modulo:<40} {duracion:>9,.1f} ms{' (ya cargado)' if ya_cargado else ''}")
+
+    if limite_ms is not None and tiempo_arranque > limite_ms:
+        print(f"Error: el arranque ({tiempo_arranque:,.1f} ms) supera el límite de {limite_ms:,.1f} ms")
+        return 1
+
+    return 0
 
 ######################## INICIALIZACIÓN DEL PROGRAMA ########################
-if __name__ == "__main__":
+def main(argumentos: list[str] = None) -> int:
+    """Punto de entrada del programa.
+
+    Sin argumentos se muestra el menú interactivo. Con --escenario se ejecutan los
+    escenarios indicados sin interacción y sin pausas.
+
+    Args:
+        argumentos (list[str], optional): Argumentos de la línea de comandos. Defaults to None (sys.argv).
+
+    Returns:
+        int: Código de salida.
+    """
+
+    global RUTA_ALMACEN
+
+    parser = argparse.ArgumentParser(description="Programa contable")
+    parser.add_argument('-e', '--escenario', action='append', metavar='RUTA',
+                        help="Archivo de escenarios (.json o .yaml) a ejecutar sin interacción. Se puede repetir.")
+    parser.add_argument('-s', '--salida', default='.', metavar='CARPETA',
+                        help="Carpeta donde se guardan los resultados de los escenarios.")
+    parser.add_argument('-f', '--formato', choices=list(FORMATOS_EXPORTACION),
+                        help="Formato de exportación de los escenarios (por defecto, xlsx).")
+    parser.add_argument('--almacen', nargs='?', const=RUTA_ALMACEN_PREDETERMINADA, metavar='RUTA',
+                        help="Guarda las ejecuciones en un archivo de SQLite (por defecto, "
+                             f"{RUTA_ALMACEN_PREDETERMINADA}). Sin esta opción no se guardan.")
+    parser.add_argument('--cache-disco', metavar='CARPETA',
+                        help="Carpeta donde se guardan los resultados calculados para reutilizarlos entre sesiones.")
+    parser.add_argument('--cache-limite', type=float, default=1024, metavar='MB',
+                        help="Tamaño máximo de la caché en disco, en megabytes (por defecto, 1024).")
+    parser.add_argument('--servidor', action='store_true',
+                        help="Inicia el servicio HTTP local en lugar del menú.")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Dirección donde escucha el servicio (por defecto, 127.0.0.1).")
+    parser.add_argument('--puerto', type=int, default=8000,
+                        help="Puerto donde escucha el servicio (por defecto, 8000).")
+    parser.add_argument('--trabajadores', type=int, metavar='N',
+                        help="Hilos de cálculo del servicio (por defecto, la cantidad de CPU).")
+    parser.add_argument('--ventana-ms', type=float, default=2, metavar='MS',
+                        help="Ventana para juntar peticiones en un lote, en milisegundos (por defecto, 2).")
+    parser.add_argument('--lote-maximo', type=int, default=1024, metavar='N',
+                        help="Cantidad máxima de peticiones por lote (por defecto, 1024).")
+    parser.add_argument('--cola-maxima', type=int, default=10_000, metavar='N',
+                        help="Peticiones en espera por endpoint antes de responder 503 (por defecto, 10000).")
+    parser.add_argument('--perfil-arranque', '--startup-profile', action='store_true',
+                        help="Mide el tiempo de arranque y el costo de importación por módulo.")
+    parser.add_argument('--limite-arranque', type=float, metavar='MS',
+                        help="Con --perfil-arranque, falla si la importación tarda más de MS milisegundos.")
+    parser.add_argument('--dinero-exacto', nargs='?', type=int, const=ESCALA_DINERO, metavar='ESCALA',
+                        help="Calcula los importes con enteros en la unidad mínima de ESCALA (por defecto, "
+                             f"{ESCALA_DINERO}: centavos) en lugar de flotantes.")
+    parser.add_argument('--redondeo', choices=REDONDEOS, default=REDONDEO_DINERO,
+                        help=f"Regla de redondeo del dinero exacto (por defecto, {REDONDEO_DINERO}).")
+    parser.add_argument('--traza', nargs='?', const=RUTA_TRAZA, metavar='RUTA',
+                        help="Mide cada etapa de los cálculos y la escribe en RUTA (JSON Lines, por defecto "
+                             f"{RUTA_TRAZA}); al salir se imprime un resumen. También se activa con CONTABILIDAD_TRAZA.")
+    parser.add_argument('--reporte-memoria', action='store_true',
+                        help="Con -e, muestra la memoria de cada tabla de resultado comparada con la misma tabla sin compactar.")
+    argumentos = parser.parse_args(argumentos)
+
+    RUTA_ALMACEN = argumentos.almacen
+
+    if argumentos.dinero_exacto is not None:
+        try:
+            validar_aritmetica(argumentos.dinero_exacto, argumentos.redondeo)
+        except ValueError as e:
+            parser.error(str(e))
+
+        ARITMETICA_DINERO.update(escala=argumentos.dinero_exacto, redondeo=argumentos.redondeo)
+
+    if argumentos.cache_disco:
+        CACHE_RESULTADOS.usar_disco(argumentos.cache_disco, int(argumentos.cache_limite * 1024 ** 2))
+
+    ruta_traza = argumentos.traza or ruta_traza_entorno()
+    if ruta_traza:
+        activar_traza(ruta_traza)
+
+    if argumentos.perfil_arranque:
+        return perfil_arranque(argumentos.limite_arranque)
+
+    if argumentos.servidor:
+        return ejecutar_servidor(argumentos.host, argumentos.puerto, argumentos.trabajadores, argumentos.ventana_ms,
+                                 argumentos.lote_maximo, argumentos.cola_maxima)
+
+    if argumentos.escenario:
+        try:
+            fallidos = ejecutar_escenarios(argumentos.escenario, argumentos.salida, argumentos.formato, argumentos.reporte_memoria)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error: {e}")
+            return 2
+
+        return 1 if fallidos else 0
+
     menu()
+    terminar_exportaciones()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+######################## BENCHMARK DE LOS CALCULADORES ########################
+#Mide el tiempo y la memoria máxima de cada calculador de app.py con entradas sintéticas,
+#guarda los resultados en un historial JSON Lines y los compara con la ejecución anterior.
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+import app
+
+#Tamaños por defecto (filas, productos, propuestas o componentes, según el caso)
+TAMANOS = [10, 1_000, 100_000, 10_000_000]
+
+#Cambio relativo a partir del cual una medición cuenta como más lenta o más pesada
+TOLERANCIA = 0.25
+
+#Diferencias menores a estos mínimos se consideran ruido
+MINIMO_SEGUNDOS = 0.005
+MINIMO_BYTES = 1024 ** 2
+
+def datos_punto_equilibrio(tamano: int, generador: np.random.Generator) -> pd.DataFrame:
+    """Genera un catálogo para el punto de equilibrio normal, con algunos márgenes cero o negativos."""
+
+    return pd.DataFrame({
+        'precio_venta': generador.uniform(10, 100, tamano),
+        'costo_variable': generador.uniform(1, 100, tamano),
+        'costo_fijo': generador.uniform(1_000, 100_000, tamano)
+    })
+
+def datos_multilinea(tamano: int, generador: np.random.Generator) -> pd.DataFrame:
+    """Genera una mezcla de productos cuyos porcentajes suman 100."""
+
+    precio_venta = generador.uniform(10, 100, tamano)
+    costo_variable = precio_venta * generador.uniform(0.2, 0.8, tamano)
+    participacion = generador.random(tamano)
+
+    return pd.DataFrame({
+        'porcentaje_margen_contribucion': participacion / participacion.sum() * 100,
+        'precio_venta': precio_venta,
+        'costo_variable': costo_variable,
+        'margen_contribucion': precio_venta - costo_variable
+    })
+
+def datos_unidades(tamano: int, generador: np.random.Generator) -> dict:
+    """Genera arreglos de entradas para las unidades antes y después de impuestos."""
+
+    return {
+        'costo_fijo_total': generador.uniform(1_000, 100_000, tamano),
+        'utilidad_deseada': generador.uniform(0, 50_000, tamano),
+        'margen_contribucion_unitario': generador.uniform(1, 50, tamano),
+        'tasa_impositiva': generador.uniform(0, 40, tamano)
+    }
+
+def datos_cvu(tamano: int, generador: np.random.Generator) -> dict:
+    """Genera arreglos con los campos de CAMPOS_CVU."""
+
+    return {campo: generador.uniform(1, 10_000, tamano) for campo in app.CAMPOS_CVU}
+
+def datos_propuestas(tamano: int, generador: np.random.Generator) -> dict:
+    """Genera la situación actual y tamano - 1 propuestas en el formato de calcular_analisis_cvu."""
+
+    valores = datos_cvu(tamano, generador)
+    propuestas = {numero: {campo: float(valores[campo][numero]) for campo in app.CAMPOS_CVU} for numero in range(tamano)}
+    propuestas['actual'] = propuestas.pop(0)
+
+    return propuestas
+
+def datos_ventas(tamano: int, generador: np.random.Generator) -> pd.DataFrame:
+    """Genera los productos del presupuesto de ventas."""
+
+    return pd.DataFrame({'pronostico_ventas': generador.integers(0, 10_000, tamano), 'precio_unitario': generador.uniform(1, 100, tamano)})
+
+def datos_produccion(tamano: int, generador: np.random.Generator) -> pd.DataFrame:
+    """Genera los productos del presupuesto de producción."""
+
+    return pd.DataFrame({
+        'ventas': generador.integers(0, 10_000, tamano),
+        'inventario_final': generador.integers(0, 1_000, tamano),
+        'inventario_inicial': generador.integers(0, 1_000, tamano)
+    })
+
+def datos_necesidades(tamano: int, generador: np.random.Generator) -> pd.DataFrame:
+    """Genera los componentes del presupuesto de necesidades."""
+
+    return pd.DataFrame({
+        'materia_prima_unidad': generador.uniform(0.1, 10, tamano),
+        'inventario_final': generador.integers(0, 1_000, tamano),
+        'inventario_inicial': generador.integers(0, 1_000, tamano),
+        'costo_materia_prima': generador.uniform(1, 100, tamano)
+    })
+
+def exportar_temporal(datos: pd.DataFrame, flujo: bool) -> None:
+    """Exporta a un libro de Excel temporal, sin avisos ni reutilización de archivos."""
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        app.exportar_excel(datos, nombre_archivo=os.path.join(carpeta, 'benchmark'), aviso=False, flujo=flujo)
+
+def mostrar_sin_salida(datos: pd.DataFrame) -> None:
+    """Renderiza una tabla con mostrar_tabla en modo no interactivo, descartando la salida."""
+
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        app.mostrar_tabla(datos, interactivo=False)
+
+#Caso: (función que prepara las entradas, función que calcula, tamaño máximo razonable).
+#Las funciones con caché se miden sin ella (__wrapped__) para medir el cálculo.
+CASOS = {
+    'punto_equilibrio_normal': (datos_punto_equilibrio, app.punto_equilibrio_lote.__wrapped__, None),
+    'punto_equilibrio_multilinea': (datos_multilinea, lambda datos: app.calcular_punto_equilibrio_multilinea.__wrapped__(datos, 100_000), None),
+    'unidades_antes_impuestos': (datos_unidades, lambda datos: app.barrido_unidades_impuestos(
+        datos['costo_fijo_total'], datos['utilidad_deseada'], datos['margen_contribucion_unitario']), None),
+    'unidades_despues_impuestos': (datos_unidades, lambda datos: app.barrido_unidades_impuestos(
+        datos['costo_fijo_total'], datos['utilidad_deseada'], datos['margen_contribucion_unitario'], datos['tasa_impositiva']), None),
+    'analisis_cvu': (datos_propuestas, app.calcular_analisis_cvu.__wrapped__, 100_000),
+    'analisis_cvu_vectorizado': (datos_cvu, app.resultado_cvu, None),
+    'presupuesto_ventas': (datos_ventas, app.calcular_presupuesto_ventas.__wrapped__, None),
+    'presupuesto_produccion': (datos_produccion, app.calcular_presupuesto_produccion.__wrapped__, None),
+    'presupuesto_necesidades': (datos_necesidades, lambda datos: app.calcular_presupuesto_necesidades.__wrapped__(1_000, datos), None),
+    'exportar_excel': (datos_punto_equilibrio, lambda datos: exportar_temporal(datos, False), 100_000),
+    'exportar_excel_flujo': (datos_punto_equilibrio, lambda datos: exportar_temporal(datos, True), 1_000_000),
+    'mostrar_tabla': (datos_punto_equilibrio, mostrar_sin_salida, None)
+}
+
+def medir(funcion, *args, memoria: bool = True) -> tuple:
+    """Ejecuta una función y mide su tiempo y, opcionalmente, su memoria máxima.
+
+    El tiempo se mide sin tracemalloc, que hace más lento el código; la memoria se mide en una segunda ejecución.
+
+    Args:
+        funcion (Callable): Función a medir.
+        *args: Argumentos de la función.
+        memoria (bool, optional): True si también se quiere medir la memoria máxima. Defaults to True.
+
+    Returns:
+        tuple: Resultado de la función, segundos y memoria máxima en bytes (None si no se midió).
+    """
+
+    gc.collect()
+    inicio = perf_counter()
+    resultado = funcion(*args)
+    segundos = perf_counter() - inicio
+
+    pico = None
+    if memoria:
+        del resultado
+        gc.collect()
+        tracemalloc.start()
+        resultado = funcion(*args)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return resultado, segundos, pico
+
+def ejecutar_benchmark(casos: list[str], tamanos: list[int], memoria: bool = True, semilla: int = 0) -> list[dict]:
+    """Ejecuta los casos en todos los tamaños, midiendo las etapas de preparación y cálculo.
+
+    Args:
+        casos (list[str]): Nombres de los casos de CASOS.
+        tamanos (list[int]): Tamaños a medir; se omiten los mayores al máximo de cada caso.
+        memoria (bool, optional): True si se quiere medir la memoria máxima. Defaults to True.
+        semilla (int, optional): Semilla de las entradas sintéticas. Defaults to 0.
+
+    Returns:
+        list[dict]: Una medición por caso, tamaño y etapa.
+    """
+
+    mediciones = []
+
+    for caso in casos:
+        preparar, calcular, tamano_maximo = CASOS[caso]
+
+        for tamano in tamanos:
+            if tamano_maximo is not None and tamano > tamano_maximo:
+                continue
+
+            generador = np.random.default_rng(semilla)
+            datos, segundos_preparacion, pico_preparacion = medir(preparar, tamano, generador, memoria=False)
+            _, segundos_calculo, pico_calculo = medir(calcular, datos, memoria=memoria)
+
+            for etapa, segundos, pico in (('preparacion', segundos_preparacion, pico_preparacion), ('calculo', segundos_calculo, pico_calculo)):
+                mediciones.append({'caso': caso, 'tamano': tamano, 'etapa': etapa, 'segundos': segundos, 'memoria_pico': pico})
+
+            print(f"{caso:<30} {tamano:>12,}   {segundos_calculo * 1000:>12,.2f} ms"
+                  f"{'' if pico_calculo is None else f'   {pico_calculo / 1024 ** 2:>10,.1f} MiB'}", flush=True)
+
+            del datos
+
+    return mediciones
+
+def version_actual() -> str:
+    """Regresa el commit actual de git, o "desconocida" si no se puede obtener."""
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+def cargar_historial(ruta: str) -> list[dict]:
+    """Lee el historial de ejecuciones (una ejecución JSON por línea)."""
+
+    if not os.path.exists(ruta):
+        return []
+
+    with open(ruta, encoding='utf-8') as archivo:
+        return [json.loads(linea) for linea in archivo if linea.strip()]
+
+def comparar(anterior: dict, actual: dict, tolerancia: float = TOLERANCIA) -> list[str]:
+    """Compara dos ejecuciones y lista las mediciones que empeoraron más que la tolerancia.
+
+    Args:
+        anterior (dict): Ejecución de referencia.
+        actual (dict): Ejecución nueva.
+        tolerancia (float, optional): Cambio relativo permitido. Defaults to TOLERANCIA.
+
+    Returns:
+        list[str]: Descripción de cada medición más lenta o más pesada; vacía si no hay regresiones.
+    """
+
+    referencia = {(medicion['caso'], medicion['tamano'], medicion['etapa']): medicion for medicion in anterior['mediciones']}
+    regresiones = []
+
+    for medicion in actual['mediciones']:
+        #La preparación de las entradas sintéticas no es parte del programa
+        if medicion['etapa'] == 'preparacion':
+            continue
+
+        previa = referencia.get((medicion['caso'], medicion['tamano'], medicion['etapa']))
+        if previa is None:
+            continue
+
+        nombre = f"{medicion['caso']} ({medicion['tamano']:,}, {medicion['etapa']})"
+
+        if (medicion['segundos'] > previa['segundos'] * (1 + tolerancia)
+                and medicion['segundos'] - previa['segundos'] > MINIMO_SEGUNDOS):
+            regresiones.append(f"{nombre}: {previa['segundos'] * 1000:,.2f} ms -> {medicion['segundos'] * 1000:,.2f} ms")
+
+        if (medicion['memoria_pico'] is not None and previa['memoria_pico'] is not None
+                and medicion['memoria_pico'] > previa['memoria_pico'] * (1 + tolerancia)
+                and medicion['memoria_pico'] - previa['memoria_pico'] > MINIMO_BYTES):
+            regresiones.append(f"{nombre}: {previa['memoria_pico'] / 1024 ** 2:,.1f} MiB -> {medicion['memoria_pico'] / 1024 ** 2:,.1f} MiB")
+
+    return regresiones
+
+def main(argumentos: list[str] = None) -> int:
+    """Punto de entrada del benchmark.
+
+    Args:
+        argumentos (list[str], optional): Argumentos de la línea de comandos. Defaults to None (sys.argv).
+
+    Returns:
+        int: 1 si hubo regresiones respecto a la ejecución de referencia, 0 en otro caso.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark de los calculadores de app.py")
+    parser.add_argument('--casos', default=','.join(CASOS),
+                        help=f"Casos separados por comas (por defecto, todos: {', '.join(CASOS)}).")
+    parser.add_argument('--tamanos', default=','.join(map(str, TAMANOS)),
+                        help="Tamaños separados por comas (por defecto, 10,1000,100000,10000000).")
+    parser.add_argument('--historial', default='benchmark_historial.jsonl', metavar='RUTA',
+                        help="Archivo JSON Lines con el historial de ejecuciones.")
+    parser.add_argument('--no-guardar', action='store_true', help="No agrega esta ejecución al historial.")
+    parser.add_argument('--comparar', nargs='?', const='ultima', metavar='VERSION',
+                        help="Compara con la última ejecución del historial, o con la última de VERSION.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f"Cambio relativo permitido al comparar (por defecto, {TOLERANCIA}).")
+    parser.add_argument('--sin-memoria', action='store_true', help="No mide la memoria máxima (más rápido).")
+    argumentos = parser.parse_args(argumentos)
+
+    casos = [caso.strip() for caso in argumentos.casos.split(',') if caso.strip()]
+    desconocidos = [caso for caso in casos if caso not in CASOS]
+    if desconocidos:
+        parser.error(f"Casos desconocidos: {', '.join(desconocidos)}")
+
+    tamanos = [int(tamano) for tamano in argumentos.tamanos.split(',') if tamano.strip()]
+
+    historial = cargar_historial(argumentos.historial)
+
+    print(f"{'caso':<30} {'tamaño':>12}   {'cálculo':>15}   {'memoria':>14}")
+    ejecucion = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'mediciones': ejecutar_benchmark(casos, tamanos, memoria=not argumentos.sin_memoria)
+    }
+
+    if not argumentos.no_guardar:
+        with open(argumentos.historial, 'a', encoding='utf-8') as archivo:
+            archivo.write(json.dumps(ejecucion) + '\n')
+
+    if argumentos.comparar is None:
+        return 0
+
+    candidatas = historial if argumentos.comparar == 'ultima' else [previa for previa in historial if previa['version'] == argumentos.comparar]
+    if not candidatas:
+        print("No hay una ejecución de referencia para comparar")
+        return 0
+
+    referencia = candidatas[-1]
+    regresiones = comparar(referencia, ejecucion, argumentos.tolerancia)
+
+    print(f"Comparación con {referencia['version']} ({referencia['fecha']}):")
+    if not regresiones:
+        print("  Sin regresiones")
+        return 0
+
+    for regresion in regresiones:
+        print(f"  Regresión: {regresion}")
+
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
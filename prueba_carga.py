@@ -0,0 +1,214 @@
+######################## PRUEBA DE CARGA DEL SERVICIO HTTP ########################
+#Genera peticiones concurrentes contra el servicio de app.py (python app.py --servidor)
+#y reporta el rendimiento y la latencia. Sólo usa la biblioteca estándar.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+from time import perf_counter, sleep
+
+def entrada_aleatoria(endpoint: str, generador: random.Random) -> dict:
+    """Genera una entrada aleatoria válida para un endpoint.
+
+    Args:
+        endpoint (str): Ruta del endpoint.
+        generador (random.Random): Generador de números aleatorios.
+
+    Returns:
+        dict: Entrada de la petición.
+    """
+
+    match endpoint:
+        case '/punto_equilibrio':
+            return {'precio_venta': generador.uniform(10, 100), 'costo_variable': generador.uniform(1, 50),
+                    'costo_fijo': generador.uniform(1_000, 100_000)}
+        case '/unidades_impuestos':
+            return {'costo_fijo_total': generador.uniform(1_000, 100_000), 'utilidad_deseada': generador.uniform(0, 50_000),
+                    'margen_contribucion_unitario': generador.uniform(1, 50), 'tasa_impositiva': generador.uniform(0, 40)}
+        case '/analisis_cvu':
+            return {'Precio de venta': generador.uniform(10, 100), 'Costos Variables': generador.uniform(1_000, 50_000),
+                    'Costos Fijos': generador.uniform(1_000, 50_000), 'Ventas': generador.uniform(100, 10_000)}
+        case _:
+            raise ValueError(f"Endpoint desconocido: {endpoint}")
+
+def percentil(valores: list[float], porcentaje: float) -> float:
+    """Calcula un percentil por el método del rango más cercano.
+
+    Args:
+        valores (list[float]): Valores ordenados de menor a mayor.
+        porcentaje (float): Percentil (0 - 100).
+
+    Returns:
+        float: Valor del percentil, o 0 si no hay valores.
+    """
+
+    if not valores:
+        return 0.0
+
+    posicion = max(0, min(len(valores) - 1, round(porcentaje / 100 * len(valores) + 0.5) - 1))
+    return valores[posicion]
+
+async def cliente(host: str, puerto: int, endpoint: str, peticiones: int, semilla: int, latencias: list[float], estados: dict) -> None:
+    """Envía peticiones una tras otra por una sola conexión persistente.
+
+    Args:
+        host (str): Dirección del servicio.
+        puerto (int): Puerto del servicio.
+        endpoint (str): Ruta del endpoint.
+        peticiones (int): Cantidad de peticiones a enviar.
+        semilla (int): Semilla de las entradas aleatorias.
+        latencias (list[float]): Lista donde se agregan las latencias de las respuestas 200, en segundos.
+        estados (dict): Conteo de respuestas por código de estado.
+    """
+
+    generador = random.Random(semilla)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+
+    try:
+        for _ in range(peticiones):
+            cuerpo = json.dumps(entrada_aleatoria(endpoint, generador)).encode('utf-8')
+
+            inicio = perf_counter()
+            escritor.write(f"POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('latin-1') + cuerpo)
+            await escritor.drain()
+
+            estado = int((await lector.readline()).split()[1])
+            longitud = 0
+            while (linea := await lector.readline()) not in (b'\r\n', b''):
+                nombre, _, valor = linea.decode('latin-1').partition(':')
+                if nombre.strip().lower() == 'content-length':
+                    longitud = int(valor)
+            await lector.readexactly(longitud)
+
+            estados[estado] = estados.get(estado, 0) + 1
+            if estado == 200:
+                latencias.append(perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+async def prueba_carga(host: str, puerto: int, endpoint: str, peticiones: int, concurrencia: int) -> dict:
+    """Ejecuta la prueba de carga repartiendo las peticiones entre varios clientes concurrentes.
+
+    Args:
+        host (str): Dirección del servicio.
+        puerto (int): Puerto del servicio.
+        endpoint (str): Ruta del endpoint.
+        peticiones (int): Cantidad total de peticiones.
+        concurrencia (int): Cantidad de conexiones simultáneas.
+
+    Returns:
+        dict: Resultados: peticiones, estados, duración, rendimiento y percentiles de latencia (en milisegundos).
+    """
+
+    latencias = []
+    estados = {}
+    por_cliente = [peticiones // concurrencia + (1 if cliente_numero < peticiones % concurrencia else 0) for cliente_numero in range(concurrencia)]
+
+    inicio = perf_counter()
+    await asyncio.gather(*(cliente(host, puerto, endpoint, cantidad, semilla, latencias, estados)
+                           for semilla, cantidad in enumerate(por_cliente) if cantidad))
+    duracion = perf_counter() - inicio
+
+    latencias.sort()
+
+    return {
+        'endpoint': endpoint,
+        'peticiones': peticiones,
+        'concurrencia': concurrencia,
+        'estados': estados,
+        'duracion_s': duracion,
+        'rendimiento_por_s': estados.get(200, 0) / duracion if duracion else 0.0,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+        'p99_ms': percentil(latencias, 99) * 1000,
+        'maximo_ms': (latencias[-1] if latencias else 0.0) * 1000
+    }
+
+def iniciar_servidor(puerto: int, argumentos_servidor: list[str]) -> subprocess.Popen:
+    """Inicia app.py en modo servidor y espera a que acepte conexiones.
+
+    Args:
+        puerto (int): Puerto donde escuchará el servicio.
+        argumentos_servidor (list[str]): Argumentos adicionales para app.py.
+
+    Raises:
+        RuntimeError: Si el servicio no arranca en 30 segundos.
+
+    Returns:
+        subprocess.Popen: Proceso del servicio.
+    """
+
+    import socket
+
+    ruta_app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    proceso = subprocess.Popen([sys.executable, ruta_app, '--servidor', '--puerto', str(puerto), *argumentos_servidor])
+
+    for _ in range(300):
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servicio terminó con el código {proceso.returncode}")
+
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=0.1).close()
+            return proceso
+        except OSError:
+            sleep(0.1)
+
+    proceso.terminate()
+    raise RuntimeError("El servicio no arrancó en 30 segundos")
+
+def main(argumentos: list[str] = None) -> int:
+    """Punto de entrada de la prueba de carga.
+
+    Args:
+        argumentos (list[str], optional): Argumentos de la línea de comandos. Defaults to None (sys.argv).
+
+    Returns:
+        int: 1 si hubo errores o se superó la latencia máxima, 0 en otro caso.
+    """
+
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio HTTP de app.py")
+    parser.add_argument('--host', default='127.0.0.1', help="Dirección del servicio (por defecto, 127.0.0.1).")
+    parser.add_argument('--puerto', type=int, default=8000, help="Puerto del servicio (por defecto, 8000).")
+    parser.add_argument('--endpoint', default='/punto_equilibrio',
+                        choices=['/punto_equilibrio', '/unidades_impuestos', '/analisis_cvu'],
+                        help="Endpoint a probar (por defecto, /punto_equilibrio).")
+    parser.add_argument('-n', '--peticiones', type=int, default=20_000, help="Cantidad total de peticiones (por defecto, 20000).")
+    parser.add_argument('-c', '--concurrencia', type=int, default=64, help="Conexiones simultáneas (por defecto, 64).")
+    parser.add_argument('--iniciar-servidor', action='store_true',
+                        help="Inicia app.py --servidor en el puerto indicado y lo detiene al terminar.")
+    parser.add_argument('--p99-maximo', type=float, metavar='MS', help="Falla si la latencia p99 supera MS milisegundos.")
+    parser.add_argument('--json', action='store_true', help="Imprime los resultados en JSON.")
+    argumentos, argumentos_servidor = parser.parse_known_args(argumentos)
+
+    proceso = iniciar_servidor(argumentos.puerto, argumentos_servidor) if argumentos.iniciar_servidor else None
+
+    try:
+        resultado = asyncio.run(prueba_carga(argumentos.host, argumentos.puerto, argumentos.endpoint,
+                                             argumentos.peticiones, argumentos.concurrencia))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    if argumentos.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"Endpoint: {resultado['endpoint']} ({resultado['peticiones']:,} peticiones, {resultado['concurrencia']} conexiones)")
+        print(f"Estados: {', '.join(f'{estado}: {cantidad:,}' for estado, cantidad in sorted(resultado['estados'].items()))}")
+        print(f"Duración: {resultado['duracion_s']:,.2f} s")
+        print(f"Rendimiento: {resultado['rendimiento_por_s']:,.0f} peticiones/s")
+        print(f"Latencia: p50 {resultado['p50_ms']:,.2f} ms, p95 {resultado['p95_ms']:,.2f} ms, "
+              f"p99 {resultado['p99_ms']:,.2f} ms, máximo {resultado['maximo_ms']:,.2f} ms")
+
+    errores = sum(cantidad for estado, cantidad in resultado['estados'].items() if estado != 200)
+    if errores or (argumentos.p99_maximo is not None and resultado['p99_ms'] > argumentos.p99_maximo):
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+#Las pruebas importan app.py desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def sin_efectos(monkeypatch):
+    """Cada prueba usa una caché vacía y no guarda ejecuciones en el almacén de la carpeta actual."""
+
+    monkeypatch.setattr(app, 'CACHE_RESULTADOS', app.CacheResultados())
+    monkeypatch.setattr(app, 'RUTA_ALMACEN', None)
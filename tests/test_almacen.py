@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def test_guardar_y_cargar(tmp_path):
+    almacen = app.AlmacenEscenarios(str(tmp_path / 'almacen.sqlite'))
+    entradas = {'productos': [{'nombre': 'a', 'ventas': 100, 'inventario_final': 10, 'inventario_inicial': 5},
+                              {'nombre': 'b', 'ventas': 7.5, 'inventario_final': 0, 'inventario_inicial': 0}]}
+    tablas = {
+        'presupuesto_produccion': app.calcular_presupuesto_produccion(app.tabla_productos(entradas['productos'], ['ventas', 'inventario_final', 'inventario_inicial'])),
+        'notas': pd.DataFrame({'texto': ['uno', 'dos']}, index=['x', 'y'])
+    }
+
+    try:
+        ejecucion = almacen.guardar('presupuesto_produccion', entradas, tablas, fecha='2024-01-02T03:04:05')
+        cargada = almacen.cargar(ejecucion)
+
+        assert cargada['calculo'] == 'presupuesto_produccion'
+        assert cargada['fecha'] == '2024-01-02T03:04:05'
+        assert cargada['entradas'] == entradas
+        assert list(cargada['tablas']) == ['presupuesto_produccion', 'notas']
+
+        produccion = cargada['tablas']['presupuesto_produccion']
+        assert produccion.index.tolist() == ['a', 'b']
+        assert produccion.columns.tolist() == tablas['presupuesto_produccion'].columns.tolist()
+        np.testing.assert_array_equal(produccion.to_numpy(dtype=np.float64), tablas['presupuesto_produccion'].to_numpy(dtype=np.float64))
+        assert cargada['tablas']['notas']['texto'].tolist() == ['uno', 'dos']
+
+        assert almacen.historial(producto='b').index.tolist() == [ejecucion]
+        assert almacen.historial(producto='z').empty
+
+        celda = almacen.resultados(tabla='presupuesto_produccion', fila='a', columna='Producción requerida')
+        assert celda['valor'].tolist() == [105]
+    finally:
+        almacen.cerrar()
+
+
+def test_cargar_ejecucion_inexistente(tmp_path):
+    almacen = app.AlmacenEscenarios(str(tmp_path / 'almacen.sqlite'))
+
+    try:
+        with pytest.raises(KeyError):
+            almacen.cargar(1)
+    finally:
+        almacen.cerrar()
+
+
+def test_registrar_ejecucion(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'RUTA_ALMACEN', str(tmp_path / 'almacen.sqlite'))
+    monkeypatch.setattr(app, 'ALMACEN', None)
+
+    ejecucion = app.registrar_ejecucion('prueba', {}, {'tabla': pd.DataFrame({'valor': [1.5]}, index=['a'])})
+
+    try:
+        assert app.obtener_almacen().cargar(ejecucion)['tablas']['tabla'].loc['a', 'valor'] == 1.5
+    finally:
+        app.obtener_almacen().cerrar()
+
+
+def test_almacen_desactivado(tmp_path, monkeypatch):
+    #Sin --almacen (RUTA_ALMACEN es None) no se escribe ningún archivo
+    monkeypatch.chdir(tmp_path)
+
+    assert app.registrar_ejecucion('prueba', {}, {'tabla': pd.DataFrame({'valor': [1.5]})}) is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,48 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_huellas_de_numeros():
+    assert app.clave_contenido(1) == app.clave_contenido(1.0)
+    assert app.clave_contenido(2 ** 53) != app.clave_contenido(2 ** 53 + 1)
+    assert app.clave_contenido(np.int64(2 ** 62 + 1)) != app.clave_contenido(2 ** 62)
+    assert app.clave_contenido(10 ** 400) != app.clave_contenido(10 ** 400 + 1)
+
+
+def test_memoizar_distingue_enteros_grandes():
+    @app.memoizar
+    def identidad(valor):
+        return valor
+
+    assert identidad(2 ** 53) == 2 ** 53
+    assert identidad(2 ** 53 + 1) == 2 ** 53 + 1
+
+
+def test_aciertos_regresan_copias():
+    cache = app.CacheResultados()
+    tabla = pd.DataFrame({'valor': [1.0, 2.0]})
+    cache.guardar('clave', tabla)
+
+    encontrado, copia = cache.obtener('clave')
+    copia.loc[0, 'valor'] = 99
+
+    assert encontrado
+    assert cache.obtener('clave')[1].equals(tabla)
+    assert cache.obtener('otra') == (False, None)
+
+
+def test_resultados_grandes_no_se_serializan(monkeypatch, tmp_path):
+    cache = app.CacheResultados(limite_memoria=1024, carpeta=str(tmp_path), limite_disco=2048)
+
+    def sin_serializar(*args, **kwargs):
+        raise AssertionError("No se debe serializar un resultado que no cabe")
+
+    monkeypatch.setattr(pickle, 'dumps', sin_serializar)
+    cache.guardar('grande', {'tabla': pd.DataFrame({'valor': np.zeros(1000)})})
+
+    assert cache.obtener('grande') == (False, None)
+    assert not list(tmp_path.glob('*.pkl'))
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('redondeo, esperado', [
+    ('mitad_arriba', [3, -3, 2, -2, 2]),
+    ('mitad_par', [2, -2, 2, -2, 2]),
+    ('truncar', [2, -2, 1, -1, 2]),
+    ('piso', [2, -3, 1, -2, 2]),
+    ('techo', [3, -2, 2, -1, 2])
+])
+def test_reglas_de_redondeo(redondeo, esperado):
+    #5/2, -5/2, 3/2, -3/2 y 4/2
+    resultado = app.multiplicar_dividir(np.array([5, -5, 3, -3, 4]), 1, 2, redondeo)
+
+    assert resultado.tolist() == esperado
+
+
+def test_multiplicar_dividir_sin_perder_precision():
+    #El producto no cabe en un flotante exacto; el cociente se corrige con el residuo entero
+    a = np.array([2 ** 53 + 1, 10 ** 15 + 7])
+
+    assert app.multiplicar_dividir(a, 3, 3).tolist() == a.tolist()
+
+
+def test_a_enteros_usa_los_decimales_capturados():
+    #1.005 en flotante es 1.00499999...; capturado con sus decimales son 100.5 centavos
+    assert app.a_enteros(np.array([1.005, -1.005, 2.675]), 100).tolist() == [101, -101, 268]
+    assert app.a_enteros(np.array([1.005]), 100, 'mitad_par').tolist() == [100]
+    assert app.a_enteros(np.array([1.009]), 100, 'truncar').tolist() == [100]
+
+
+@pytest.mark.parametrize('cantidades', [np.array([1e18]), np.array([-1e18]), np.array([2 ** 62])])
+def test_a_enteros_fuera_de_rango(cantidades):
+    with pytest.raises(OverflowError):
+        app.a_enteros(cantidades, 100)
+
+
+def test_a_enteros_no_finitos():
+    with pytest.raises(ValueError):
+        app.a_enteros(np.array([1.0, np.nan]), 100)
+
+
+@pytest.mark.parametrize('escala, redondeo', [(3, 'mitad_arriba'), (0, 'mitad_arriba'), (100, 'bancario')])
+def test_validar_aritmetica(escala, redondeo):
+    with pytest.raises(ValueError):
+        app.validar_aritmetica(escala, redondeo)
+
+
+def test_dinero_suma_y_porcentaje():
+    precios = app.Dinero.desde([0.1, 0.2, 0.7])
+
+    assert precios.suma().a_flotante() == 1.0
+    assert precios.porcentaje([50, 50, 50]).minimos.tolist() == [5, 10, 35]
+
+
+def test_dinero_sumas_fuera_de_rango():
+    grande = app.Dinero.desde(pd.Series([9e16]), 100)
+
+    with pytest.raises(OverflowError):
+        grande + grande
+
+    with pytest.raises(OverflowError):
+        -grande - grande
+
+    with pytest.raises(OverflowError):
+        -app.Dinero(np.array([-2 ** 63]))
+
+    assert (grande - grande).minimos.tolist() == [0]
+    assert (grande + -grande) == app.Dinero(np.array([0]))
+
+
+def test_lote_exacto_fuera_de_rango():
+    datos = pd.DataFrame({'precio_venta': [1e20], 'costo_variable': [1.0], 'costo_fijo': [1.0]})
+
+    with pytest.raises(OverflowError):
+        app.punto_equilibrio_lote(datos, escala=100)
+
+    #Con escala 1 cada monto cabe, pero el margen no
+    datos = pd.DataFrame({'precio_venta': [9e18], 'costo_variable': [-9e18], 'costo_fijo': [1.0]})
+    with pytest.raises(OverflowError):
+        app.punto_equilibrio_lote(datos, escala=1)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def estructura():
+    #bici -> cuadro (1) y rueda (2); rueda -> rayo (32) y aro (1); cuadro -> tubo (3); el tubo también se vende suelto
+    return pd.DataFrame({
+        'producto': ['bici', 'bici', 'rueda', 'rueda', 'cuadro'],
+        'componente': ['cuadro', 'rueda', 'rayo', 'aro', 'tubo'],
+        'cantidad': [1, 2, 32, 1, 3]
+    })
+
+
+def test_niveles_y_ciclos():
+    padres = np.array([0, 0, 1, 2])
+    hijos = np.array([1, 2, 2, 3])
+
+    #El artículo 2 lo usan el 0 (nivel 0) y el 1 (nivel 1), así que queda en el nivel más bajo
+    assert app.niveles_materiales(padres, hijos, 5).tolist() == [0, 1, 2, 3, 0]
+
+    with pytest.raises(ValueError):
+        app.niveles_materiales(np.array([0, 1, 2]), np.array([1, 2, 0]), 3)
+
+    with pytest.raises(ValueError):
+        app.niveles_materiales(np.array([0]), np.array([0]), 1)
+
+
+def test_explosion_materiales():
+    pytest.importorskip('scipy')
+
+    inventarios = pd.DataFrame({'inventario_final': [0, 10], 'inventario_inicial': [4, 0], 'costo_materia_prima': [0, 2.5]},
+                               index=['rueda', 'rayo'])
+    resultado = app.explosion_materiales(estructura(), {'bici': 10, 'tubo': 5}, inventarios)
+
+    #Ruedas: 20 - 4 de inventario = 16; rayos: 16 * 32 + 10 = 522; tubos: 10 * 3 + 5 vendidos sueltos
+    assert resultado.loc['rueda', 'materia_prima_requerida'] == 16
+    assert resultado.loc['rayo', 'materia_prima_produccion'] == 512
+    assert resultado.loc['rayo', 'materia_prima_requerida'] == 522
+    assert resultado.loc['rayo', 'compras_presupuestadas'] == 522 * 2.5
+    assert resultado.loc['tubo', 'materia_prima_requerida'] == 35
+    assert resultado['comprado'].to_dict() == {'bici': False, 'cuadro': False, 'rueda': False, 'rayo': True, 'aro': True, 'tubo': True}
+    assert resultado.loc[['bici', 'rueda', 'rayo'], 'nivel'].tolist() == [0, 1, 2]
+
+
+def test_cache_materiales_invalida_solo_lo_afectado():
+    cache = app.CacheMateriales(estructura())
+
+    assert cache.requerimientos('bici') == {'tubo': 3, 'rayo': 64, 'aro': 2}
+    assert cache.fallos == 1
+    assert set(cache.cache) == {'bici', 'cuadro', 'rueda'}
+
+    cache.requerimientos('rueda')
+    assert cache.aciertos == 1
+
+    #Cambiar la rueda invalida la rueda y la bici, pero no el cuadro
+    assert cache.cambiar_cantidad('rueda', 'rayo', 36) == 2
+    assert set(cache.cache) == {'cuadro'}
+    assert cache.requerimientos('bici') == {'tubo': 3, 'rayo': 72, 'aro': 2}
+
+    assert cache.necesidades({'bici': 10}).to_dict() == {'tubo': 30, 'rayo': 720, 'aro': 20}
+
+
+def test_cache_materiales_rechaza_ciclos():
+    cache = app.CacheMateriales(estructura())
+
+    with pytest.raises(ValueError):
+        cache.cambiar_cantidad('rayo', 'bici', 1)
+
+    with pytest.raises(ValueError):
+        app.CacheMateriales(pd.DataFrame({'producto': ['a', 'b'], 'componente': ['b', 'a'], 'cantidad': [1, 1]}))
+
+
+def test_simulacion_conserva_los_costos_cambiados(monkeypatch):
+    estructura_simple = pd.DataFrame({'producto': ['p', 'p'], 'componente': ['x', 'y'], 'cantidad': [1, 1]})
+    inventarios = pd.DataFrame({'costo_materia_prima': [1.0, 1.0]}, index=['x', 'y'])
+
+    #Recotiza x a 100, cambia la cantidad de y a 3 y termina
+    opciones = iter([2, 100, 1, 3, 3])
+    campos = iter(['x', 'p', 'y'])
+    mostradas = []
+
+    monkeypatch.setattr(app, 'pedir_archivos_materiales', lambda: (estructura_simple, pd.Series({'p': 10.0}), inventarios))
+    monkeypatch.setattr(app, 'pedir_numero', lambda *args: next(opciones))
+    monkeypatch.setattr(app, 'pedir_campo', lambda *args: next(campos))
+    monkeypatch.setattr(app, 'exportar_segundo_plano', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app, 'mostrar_tabla', mostradas.append)
+    monkeypatch.setattr(app, 'pausar', lambda: None)
+
+    app.explosion_materiales_simulacion()
+
+    #x: 10 unidades a 100; y: 30 unidades a 1
+    assert mostradas[0]['compras_presupuestadas'].to_dict() == {'x': 1000, 'y': 30}
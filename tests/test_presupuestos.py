@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def test_multiperiodo_arrastra_inventario():
+    ventas = pd.DataFrame([[100, 200, 150], [10, 10, 40]], index=['a', 'b'], columns=['ene', 'feb', 'mar'])
+
+    tablas = app.presupuesto_produccion_multiperiodo(ventas, pd.Series({'a': 5}), cobertura=10)
+
+    #El inventario final es el 10% de las ventas del siguiente periodo (el último usa las suyas)
+    assert tablas['inventario_final'].loc['a'].tolist() == [20, 15, 15]
+    assert tablas['inventario_inicial'].loc['a'].tolist() == [5, 20, 15]
+    assert tablas['inventario_inicial'].loc['b'].tolist() == [0, 1, 4]
+    assert tablas['produccion'].loc['a'].tolist() == [115, 195, 150]
+    assert tablas['produccion_acumulada'].loc['a'].tolist() == [115, 310, 460]
+    assert 'Total' not in tablas['produccion'].index
+    assert tablas['resumen'].loc['Producción requerida'].tolist() == tablas['produccion'].sum().tolist()
+
+
+def test_multiperiodo_inventario_final_explicito():
+    ventas = pd.DataFrame([[10, 20]], index=['a'], columns=[1, 2])
+    inventario_final = pd.DataFrame([[3, 0]], index=['a'], columns=[1, 2])
+
+    tablas = app.presupuesto_produccion_multiperiodo(ventas, 1, inventario_final)
+    assert tablas['produccion'].loc['a'].tolist() == [12, 17]
+
+    with pytest.raises(ValueError):
+        app.presupuesto_produccion_multiperiodo(ventas)
+
+
+def test_incremental_reporta_diferencias():
+    presupuesto = app.PresupuestoIncremental(pd.DataFrame({'pronostico_ventas': [10], 'precio_unitario': [2.0]}, index=['a']))
+
+    cambios = presupuesto.insertar('b', 5, 3, inventario_final=2, costo_materia_prima_unidad=1.5)
+    assert cambios[('b', 'Ventas presupuestadas')] == 15
+    assert cambios[('b', 'Producción requerida')] == 7
+    assert cambios[('b', 'Compras presupuestadas')] == 10.5
+    assert cambios[(None, 'Ventas presupuestadas')] == 35
+
+    #Sólo cambian las celdas afectadas por el dato modificado
+    cambios = presupuesto.actualizar('b', precio_unitario=4)
+    assert cambios == {('b', 'Precio unitario'): 4.0, ('b', 'Ventas presupuestadas'): 20.0, (None, 'Ventas presupuestadas'): 40.0}
+
+    cambios = presupuesto.eliminar('a')
+    assert cambios[('a', 'Pronóstico de ventas')] is None
+    assert presupuesto.totales['Ventas presupuestadas'] == 20
+
+    tabla = presupuesto.tabla()
+    assert tabla.columns.tolist() == ['b', 'Total']
+    assert tabla.loc['Producción requerida', 'Total'] == 7
+
+
+def test_incremental_producto_llamado_total():
+    presupuesto = app.PresupuestoIncremental()
+    presupuesto.insertar('a', 10)
+
+    cambios = presupuesto.insertar('Total', 5)
+    assert cambios[('Total', 'Pronóstico de ventas')] == 5
+    assert cambios[(None, 'Pronóstico de ventas')] == 15
+
+    tabla = presupuesto.tabla()
+    assert tabla.columns.tolist() == ['a', 'Total', 'Total']
+    assert tabla.loc['Pronóstico de ventas'].tolist() == [10, 5, 15]
+
+
+def test_incremental_totales_exactos():
+    presupuesto = app.PresupuestoIncremental()
+    valores = {}
+
+    for numero in range(2000):
+        nombre = f'p{numero % 50}'
+        valores[nombre] = [1e16, 0.1, 3.3, 1e-3][numero % 4] * (numero + 1)
+        presupuesto.insertar(nombre, valores[nombre])
+
+    assert presupuesto.totales['Pronóstico de ventas'] == math.fsum(valores.values())
+
+
+def test_incremental_rechaza_repetidos():
+    with pytest.raises(ValueError, match='a'):
+        app.PresupuestoIncremental(pd.DataFrame({'pronostico_ventas': [1, 2]}, index=['a', 'a']))
+
+    with pytest.raises(KeyError):
+        app.PresupuestoIncremental().eliminar('x')
+
+
+def test_presupuesto_produccion_sin_fila_de_total():
+    productos = pd.DataFrame({'ventas': [100, 50], 'inventario_final': [10, 0], 'inventario_inicial': [5, 20]}, index=['a', 'Total'])
+
+    resultado = app.calcular_presupuesto_produccion(productos)
+
+    #Un producto puede llamarse "Total"; el total sólo se agrega al mostrar o exportar
+    assert resultado.index.tolist() == ['a', 'Total']
+    assert resultado['Producción requerida'].tolist() == [105, 30]
+
+    con_total = app.agregar_total(resultado)
+    assert con_total.index.tolist() == ['a', 'Total', 'Total']
+    assert con_total['Producción requerida'].tolist() == [105, 30, 135]
+    assert isinstance(con_total.index, pd.CategoricalIndex)
+
+
+def test_tablas_de_resultado_sin_tipos_reducidos():
+    productos = pd.DataFrame({'ventas': [100, 100], 'inventario_final': [0, 0], 'inventario_inicial': [0, 0]}, index=['a', 'b'])
+
+    resultado = app.calcular_presupuesto_produccion(productos)
+
+    #Los valores cabrían en int8, pero la tabla de resultado se queda en int64 para no desbordarse al operar
+    assert set(resultado.dtypes) == {np.dtype(np.int64)}
+    assert (resultado['Producción requerida'] * 2).tolist() == [200, 200]
+
+    #Sólo se reducen al medirlas (y al exportarlas a Parquet o Arrow)
+    assert set(app.reducir_tabla(resultado).dtypes) == {np.dtype(np.int8)}
+    reporte = app.reporte_memoria({'produccion': resultado})
+    assert reporte.loc['produccion', 'Memoria (KiB)'] < reporte.loc['produccion', 'Sin compactar (KiB)']
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def tabla_lote():
+    return pd.DataFrame({
+        'sku': ['ok', 'cero', 'negativo', 'nan', 'fijo_infinito', 'precio_infinito', 'costo_infinito'],
+        'precio_venta': [10.0, 5.0, 4.0, np.nan, 10.0, np.inf, 10.0],
+        'costo_variable': [6.0, 5.0, 6.0, 1.0, 2.0, 1.0, -np.inf],
+        'costo_fijo': [1000.0, 100.0, 100.0, 100.0, np.inf, 100.0, 100.0]
+    })
+
+
+@pytest.mark.parametrize('escala', [None, 100])
+def test_lote_estados(escala):
+    resultado = app.punto_equilibrio_lote(tabla_lote(), escala=escala)
+
+    assert resultado['estado'].astype(str).tolist() == ['OK', 'Margen cero', 'Margen negativo'] + ['Dato inválido'] * 4
+    assert resultado['sku'].tolist() == tabla_lote()['sku'].tolist()
+    assert resultado['punto_equilibrio_unidades'].iloc[0] == pytest.approx(250)
+    assert resultado['punto_equilibrio_pesos'].iloc[0] == pytest.approx(2500)
+    assert resultado['punto_equilibrio_unidades'].iloc[1:].isna().all()
+    assert resultado['punto_equilibrio_pesos'].iloc[1:].isna().all()
+    assert resultado['margen_contribucion_unitario'].iloc[3:].isna().all()
+
+
+def test_lote_exacto_igual_al_flotante_en_montos_exactos():
+    generador = np.random.default_rng(0)
+    datos = pd.DataFrame({
+        'precio_venta': generador.integers(100, 10_000, 1000) / 100,
+        'costo_variable': generador.integers(0, 10_000, 1000) / 100,
+        'costo_fijo': generador.integers(0, 1_000_000, 1000) / 100
+    })
+
+    flotante = app.punto_equilibrio_lote(datos)
+    exacto = app.punto_equilibrio_lote(datos, escala=100)
+
+    pd.testing.assert_series_equal(flotante['estado'], exacto['estado'])
+    np.testing.assert_allclose(exacto['punto_equilibrio_pesos'], flotante['punto_equilibrio_pesos'].round(2), rtol=0, atol=0.005)
+
+
+def test_lote_sin_columnas():
+    with pytest.raises(KeyError):
+        app.punto_equilibrio_lote(pd.DataFrame({'precio_venta': [1.0]}))
+
+
+def tabla_multilinea():
+    productos = pd.DataFrame({
+        'precio_venta': [10.0, 20.0, 35.0],
+        'costo_variable': [4.0, 12.0, 20.0],
+        'porcentaje_margen_contribucion': [50.0, 30.0, 20.0]
+    }, index=['a', 'b', 'c'])
+    productos['margen_contribucion'] = productos['precio_venta'] - productos['costo_variable']
+
+    return productos
+
+
+@pytest.mark.parametrize('escala', [None, 100])
+def test_multilinea(escala):
+    resultado = app.calcular_punto_equilibrio_multilinea(tabla_multilinea(), 8400.0, escala=escala)
+
+    #Margen ponderado: 6 * 0.5 + 8 * 0.3 + 15 * 0.2 = 8.4, así que el punto de equilibrio es de 1,000 unidades
+    assert resultado['punto_equilibrio_unidades'] == pytest.approx(1000)
+    assert resultado['unidades']['Punto de equilibrio por unidad'].tolist() == pytest.approx([500, 300, 200])
+    assert resultado['pesos']['Punto de equilibrio en pesos'].tolist() == pytest.approx([5000, 6000, 7000])
+    assert resultado['punto_equilibrio_pesos'] == pytest.approx(18000)
+    assert resultado['datos'].index.tolist() == ['a', 'b', 'c']
+
+
+def test_mezcla_coincide_con_multilinea():
+    productos = tabla_multilinea()
+
+    resultado = app.calcular_punto_equilibrio_multilinea(productos, 9000.0)
+    mezcla = app.punto_equilibrio_mezcla([app.Producto(nombre, fila.precio_venta, fila.costo_variable, fila.porcentaje_margen_contribucion)
+                                          for nombre, fila in productos.iterrows()], 9000.0)
+
+    assert mezcla.unidades == pytest.approx(9000 / 8.4)
+    assert mezcla.unidades == resultado['punto_equilibrio_unidades']
+    assert mezcla.pesos == resultado['punto_equilibrio_pesos']
+
+
+def test_mezcla_sin_margen():
+    with pytest.raises(ZeroDivisionError):
+        app.punto_equilibrio_mezcla([app.Producto('a', 5.0, 5.0)], 100.0)
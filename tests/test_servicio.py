@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+import app
+
+
+async def pedir(puerto: int, metodo: str, ruta: str, cuerpo=None) -> tuple[int, object]:
+    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    datos = b'' if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nContent-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode('latin-1') + datos)
+    await escritor.drain()
+
+    respuesta = await lector.read()
+    escritor.close()
+
+    encabezados, _, contenido = respuesta.partition(b'\r\n\r\n')
+    return int(encabezados.split()[1]), json.loads(contenido)
+
+
+def con_servicio(prueba, **opciones):
+    """Ejecuta una prueba asíncrona con un servicio escuchando en un puerto libre."""
+
+    async def ejecutar():
+        servicio = app.ServicioCalculo(puerto=0, trabajadores=2, **opciones)
+        listo = asyncio.Event()
+        tarea = asyncio.create_task(servicio.servir(listo))
+        await listo.wait()
+
+        try:
+            return await prueba(servicio)
+        finally:
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+
+    return asyncio.run(ejecutar())
+
+
+def test_lote_punto_equilibrio():
+    entradas = [{'precio_venta': 10, 'costo_variable': 6, 'costo_fijo': 1000},
+                {'precio_venta': 5, 'costo_variable': 5, 'costo_fijo': 100}]
+
+    assert app.lote_punto_equilibrio(entradas) == [
+        {'punto_equilibrio_unidades': 250.0, 'punto_equilibrio_pesos': 2500.0, 'estado': 'OK'},
+        {'punto_equilibrio_unidades': None, 'punto_equilibrio_pesos': None, 'estado': 'Margen cero'}
+    ]
+
+
+def test_peticiones_concurrentes_se_juntan_en_lotes():
+    async def prueba(servicio):
+        peticiones = [pedir(servicio.puerto, 'POST', '/punto_equilibrio',
+                            {'precio_venta': 10 + numero, 'costo_variable': 6, 'costo_fijo': 1000})
+                      for numero in range(40)]
+        respuestas = await asyncio.gather(*peticiones)
+        _, salud = await pedir(servicio.puerto, 'GET', '/salud')
+        return respuestas, salud
+
+    respuestas, salud = con_servicio(prueba, ventana_ms=50)
+
+    #Cada respuesta corresponde a su propia petición aunque se hayan calculado juntas
+    for numero, (estado, resultado) in enumerate(respuestas):
+        assert estado == 200
+        assert resultado['punto_equilibrio_unidades'] == pytest.approx(1000 / (4 + numero))
+
+    lotes = salud['lotes']['/punto_equilibrio']
+    assert lotes['peticiones'] == 40
+    assert lotes['lotes'] < 40
+
+
+def test_lista_de_entradas_y_errores():
+    async def prueba(servicio):
+        return [await pedir(servicio.puerto, 'POST', '/punto_equilibrio',
+                            [{'precio_venta': 4, 'costo_variable': 2, 'costo_fijo': 10}, {'precio_venta': 9, 'costo_variable': 6, 'costo_fijo': 30}]),
+                await pedir(servicio.puerto, 'POST', '/punto_equilibrio', {'precio_venta': 4}),
+                await pedir(servicio.puerto, 'GET', '/punto_equilibrio'),
+                await pedir(servicio.puerto, 'POST', '/no_existe', {})]
+
+    lista, faltante, metodo, ruta = con_servicio(prueba)
+
+    assert lista[0] == 200
+    assert [resultado['punto_equilibrio_unidades'] for resultado in lista[1]] == [5.0, 10.0]
+    assert faltante[0] == 400
+    assert metodo[0] == 405
+    assert ruta[0] == 404
+
+
+def test_escenario_en_linea():
+    escenario = {'calculo': 'presupuesto_produccion',
+                 'entradas': {'productos': [{'nombre': 'a', 'ventas': 100, 'inventario_final': 10, 'inventario_inicial': 5}]}}
+
+    async def prueba(servicio):
+        return [await pedir(servicio.puerto, 'POST', '/escenario', escenario),
+                await pedir(servicio.puerto, 'POST', '/escenario', {'calculo': 'explosion_materiales',
+                                                                    'entradas': {'archivo_estructura': '/etc/passwd', 'produccion': {}}}),
+                await pedir(servicio.puerto, 'POST', '/escenario', {'calculo': 'analisis_cvu_simulacion',
+                                                                    'entradas': {'actual': {}, 'simulaciones': 10 ** 12}})]
+
+    correcto, archivo, simulaciones = con_servicio(prueba)
+
+    assert correcto[0] == 200
+    tabla = correcto[1]['presupuesto_produccion']
+    assert tabla['index'] == ['a']
+    assert tabla['data'][0][tabla['columns'].index('Producción requerida')] == 105
+
+    assert archivo[0] == 400
+    assert 'archivo_estructura' in archivo[1]['error']
+    assert simulaciones[0] == 400
+
+
+def test_content_length_invalido():
+    async def enviar_crudo(puerto: int, longitud: str) -> bytes:
+        lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+        escritor.write(f"POST /punto_equilibrio HTTP/1.1\r\nContent-Length: {longitud}\r\n\r\n{{}}".encode('latin-1'))
+        await escritor.drain()
+
+        respuesta = await lector.read()
+        escritor.close()
+        return respuesta
+
+    async def prueba(servicio):
+        respuestas = [await enviar_crudo(servicio.puerto, longitud) for longitud in ('abc', '-5', '²')]
+        return respuestas, await pedir(servicio.puerto, 'GET', '/salud')
+
+    respuestas, salud = con_servicio(prueba)
+
+    #Se responde 400 y el servicio sigue atendiendo
+    for respuesta in respuestas:
+        assert respuesta.startswith(b'HTTP/1.1 400 ')
+        assert b'Content-Length' in respuesta
+    assert salud[0] == 200
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import app
+
+#Los costos variables son totales: utilidad = precio * ventas - costos variables - costos fijos
+ACTUAL = {'Precio de venta': 50.0, 'Costos Variables': 300_000.0, 'Costos Fijos': 100_000.0, 'Ventas': 10_000.0}
+
+
+def test_simulacion_fija():
+    resultado = app.simular_cvu(ACTUAL, {}, simulaciones=1000, trabajadores=1)
+
+    #Sin distribuciones todos los escenarios son la utilidad actual: 50 * 10,000 - 300,000 - 100,000
+    assert resultado['utilidad_esperada'] == 100_000
+    assert resultado['desviacion_estandar'] == 0
+    assert resultado['probabilidad_perdida'] == 0
+    assert resultado['minimo'] == resultado['maximo'] == 100_000
+
+
+def test_simulacion_reproducible_y_por_bloques():
+    distribuciones = {'Ventas': {'tipo': 'normal', 'desviacion': 10}, 'Precio de venta': {'tipo': 'uniforme', 'minimo': -5, 'maximo': 5}}
+
+    primera = app.simular_cvu(ACTUAL, distribuciones, simulaciones=50_000, semilla=7, trabajadores=1, tamano_bloque=10_000)
+    segunda = app.simular_cvu(ACTUAL, distribuciones, simulaciones=50_000, semilla=7, trabajadores=2, tamano_bloque=10_000)
+
+    #El resultado depende de la semilla y del tamaño de bloque, no de la cantidad de procesos
+    assert primera == segunda
+    assert primera['percentiles'][1] <= primera['percentiles'][50] <= primera['percentiles'][99]
+    assert primera['minimo'] <= primera['percentiles'][1] and primera['percentiles'][99] <= primera['maximo']
+
+
+def test_estadisticas_contra_la_distribucion():
+    #Sólo varían las ventas: utilidad = ventas * 50 - 400,000, con media 100,000 y desviación 50 * 1,000
+    resultado = app.simular_cvu(ACTUAL, {'Ventas': {'tipo': 'normal', 'desviacion': 10}}, simulaciones=200_000, tamano_bloque=30_000, trabajadores=1)
+
+    assert resultado['utilidad_esperada'] == pytest.approx(100_000, rel=0.01)
+    assert resultado['desviacion_estandar'] == pytest.approx(50_000, rel=0.01)
+    assert resultado['percentiles'][50] == pytest.approx(100_000, rel=0.02)
+    #P(utilidad < 0) = P(z < -2)
+    assert resultado['probabilidad_perdida'] == pytest.approx(0.0228, abs=0.002)
+
+
+def test_varianza_con_media_grande():
+    #Con una media muy grande respecto a la dispersión, E[x²] - E[x]² pierde todas las cifras
+    actual = {**ACTUAL, 'Ventas': 1e10}
+    resultado = app.simular_cvu(actual, {'Ventas': {'tipo': 'normal', 'desviacion': 1e-6}}, simulaciones=100_000, tamano_bloque=25_000, trabajadores=1)
+
+    #Desviación de las ventas: 1e10 * 1e-8 = 100 unidades, por 50 de precio
+    assert resultado['desviacion_estandar'] == pytest.approx(5000, rel=0.02)